@@ -1,16 +1,127 @@
 import { NextResponse } from 'next/server';
-import prisma from '@/lib/prisma';
-import { hashPassword, comparePassword, generateToken, getAuthUser } from '@/lib/auth';
-import { calculateDistance, isInMaharashtra, filterFarmersWithinRadius } from '@/lib/gps';
-import Razorpay from 'razorpay';
+import prisma, { readClient, markWritten, getPrimaryPoolStats, getReplicaPoolStats } from '@/lib/prisma';
+import {
+  hashPassword,
+  comparePassword,
+  generateToken,
+  verifyToken,
+  getAuthUser,
+  getCachedUser,
+  evictAuthUser,
+  clearAuthCache,
+  getAuthCacheStats,
+} from '@/lib/auth';
+import { calculateDistance, isInMaharashtra } from '@/lib/gps';
+import {
+  findFarmerIdsWithinRadius,
+  findFarmersWithinRadius,
+  upsertFarmerLocation,
+  removeFarmerLocation,
+  getFarmerLocationStats,
+  invalidateFarmerLocations,
+} from '@/lib/farmer-locations';
+import {
+  KEYSET_ORDER,
+  QueryParamError,
+  parsePagination,
+  withCursor,
+  pageTake,
+  parseFields,
+  pagePayload,
+  pageResponse,
+} from '@/lib/pagination';
+import {
+  bumpCatalog,
+  roundLocation,
+  catalogResponse,
+  clearCatalogCache,
+  getCatalogCacheStats,
+} from '@/lib/catalog-cache';
+import {
+  BULK_MODES,
+  BulkInputError,
+  readBulkRows,
+  validateProductRows,
+  validateStockRows,
+} from '@/lib/bulk-products';
+import { parseSearchParams, searchProducts } from '@/lib/product-search';
+import { bumpCounters, recordOrder, reconcileStats, getStats, getDailySeries } from '@/lib/stats';
+import { instrument, registerGauges, getMetricsSnapshot, renderPrometheus } from '@/lib/metrics';
+import { PoolBusyError, getPasswordPoolStats } from '@/lib/password-pool';
+import {
+  kickOutbox,
+  waitForGatewayOrder,
+  isValidSignature,
+  markOrderPaid,
+  getPaymentStats,
+  getOutboxCounts,
+} from '@/lib/payments';
+import {
+  recordOrderEvent,
+  publishOrderEvent,
+  getOrderEventsAfter,
+  openOrderStream,
+  getOrderEventStats,
+} from '@/lib/order-events';
+import { captureTraffic, getTrafficCaptureStats } from '@/lib/traffic-capture';
+import {
+  parseOrderWindow,
+  inOrderWindow,
+  findOrders,
+  orderListResponse,
+  runOrderMaintenance,
+  getOrderArchiveStats,
+} from '@/lib/order-archive';
 import crypto from 'crypto';
 
-// Initialize Razorpay
-const razorpay = new Razorpay({
-  key_id: process.env.RAZORPAY_KEY_ID,
-  key_secret: process.env.RAZORPAY_KEY_SECRET,
+registerGauges('farmerLocations', getFarmerLocationStats);
+registerGauges('passwordPool', getPasswordPoolStats);
+registerGauges('authCache', getAuthCacheStats);
+registerGauges('catalog', getCatalogCacheStats);
+registerGauges('payments', getPaymentStats);
+registerGauges('orderEvents', getOrderEventStats);
+registerGauges('dbPrimary', getPrimaryPoolStats);
+registerGauges('dbReplica', getReplicaPoolStats);
+registerGauges('trafficCapture', getTrafficCaptureStats);
+registerGauges('orderArchive', getOrderArchiveStats);
+registerGauges('process', () => {
+  const { rss, heapUsed, external } = process.memoryUsage();
+  return { rssBytes: rss, heapUsedBytes: heapUsed, externalBytes: external };
 });
 
+// Fields each list endpoint accepts in ?fields= (relations keep their default include)
+const PRODUCT_FIELDS = {
+  farmerId: true,
+  name: true,
+  category: true,
+  price: true,
+  quantity: true,
+  image: true,
+  updatedAt: true,
+  farmer: { include: { farmerProfile: true } },
+};
+
+const ORDER_FIELDS = {
+  buyerId: true,
+  paymentMode: true,
+  paymentStatus: true,
+  orderStatus: true,
+  razorpayOrderId: true,
+  razorpayPaymentId: true,
+  totalAmount: true,
+  updatedAt: true,
+};
+
+const USER_FIELDS = {
+  email: true,
+  name: true,
+  role: true,
+  approved: true,
+  updatedAt: true,
+  buyerProfile: true,
+  farmerProfile: true,
+};
+
 // ============ AUTH ROUTES ============
 
 // Register
@@ -42,7 +153,7 @@ async function handleRegister(request) {
     }
 
     // Create user
-    const hashedPassword = hashPassword(password);
+    const hashedPassword = await hashPassword(password);
     const user = await prisma.user.create({
       data: {
         email,
@@ -75,6 +186,11 @@ async function handleRegister(request) {
       });
     }
 
+    await bumpCounters({
+      totalBuyers: role === 'buyer' ? 1 : 0,
+      pendingApprovals: role === 'farmer' ? 1 : 0,
+    });
+
     const token = generateToken(user);
 
     return NextResponse.json({
@@ -89,6 +205,9 @@ async function handleRegister(request) {
       },
     },{status:201});
   } catch (error) {
+    if (error instanceof PoolBusyError) {
+      return NextResponse.json({ error: 'Server busy, please retry' }, { status: 503 });
+    }
     console.error('Register error:', error);
     return NextResponse.json({ error: 'Registration failed' }, { status: 500 });
   }
@@ -118,7 +237,7 @@ async function handleLogin(request) {
     }
 
     // Verify password
-    const isValid = comparePassword(password, user.password);
+    const isValid = await comparePassword(password, user.password);
     if (!isValid) {
       return NextResponse.json({ error: 'Invalid credentials' }, { status: 401 });
     }
@@ -141,6 +260,7 @@ async function handleLogin(request) {
         where: { userId: user.id },
         data: { latitude: lat, longitude: lon },
       });
+      evictAuthUser(user.id);
     }
 
     const token = generateToken(user);
@@ -158,6 +278,9 @@ async function handleLogin(request) {
       },
     });
   } catch (error) {
+    if (error instanceof PoolBusyError) {
+      return NextResponse.json({ error: 'Server busy, please retry' }, { status: 503 });
+    }
     console.error('Login error:', error);
     return NextResponse.json({ error: 'Login failed' }, { status: 500 });
   }
@@ -171,13 +294,7 @@ async function handleGetMe(request) {
       return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
     }
 
-    const user = await prisma.user.findUnique({
-      where: { id: authUser.userId },
-      include: {
-        buyerProfile: true,
-        farmerProfile: true,
-      },
-    });
+    const user = await getCachedUser(authUser.userId);
 
     if (!user) {
       return NextResponse.json({ error: 'User not found' }, { status: 404 });
@@ -203,75 +320,95 @@ async function handleGetMe(request) {
 async function handleGetProducts(request) {
   try {
     const { searchParams } = new URL(request.url);
-    const latitude = searchParams.get('latitude');
-    const longitude = searchParams.get('longitude');
     const category = searchParams.get('category');
+    const page = parsePagination(searchParams);
+    const select = parseFields(searchParams, PRODUCT_FIELDS);
+
+    // Rounded so buyers a few hundred metres apart share one cache entry
+    const hasLocation = searchParams.get('latitude') && searchParams.get('longitude');
+    const latitude = hasLocation ? roundLocation(searchParams.get('latitude')) : null;
+    const longitude = hasLocation ? roundLocation(searchParams.get('longitude')) : null;
+
+    const key = [
+      latitude,
+      longitude,
+      category,
+      searchParams.get('limit'),
+      searchParams.get('cursor'),
+      searchParams.get('fields'),
+    ].join('|');
+
+    // 304 when the client's ETag still matches the catalog version
+    return await catalogResponse(request, { category, key }, async () => {
+      const where = {
+        quantity: { gt: 0 },
+        ...(category && { category }),
+      };
 
-    let products;
-
-    if (latitude && longitude) {
-      // Get all farmers
-      const farmers = await prisma.user.findMany({
-        where: {
-          role: 'farmer',
-          approved: true,
-        },
-        include: {
-          farmerProfile: true,
-        },
-      });
-
-      // Filter farmers within 10km
-      const nearbyFarmers = filterFarmersWithinRadius(
-        farmers,
-        parseFloat(latitude),
-        parseFloat(longitude),
-        10
-      );
-
-      const farmerIds = nearbyFarmers.map(f => f.id);
+      if (hasLocation) {
+        // Farmers within 10km, from the in-memory coordinate table
+        const farmerIds = await findFarmerIdsWithinRadius(latitude, longitude, 10);
 
-      // Get products from nearby farmers
-      products = await prisma.product.findMany({
-        where: {
-          farmerId: { in: farmerIds },
-          quantity: { gt: 0 },
-          ...(category && { category }),
-        },
-        include: {
-          farmer: {
-            include: {
-              farmerProfile: true,
-            },
-          },
-        },
-        orderBy: { createdAt: 'desc' },
-      });
-    } else {
-      // Return all products (for admin or testing)
-      products = await prisma.product.findMany({
-        where: {
-          quantity: { gt: 0 },
-          ...(category && { category }),
-        },
-        include: {
-          farmer: {
-            include: {
-              farmerProfile: true,
-            },
-          },
-        },
-        orderBy: { createdAt: 'desc' },
+        // Get products from nearby farmers
+        where.farmerId = { in: farmerIds };
+      }
+      // Otherwise return all products (for admin or testing)
+
+      const products = await readClient('catalog').product.findMany({
+        where: withCursor(where, page),
+        ...(select
+          ? { select }
+          : { include: { farmer: { include: { farmerProfile: true } } } }),
+        orderBy: KEYSET_ORDER,
+        ...pageTake(page),
       });
-    }
 
-    return NextResponse.json(products);
+      return pagePayload(products, page);
+    });
   } catch (error) {
+    if (error instanceof QueryParamError) {
+      return NextResponse.json({ error: error.message }, { status: 400 });
+    }
     console.error('Get products error:', error);
     return NextResponse.json({ error: 'Failed to get products' }, { status: 500 });
   }
 }
 
+// Search products by name, ranked by relevance and distance from the buyer
+async function handleSearchProducts(request) {
+  try {
+    const { searchParams } = new URL(request.url);
+    const category = searchParams.get('category');
+    const search = parseSearchParams(searchParams);
+
+    const hasLocation = searchParams.get('latitude') && searchParams.get('longitude');
+    const latitude = hasLocation ? roundLocation(searchParams.get('latitude')) : null;
+    const longitude = hasLocation ? roundLocation(searchParams.get('longitude')) : null;
+
+    const key = [
+      'search',
+      search.q.toLowerCase(),
+      latitude,
+      longitude,
+      category,
+      search.limit,
+      search.offset,
+    ].join('|');
+
+    return await catalogResponse(request, { category, key }, async () => {
+      // Same 10km radius as the product list
+      const distances = hasLocation ? await findFarmersWithinRadius(latitude, longitude, 10) : null;
+      return searchProducts(search, { category, distances, radiusKm: 10 });
+    });
+  } catch (error) {
+    if (error instanceof QueryParamError) {
+      return NextResponse.json({ error: error.message }, { status: 400 });
+    }
+    console.error('Search products error:', error);
+    return NextResponse.json({ error: 'Failed to search products' }, { status: 500 });
+  }
+}
+
 // Create product (farmer only)
 async function handleCreateProduct(request) {
   try {
@@ -298,6 +435,9 @@ async function handleCreateProduct(request) {
       },
     });
 
+    await bumpCounters({ totalProducts: 1 });
+    bumpCatalog([product.category]);
+
     return NextResponse.json(product);
   } catch (error) {
     console.error('Create product error:', error);
@@ -305,6 +445,118 @@ async function handleCreateProduct(request) {
   }
 }
 
+// Rows per createMany; keeps each INSERT well under Postgres' bind parameter limit
+const BULK_CHUNK_SIZE = 1000;
+
+// Bulk create products or apply stock deltas from CSV/JSON (farmer only)
+async function handleBulkProducts(request) {
+  try {
+    const authUser = getAuthUser(request);
+    if (!authUser || authUser.role !== 'farmer') {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+    }
+
+    const { searchParams } = new URL(request.url);
+    const mode = searchParams.get('mode') || 'create';
+    if (!BULK_MODES.includes(mode)) {
+      return NextResponse.json({ error: 'Invalid mode' }, { status: 400 });
+    }
+
+    const rows = await readBulkRows(request);
+    return mode === 'stock'
+      ? await bulkUpdateStock(authUser, rows)
+      : await bulkCreateProducts(authUser, rows);
+  } catch (error) {
+    if (error instanceof BulkInputError) {
+      return NextResponse.json({ error: error.message }, { status: 400 });
+    }
+    console.error('Bulk products error:', error);
+    return NextResponse.json({ error: 'Failed to upload products' }, { status: 500 });
+  }
+}
+
+// All or nothing: a single invalid row rejects the upload with every row error listed
+async function bulkCreateProducts(authUser, rows) {
+  const { valid, errors } = validateProductRows(rows);
+  if (errors.length > 0) {
+    return NextResponse.json({ created: 0, errors }, { status: 400 });
+  }
+
+  // Ids are assigned here so results can be reported without reading the rows back
+  const data = valid.map(row => ({
+    id: crypto.randomUUID(),
+    farmerId: authUser.userId,
+    name: row.name,
+    category: row.category,
+    price: row.price,
+    quantity: row.quantity,
+    image: row.image,
+  }));
+
+  const chunks = [];
+  for (let i = 0; i < data.length; i += BULK_CHUNK_SIZE) {
+    chunks.push(data.slice(i, i + BULK_CHUNK_SIZE));
+  }
+  await prisma.$transaction(chunks.map(chunk => prisma.product.createMany({ data: chunk })));
+
+  await bumpCounters({ totalProducts: data.length });
+  bumpCatalog(data.map(product => product.category));
+
+  return NextResponse.json({
+    created: data.length,
+    results: data.map((product, i) => ({ row: valid[i].index, status: 'created', id: product.id })),
+  });
+}
+
+// Each product is updated independently; rows that fail are reported, the rest apply
+async function bulkUpdateStock(authUser, rows) {
+  const { deltas, errors } = validateStockRows(rows);
+  const productIds = [...deltas.keys()];
+  const amounts = productIds.map(id => deltas.get(id).delta);
+
+  // One conditional update for every product; other farmers' products and
+  // changes that would take stock below zero are skipped
+  const updated = productIds.length === 0 ? [] : await prisma.$queryRaw`
+    UPDATE "Product" AS p
+    SET "quantity" = p."quantity" + d.delta, "updatedAt" = NOW()
+    FROM unnest(${productIds}::text[], ${amounts}::double precision[]) AS d(id, delta)
+    WHERE p."id" = d.id AND p."farmerId" = ${authUser.userId} AND p."quantity" + d.delta >= 0
+    RETURNING p."id", p."quantity", p."category"
+  `;
+  const updatedById = new Map(updated.map(row => [row.id, row]));
+
+  // Tell "not yours / missing" apart from "would go negative" for the skipped ones
+  const skippedIds = productIds.filter(id => !updatedById.has(id));
+  const owned = skippedIds.length === 0 ? [] : await prisma.product.findMany({
+    where: { id: { in: skippedIds }, farmerId: authUser.userId },
+    select: { id: true },
+  });
+  const ownedIds = new Set(owned.map(row => row.id));
+
+  const results = [...errors];
+  for (const [id, { rows: rowIndexes }] of deltas) {
+    const row = updatedById.get(id);
+    for (const index of rowIndexes) {
+      if (row) {
+        results.push({ row: index, status: 'updated', id, quantity: row.quantity });
+      } else {
+        results.push({
+          row: index,
+          id,
+          error: ownedIds.has(id) ? 'Stock would go below zero' : 'Product not found',
+        });
+      }
+    }
+  }
+  results.sort((a, b) => a.row - b.row);
+
+  if (updated.length > 0) {
+    bumpCatalog(updated.map(row => row.category));
+  }
+
+  return NextResponse.json({ updated: updated.length, results });
+}
+
 // Update product
 async function handleUpdateProduct(request, productId) {
   try {
@@ -335,6 +587,8 @@ async function handleUpdateProduct(request, productId) {
       },
     });
 
+    bumpCatalog([product.category, updatedProduct.category]);
+
     return NextResponse.json(updatedProduct);
   } catch (error) {
     console.error('Update product error:', error);
@@ -366,6 +620,9 @@ async function handleDeleteProduct(request, productId) {
       where: { id: productId },
     });
 
+    await bumpCounters({ totalProducts: -1 });
+    bumpCatalog([product.category]);
+
     return NextResponse.json({ message: 'Product deleted' });
   } catch (error) {
     console.error('Delete product error:', error);
@@ -395,6 +652,46 @@ async function handleGetFarmerProducts(request) {
 
 // ============ ORDER ROUTES ============
 
+// Raised inside the order transaction when stock ran out under a concurrent order
+class InsufficientStockError extends Error {
+  constructor(productName) {
+    super(`Insufficient quantity for ${productName}`);
+    this.productName = productName;
+  }
+}
+
+// How long checkout waits for the outbox to attach a Razorpay order id before
+// answering 202 and letting the client poll GET /orders/:id/payment
+const GATEWAY_WAIT_MS = parseInt(process.env.PAYMENT_CREATE_WAIT_MS || '3000', 10);
+
+const ORDER_INCLUDE = {
+  orderItems: {
+    include: {
+      product: true,
+    },
+  },
+};
+
+// A retried checkout returns the order the first attempt created
+function replayedOrder(order) {
+  return NextResponse.json(order, { headers: { 'Idempotent-Replayed': 'true' } });
+}
+
+// Archiving an order deletes its OrderIdempotencyKey row with it, so a key
+// that is not live is looked up in the archive (unique per buyer there too)
+async function findIdempotentOrder(buyerId, key) {
+  const entry = await prisma.orderIdempotencyKey.findUnique({
+    where: { buyerId_key: { buyerId, key } },
+    include: { order: { include: ORDER_INCLUDE } },
+  });
+  if (entry) return entry.order;
+
+  return prisma.orderArchive.findUnique({
+    where: { buyerId_idempotencyKey: { buyerId, idempotencyKey: key } },
+    include: ORDER_INCLUDE,
+  });
+}
+
 // Create order
 async function handleCreateOrder(request) {
   try {
@@ -405,7 +702,15 @@ async function handleCreateOrder(request) {
 
     const body = await request.json();
     const { items, paymentMode } = body;
-    console.log(items,paymentMode);
+
+    const idempotencyKey = request.headers.get('idempotency-key') || body.idempotencyKey || null;
+    if (idempotencyKey !== null && (typeof idempotencyKey !== 'string' || idempotencyKey.length > 200)) {
+      return NextResponse.json({ error: 'Invalid idempotency key' }, { status: 400 });
+    }
+    if (idempotencyKey) {
+      const existing = await findIdempotentOrder(authUser.userId, idempotencyKey);
+      if (existing) return replayedOrder(existing);
+    }
 
     if (!items || !Array.isArray(items) || items.length === 0) {
       return NextResponse.json({ error: 'No items in order' }, { status: 400 });
@@ -415,20 +720,30 @@ async function handleCreateOrder(request) {
       return NextResponse.json({ error: 'Invalid payment mode' }, { status: 400 });
     }
 
+    // Requested quantity per product (the same product may appear twice)
+    const requested = new Map();
+    for (const item of items) {
+      requested.set(item.productId, (requested.get(item.productId) || 0) + item.quantity);
+    }
+
+    // Load every product in one query
+    const products = await prisma.product.findMany({
+      where: { id: { in: [...requested.keys()] } },
+    });
+    const productsById = new Map(products.map(p => [p.id, p]));
+
     // Calculate total and validate products
     let totalAmount = 0;
     const orderItemsData = [];
 
     for (const item of items) {
-      const product = await prisma.product.findUnique({
-        where: { id: item.productId },
-      });
+      const product = productsById.get(item.productId);
 
       if (!product) {
         return NextResponse.json({ error: `Product ${item.productId} not found` }, { status: 404 });
       }
 
-      if (product.quantity < item.quantity) {
+      if (product.quantity < requested.get(product.id)) {
         return NextResponse.json({ error: `Insufficient quantity for ${product.name}` }, { status: 400 });
       }
 
@@ -443,49 +758,88 @@ async function handleCreateOrder(request) {
       });
     }
 
-    // Create Razorpay order if payment mode is razorpay
-    let razorpayOrderId = null;
-    if (paymentMode === 'razorpay') {
-      const razorpayOrder = await razorpay.orders.create({
-        amount: Math.round(totalAmount * 100), // Convert to paise
-        currency: 'INR',
-        receipt: `order_${Date.now()}`,
-      });
-      razorpayOrderId = razorpayOrder.id;
-    }
-    console.log(paymentMode==="cod");
-    // Create order
-    const order = await prisma.order.create({
-      data: {
-        buyerId: authUser.userId,
-        paymentMode,
-        paymentStatus: paymentMode === 'cod' ? 'pending' : 'paid',
-        orderStatus: 'new',
-        totalAmount,
-        razorpayOrderId,
-        orderItems: {
-          create: orderItemsData,
-        },
-      },
-      include: {
-        orderItems: {
-          include: {
-            product: true,
+    const productIds = [...requested.keys()];
+    const quantities = productIds.map(id => requested.get(id));
+
+    let order;
+    let event;
+    try {
+      ({ order, event } = await prisma.$transaction(async (tx) => {
+        // Decrement all stock in one conditional update; rows that would go
+        // negative are skipped, which rolls the whole order back below
+        const decremented = await tx.$queryRaw`
+          UPDATE "Product" AS p
+          SET "quantity" = p."quantity" - d.qty, "updatedAt" = NOW()
+          FROM unnest(${productIds}::text[], ${quantities}::double precision[]) AS d(id, qty)
+          WHERE p."id" = d.id AND p."quantity" >= d.qty
+          RETURNING p."id"
+        `;
+
+        if (decremented.length !== productIds.length) {
+          const updatedIds = new Set(decremented.map(row => row.id));
+          const shortId = productIds.find(id => !updatedIds.has(id));
+          throw new InsufficientStockError(productsById.get(shortId).name);
+        }
+
+        // Razorpay orders are paid only once verify-payment succeeds; the
+        // gateway order itself is created from the outbox after commit
+        const created = await tx.order.create({
+          data: {
+            buyerId: authUser.userId,
+            paymentMode,
+            paymentStatus: 'pending',
+            orderStatus: 'new',
+            totalAmount,
+            idempotencyKey,
+            orderItems: {
+              create: orderItemsData,
+            },
+            ...(idempotencyKey && {
+              idempotency: {
+                create: { buyerId: authUser.userId, key: idempotencyKey },
+              },
+            }),
+            ...(paymentMode === 'razorpay' && {
+              paymentOutbox: {
+                create: { amount: Math.round(totalAmount * 100) }, // Convert to paise
+              },
+            }),
           },
-        },
-      },
-    });
+          include: ORDER_INCLUDE,
+        });
 
-    // Update product quantities
-    for (const item of items) {
-      await prisma.product.update({
-        where: { id: item.productId },
-        data: {
-          quantity: {
-            decrement: item.quantity,
-          },
-        },
-      });
+        return {
+          order: created,
+          event: await recordOrderEvent(tx, 'order.created', created, orderItemsData.map(item => item.farmerId)),
+        };
+      }));
+    } catch (error) {
+      if (error instanceof InsufficientStockError) {
+        return NextResponse.json({ error: `Insufficient quantity for ${error.productName}` }, { status: 400 });
+      }
+      // A concurrent retry with the same key won the insert; its transaction
+      // holds the stock, this one rolled back
+      if (idempotencyKey && error.code === 'P2002') {
+        const existing = await findIdempotentOrder(authUser.userId, idempotencyKey);
+        if (existing) return replayedOrder(existing);
+      }
+      throw error;
+    }
+
+    await recordOrder(order);
+    markWritten(`user:${authUser.userId}`, ...event.farmerIds.map(id => `user:${id}`));
+    bumpCatalog(products.map(p => p.category));
+    publishOrderEvent(event);
+
+    if (paymentMode === 'razorpay') {
+      const gateway = waitForGatewayOrder(order.id, GATEWAY_WAIT_MS);
+      kickOutbox();
+      const result = await gateway;
+      if (!result) {
+        return NextResponse.json(order, { status: 202 });
+      }
+      order.razorpayOrderId = result.razorpayOrderId;
+      order.paymentStatus = result.paymentStatus;
     }
 
     return NextResponse.json(order);
@@ -507,25 +861,25 @@ async function handleVerifyPayment(request) {
     const { orderId, razorpayOrderId, razorpayPaymentId, razorpaySignature } = body;
 
     // Verify signature
-    const text = `${razorpayOrderId}|${razorpayPaymentId}`;
-    const expectedSignature = crypto
-      .createHmac('sha256', process.env.RAZORPAY_KEY_SECRET)
-      .update(text)
-      .digest('hex');
-
-    if (expectedSignature !== razorpaySignature) {
+    if (!isValidSignature(razorpayOrderId, razorpayPaymentId, razorpaySignature)) {
       return NextResponse.json({ error: 'Invalid payment signature' }, { status: 400 });
     }
 
-    // Update order
-    const order = await prisma.order.update({
-      where: { id: orderId },
-      data: {
-        paymentStatus: 'paid',
-        razorpayPaymentId,
-      },
+    // Update order (applied together with other callbacks in one batched UPDATE)
+    const paid = await markOrderPaid({
+      orderId,
+      buyerId: authUser.userId,
+      razorpayOrderId,
+      razorpayPaymentId,
     });
 
+    if (!paid) {
+      return NextResponse.json({ error: 'Order not found' }, { status: 404 });
+    }
+    const { order, farmerIds } = paid;
+    // The order's farmers read it from their own scopes too
+    markWritten(`user:${authUser.userId}`, ...farmerIds.map(id => `user:${id}`));
+
     return NextResponse.json({ message: 'Payment verified', order });
   } catch (error) {
     console.error('Verify payment error:', error);
@@ -533,6 +887,115 @@ async function handleVerifyPayment(request) {
   }
 }
 
+// Payment state of one order; checkout polls this after a 202
+async function handleGetOrderPayment(request, orderId) {
+  try {
+    const authUser = getAuthUser(request);
+    if (!authUser || authUser.role !== 'buyer') {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+    }
+
+    const order = await prisma.order.findFirst({
+      where: { id: orderId },
+      select: {
+        id: true,
+        buyerId: true,
+        paymentMode: true,
+        paymentStatus: true,
+        razorpayOrderId: true,
+        totalAmount: true,
+        paymentOutbox: { select: { status: true, attempts: true } },
+      },
+    });
+
+    if (!order || order.buyerId !== authUser.userId) {
+      return NextResponse.json({ error: 'Order not found' }, { status: 404 });
+    }
+
+    // Make sure this instance is draining in case the creating one went away
+    if (order.paymentOutbox?.status === 'pending') kickOutbox();
+
+    const { buyerId, ...payment } = order;
+    return NextResponse.json(payment);
+  } catch (error) {
+    console.error('Get order payment error:', error);
+    return NextResponse.json({ error: 'Failed to get payment status' }, { status: 500 });
+  }
+}
+
+// SSE clients (EventSource) cannot set headers, so the stream also takes ?token=
+function getStreamUser(request, searchParams) {
+  const authUser = getAuthUser(request);
+  if (authUser) return authUser;
+  const token = searchParams.get('token');
+  return token ? verifyToken(token) : null;
+}
+
+function parseEventId(value) {
+  if (value === null || value === '') return null;
+  const id = Number(value);
+  if (!Number.isInteger(id) || id < 0) {
+    throw new QueryParamError('Invalid event id');
+  }
+  return id;
+}
+
+// Live order events for the buyer or farmer (text/event-stream)
+async function handleOrderStream(request) {
+  try {
+    const { searchParams } = new URL(request.url);
+    const authUser = getStreamUser(request, searchParams);
+    if (!authUser || (authUser.role !== 'buyer' && authUser.role !== 'farmer')) {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+    }
+
+    // Browsers send Last-Event-ID on reconnect; ?lastEventId= covers a fresh page
+    const lastEventId = parseEventId(
+      request.headers.get('last-event-id') ?? searchParams.get('lastEventId')
+    );
+
+    return new Response(openOrderStream(authUser, lastEventId, request.signal), {
+      headers: {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache, no-transform',
+        Connection: 'keep-alive',
+        'X-Accel-Buffering': 'no',
+      },
+    });
+  } catch (error) {
+    if (error instanceof QueryParamError) {
+      return NextResponse.json({ error: error.message }, { status: 400 });
+    }
+    console.error('Order stream error:', error);
+    return NextResponse.json({ error: 'Failed to open order stream' }, { status: 500 });
+  }
+}
+
+// Order events after ?after=<event id> as JSON, for clients that poll for deltas
+async function handleGetOrderEvents(request) {
+  try {
+    const authUser = getAuthUser(request);
+    if (!authUser || (authUser.role !== 'buyer' && authUser.role !== 'farmer')) {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+    }
+
+    const { searchParams } = new URL(request.url);
+    const after = parseEventId(searchParams.get('after')) ?? 0;
+    const events = await getOrderEventsAfter(authUser, after);
+
+    return NextResponse.json({
+      events,
+      lastEventId: events.length > 0 ? events[events.length - 1].id : after,
+    });
+  } catch (error) {
+    if (error instanceof QueryParamError) {
+      return NextResponse.json({ error: error.message }, { status: 400 });
+    }
+    console.error('Get order events error:', error);
+    return NextResponse.json({ error: 'Failed to get order events' }, { status: 500 });
+  }
+}
+
 // Get buyer orders
 async function handleGetBuyerOrders(request) {
   try {
@@ -541,25 +1004,75 @@ async function handleGetBuyerOrders(request) {
       return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
     }
 
-    const orders = await prisma.order.findMany({
-      where: { buyerId: authUser.userId },
-      include: {
-        orderItems: {
-          include: {
-            product: true,
-          },
-        },
-      },
-      orderBy: { createdAt: 'desc' },
+    const { searchParams } = new URL(request.url);
+    const page = parsePagination(searchParams);
+    const window = parseOrderWindow(searchParams);
+    const select = parseFields(searchParams, {
+      ...ORDER_FIELDS,
+      orderItems: { include: { product: true } },
     });
 
-    return NextResponse.json(orders);
+    // Replica, unless this buyer just ordered or paid
+    const orders = await findOrders(
+      readClient(`user:${authUser.userId}`),
+      inOrderWindow({ buyerId: authUser.userId }, window),
+      page,
+      select ? { select } : { include: { orderItems: { include: { product: true } } } },
+      window,
+    );
+
+    return orderListResponse(orders, page, window);
   } catch (error) {
+    if (error instanceof QueryParamError) {
+      return NextResponse.json({ error: error.message }, { status: 400 });
+    }
     console.error('Get buyer orders error:', error);
     return NextResponse.json({ error: 'Failed to get orders' }, { status: 500 });
   }
 }
 
+// Per-status order counts and revenue for a farmer, aggregated in the database.
+// Items share their order's createdAt, so the window prunes both tables.
+async function getFarmerOrderSummary(farmerId, window) {
+  const client = readClient(`user:${farmerId}`);
+  const since = window.since ?? new Date(0);
+  const rows = await client.$queryRaw`
+    SELECT o."orderStatus" AS "status",
+           COUNT(DISTINCT o."id")::int AS "orders",
+           COALESCE(SUM(oi."quantity" * oi."price"), 0)::float AS "revenue"
+    FROM "OrderItem" oi
+    JOIN "Order" o ON o."id" = oi."orderId" AND o."createdAt" = oi."createdAt"
+    WHERE oi."farmerId" = ${farmerId}
+      AND oi."createdAt" >= ${since}::timestamp
+      AND o."createdAt" >= ${since}::timestamp
+    GROUP BY o."orderStatus"
+  `;
+  if (window.history) {
+    rows.push(...await client.$queryRaw`
+      SELECT o."orderStatus" AS "status",
+             COUNT(DISTINCT o."id")::int AS "orders",
+             COALESCE(SUM(oi."quantity" * oi."price"), 0)::float AS "revenue"
+      FROM "OrderItemArchive" oi
+      JOIN "OrderArchive" o ON o."id" = oi."orderId"
+      WHERE oi."farmerId" = ${farmerId}
+      GROUP BY o."orderStatus"
+    `);
+  }
+
+  const byStatus = {};
+  let totalOrders = 0;
+  let totalRevenue = 0;
+  for (const row of rows) {
+    const status = byStatus[row.status] || (byStatus[row.status] = { orders: 0, revenue: 0 });
+    status.orders += row.orders;
+    status.revenue += row.revenue;
+    totalOrders += row.orders;
+    totalRevenue += row.revenue;
+  }
+
+  return { byStatus, totalOrders, totalRevenue, since: window.since };
+}
+
 // Get farmer orders
 async function handleGetFarmerOrders(request) {
   try {
@@ -568,44 +1081,57 @@ async function handleGetFarmerOrders(request) {
       return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
     }
 
-    const orderItems = await prisma.orderItem.findMany({
+    const { searchParams } = new URL(request.url);
+    const window = parseOrderWindow(searchParams);
+    if (searchParams.get('view') === 'summary') {
+      return NextResponse.json(await getFarmerOrderSummary(authUser.userId, window));
+    }
+
+    const page = parsePagination(searchParams);
+
+    // Only this farmer's items of each order
+    const farmerItems = {
       where: { farmerId: authUser.userId },
-      include: {
-        order: {
-          include: {
-            buyer: {
-              include: {
-                buyerProfile: true,
-              },
-            },
-          },
-        },
-        product: true,
-      },
+      select: { id: true, product: true, quantity: true, price: true },
       orderBy: { createdAt: 'desc' },
+    };
+    const select = parseFields(searchParams, {
+      ...ORDER_FIELDS,
+      buyer: { include: { buyerProfile: true } },
+      items: true,
     });
+    if (select?.items) {
+      delete select.items;
+      select.orderItems = farmerItems;
+    }
 
-    // Group by order
-    const ordersMap = {};
-    orderItems.forEach(item => {
-      if (!ordersMap[item.orderId]) {
-        ordersMap[item.orderId] = {
-          ...item.order,
-          items: [],
-        };
-      }
-      ordersMap[item.orderId].items.push({
-        id: item.id,
-        product: item.product,
-        quantity: item.quantity,
-        price: item.price,
-      });
-    });
+    // Orders with at least one item from this farmer, paged at the order level;
+    // the window goes on both sides so neither table scans old partitions
+    const orders = await findOrders(
+      readClient(`user:${authUser.userId}`),
+      inOrderWindow({ orderItems: { some: inOrderWindow({ farmerId: authUser.userId }, window) } }, window),
+      page,
+      select
+        ? { select }
+        : {
+            include: {
+              buyer: { include: { buyerProfile: true } },
+              orderItems: farmerItems,
+            },
+          },
+      window,
+    );
 
-    const orders = Object.values(ordersMap);
+    // Expose the farmer's items as `items`, as the dashboard expects
+    const result = orders.map(({ orderItems, ...order }) => (
+      orderItems ? { ...order, items: orderItems } : order
+    ));
 
-    return NextResponse.json(orders);
+    return orderListResponse(result, page, window);
   } catch (error) {
+    if (error instanceof QueryParamError) {
+      return NextResponse.json({ error: error.message }, { status: 400 });
+    }
     console.error('Get farmer orders error:', error);
     return NextResponse.json({ error: 'Failed to get orders' }, { status: 500 });
   }
@@ -622,15 +1148,43 @@ async function handleUpdateOrderStatus(request, orderId) {
     const body = await request.json();
     const { orderStatus } = body;
 
-    if (!orderStatus || !['new', 'packed'].includes(orderStatus)) {
+    if (!orderStatus || !['new', 'packed', 'delivered'].includes(orderStatus)) {
       return NextResponse.json({ error: 'Invalid order status' }, { status: 400 });
     }
 
-    const order = await prisma.order.update({
-      where: { id: orderId },
-      data: { orderStatus },
+    const result = await prisma.$transaction(async (tx) => {
+      // The key includes the partition key, so find the order's createdAt first.
+      // Only a farmer with items in the order may move it along, and a
+      // cancelled order (its stock already returned) stays cancelled.
+      const current = await tx.order.findFirst({
+        where: {
+          id: orderId,
+          orderStatus: { not: 'cancelled' },
+          orderItems: { some: { farmerId: authUser.userId } },
+        },
+        select: { createdAt: true },
+      });
+      if (!current) return null;
+
+      const { orderItems, ...updated } = await tx.order.update({
+        where: { id_createdAt: { id: orderId, createdAt: current.createdAt } },
+        data: { orderStatus },
+        include: { orderItems: { select: { farmerId: true } } },
+      });
+      return {
+        order: updated,
+        event: await recordOrderEvent(tx, 'order.status', updated, orderItems.map(item => item.farmerId)),
+      };
     });
 
+    if (!result) {
+      return NextResponse.json({ error: 'Order not found' }, { status: 404 });
+    }
+    const { order, event } = result;
+
+    markWritten(`user:${order.buyerId}`, ...event.farmerIds.map(id => `user:${id}`));
+    publishOrderEvent(event);
+
     return NextResponse.json(order);
   } catch (error) {
     console.error('Update order status error:', error);
@@ -677,10 +1231,36 @@ async function handleApproveFarmer(request, userId) {
     const body = await request.json();
     const { approved } = body;
 
+    const previous = await prisma.user.findUnique({
+      where: { id: userId },
+      select: { approved: true },
+    });
+
     const user = await prisma.user.update({
       where: { id: userId },
       data: { approved },
     });
+    evictAuthUser(userId);
+    markWritten('users');
+
+    // Move the farmer between the approved and pending counters
+    if (user.role === 'farmer' && previous && previous.approved !== user.approved) {
+      const delta = user.approved ? 1 : -1;
+      await bumpCounters({ totalFarmers: delta, pendingApprovals: -delta });
+    }
+
+    // Keep the nearby-farmer table in step with approval
+    if (user.role === 'farmer') {
+      bumpCatalog();
+      const profile = approved
+        ? await prisma.farmerProfile.findUnique({ where: { userId } })
+        : null;
+      if (profile) {
+        upsertFarmerLocation(userId, profile.latitude, profile.longitude);
+      } else {
+        removeFarmerLocation(userId);
+      }
+    }
 
     return NextResponse.json(user);
   } catch (error) {
@@ -697,16 +1277,24 @@ async function handleGetAllUsers(request) {
       return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
     }
 
-    const users = await prisma.user.findMany({
-      include: {
-        buyerProfile: true,
-        farmerProfile: true,
-      },
-      orderBy: { createdAt: 'desc' },
+    const { searchParams } = new URL(request.url);
+    const page = parsePagination(searchParams);
+    const select = parseFields(searchParams, USER_FIELDS);
+
+    const users = await readClient('users').user.findMany({
+      where: withCursor({}, page),
+      ...(select
+        ? { select }
+        : { include: { buyerProfile: true, farmerProfile: true } }),
+      orderBy: KEYSET_ORDER,
+      ...pageTake(page),
     });
 
-    return NextResponse.json(users);
+    return pageResponse(users, page);
   } catch (error) {
+    if (error instanceof QueryParamError) {
+      return NextResponse.json({ error: error.message }, { status: 400 });
+    }
     console.error('Get all users error:', error);
     return NextResponse.json({ error: 'Failed to get users' }, { status: 500 });
   }
@@ -720,19 +1308,24 @@ async function handleGetAdminProducts(request) {
       return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
     }
 
-    const products = await prisma.product.findMany({
-      include: {
-        farmer: {
-          include: {
-            farmerProfile: true,
-          },
-        },
-      },
-      orderBy: { createdAt: 'desc' },
+    const { searchParams } = new URL(request.url);
+    const page = parsePagination(searchParams);
+    const select = parseFields(searchParams, PRODUCT_FIELDS);
+
+    const products = await readClient('catalog').product.findMany({
+      where: withCursor({}, page),
+      ...(select
+        ? { select }
+        : { include: { farmer: { include: { farmerProfile: true } } } }),
+      orderBy: KEYSET_ORDER,
+      ...pageTake(page),
     });
 
-    return NextResponse.json(products);
+    return pageResponse(products, page);
   } catch (error) {
+    if (error instanceof QueryParamError) {
+      return NextResponse.json({ error: error.message }, { status: 400 });
+    }
     console.error('Get admin products error:', error);
     return NextResponse.json({ error: 'Failed to get products' }, { status: 500 });
   }
@@ -746,8 +1339,25 @@ async function handleDeleteUser(request, userId) {
       return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
     }
 
-    await prisma.user.delete({
-      where: { id: userId },
+    // Products (farmers) and orders (buyers) cascade with the user, so count them first
+    const [productCount, orderCount, archivedOrderCount, user] = await prisma.$transaction([
+      prisma.product.count({ where: { farmerId: userId } }),
+      prisma.order.count({ where: { buyerId: userId } }),
+      prisma.orderArchive.count({ where: { buyerId: userId } }),
+      prisma.user.delete({ where: { id: userId } }),
+    ]);
+
+    removeFarmerLocation(userId);
+    evictAuthUser(userId);
+    markWritten('users');
+    if (user.role === 'farmer') bumpCatalog();
+
+    await bumpCounters({
+      totalFarmers: user.role === 'farmer' && user.approved ? -1 : 0,
+      pendingApprovals: user.role === 'farmer' && !user.approved ? -1 : 0,
+      totalBuyers: user.role === 'buyer' ? -1 : 0,
+      totalProducts: -productCount,
+      totalOrders: -(orderCount + archivedOrderCount),
     });
 
     return NextResponse.json({ message: 'User deleted' });
@@ -765,13 +1375,8 @@ async function handleGetAdminStats(request) {
       return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
     }
 
-    const [totalFarmers, totalBuyers, totalProducts, totalOrders, pendingApprovals] = await Promise.all([
-      prisma.user.count({ where: { role: 'farmer', approved: true } }),
-      prisma.user.count({ where: { role: 'buyer' } }),
-      prisma.product.count(),
-      prisma.order.count(),
-      prisma.user.count({ where: { role: 'farmer', approved: false } }),
-    ]);
+    // Maintained counters, no table scans
+    const { totalFarmers, totalBuyers, totalProducts, totalOrders, pendingApprovals } = await getStats();
 
     return NextResponse.json({
       totalFarmers,
@@ -786,36 +1391,185 @@ async function handleGetAdminStats(request) {
   }
 }
 
+// Get orders and GMV per day
+async function handleGetStatsSeries(request) {
+  try {
+    const authUser = getAuthUser(request);
+    if (!authUser || authUser.role !== 'admin') {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+    }
+
+    const { searchParams } = new URL(request.url);
+    const days = Math.min(Math.max(parseInt(searchParams.get('days') || '30', 10) || 30, 1), 366);
+
+    return NextResponse.json(await getDailySeries(days));
+  } catch (error) {
+    console.error('Get stats series error:', error);
+    return NextResponse.json({ error: 'Failed to get stats series' }, { status: 500 });
+  }
+}
+
+// Recount stats from the source tables (also runs periodically)
+async function handleReconcileStats(request) {
+  try {
+    const authUser = getAuthUser(request);
+    if (!authUser || authUser.role !== 'admin') {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+    }
+
+    return NextResponse.json(await reconcileStats());
+  } catch (error) {
+    console.error('Reconcile stats error:', error);
+    return NextResponse.json({ error: 'Failed to reconcile stats' }, { status: 500 });
+  }
+}
+
+// Create upcoming order partitions and archive old fulfilled orders now (also runs hourly)
+async function handleArchiveOrders(request) {
+  try {
+    const authUser = getAuthUser(request);
+    if (!authUser || authUser.role !== 'admin') {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+    }
+
+    // ?olderThanDays= overrides ORDER_ARCHIVE_AFTER_DAYS for this run (0 archives every fulfilled order)
+    const { searchParams } = new URL(request.url);
+    const olderThanDays = searchParams.get('olderThanDays');
+    let archiveBefore;
+    if (olderThanDays !== null) {
+      const days = Number(olderThanDays);
+      if (!Number.isInteger(days) || days < 0) {
+        return NextResponse.json({ error: 'Invalid olderThanDays' }, { status: 400 });
+      }
+      archiveBefore = new Date(Date.now() - days * 24 * 60 * 60 * 1000);
+    }
+
+    return NextResponse.json(await runOrderMaintenance({ archiveBefore }));
+  } catch (error) {
+    console.error('Archive orders error:', error);
+    return NextResponse.json({ error: 'Failed to archive orders' }, { status: 500 });
+  }
+}
+
+// Get cache stats
+async function handleGetCacheStats(request) {
+  try {
+    const authUser = getAuthUser(request);
+    if (!authUser || authUser.role !== 'admin') {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+    }
+
+    return NextResponse.json({
+      farmerLocations: getFarmerLocationStats(),
+      auth: getAuthCacheStats(),
+      catalog: getCatalogCacheStats(),
+    });
+  } catch (error) {
+    console.error('Get cache stats error:', error);
+    return NextResponse.json({ error: 'Failed to get cache stats' }, { status: 500 });
+  }
+}
+
+// Payment outbox backlog and verification batching counters
+async function handleGetPaymentStats(request) {
+  try {
+    const authUser = getAuthUser(request);
+    if (!authUser || authUser.role !== 'admin') {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+    }
+
+    return NextResponse.json({
+      outbox: await getOutboxCounts(),
+      ...getPaymentStats(),
+    });
+  } catch (error) {
+    console.error('Get payment stats error:', error);
+    return NextResponse.json({ error: 'Failed to get payment stats' }, { status: 500 });
+  }
+}
+
+// Drop in-process caches so the next request reloads from the database
+async function handleClearCache(request) {
+  try {
+    const authUser = getAuthUser(request);
+    if (!authUser || authUser.role !== 'admin') {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+    }
+
+    invalidateFarmerLocations();
+    clearAuthCache();
+    clearCatalogCache();
+
+    return NextResponse.json({ message: 'Cache cleared' });
+  } catch (error) {
+    console.error('Clear cache error:', error);
+    return NextResponse.json({ error: 'Failed to clear cache' }, { status: 500 });
+  }
+}
+
+// ============ METRICS ============
+
+// Per-route request metrics; Prometheus text by default, ?format=json for scripts.
+// Open unless METRICS_TOKEN is set, in which case it must be sent as a bearer token.
+async function handleGetMetrics(request) {
+  const metricsToken = process.env.METRICS_TOKEN;
+  if (metricsToken && request.headers.get('authorization') !== `Bearer ${metricsToken}`) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+  }
+
+  const { searchParams } = new URL(request.url);
+  if (searchParams.get('format') === 'json') {
+    return NextResponse.json(getMetricsSnapshot());
+  }
+
+  return new NextResponse(renderPrometheus(), {
+    headers: { 'Content-Type': 'text/plain; version=0.0.4' },
+  });
+}
+
 // ============ ROUTE HANDLERS ============
 
-export async function GET(request, { params }) {
+async function dispatchGET(request, { params }) {
   const path = params.path ? params.path.join('/') : '';
 
   if (path === '' || path === '/') {
     return NextResponse.json({ message: 'Farmer Marketplace API' });
   }
 
+  if (path === 'metrics') return handleGetMetrics(request);
+
   // Auth routes
   if (path === 'auth/me') return handleGetMe(request);
 
   // Product routes
   if (path === 'products') return handleGetProducts(request);
+  if (path === 'products/search') return handleSearchProducts(request);
   if (path === 'products/my') return handleGetFarmerProducts(request);
 
   // Order routes
   if (path === 'orders/buyer') return handleGetBuyerOrders(request);
   if (path === 'orders/farmer') return handleGetFarmerOrders(request);
+  if (path === 'orders/stream') return handleOrderStream(request);
+  if (path === 'orders/events') return handleGetOrderEvents(request);
+
+  const paymentMatch = path.match(/^orders\/([^/]+)\/payment$/);
+  if (paymentMatch) {
+    return handleGetOrderPayment(request, paymentMatch[1]);
+  }
 
   // Admin routes
   if (path === 'admin/farmers/pending') return handleGetPendingFarmers(request);
   if (path === 'admin/users') return handleGetAllUsers(request);
   if (path === 'admin/products') return handleGetAdminProducts(request);
   if (path === 'admin/stats') return handleGetAdminStats(request);
+  if (path === 'admin/stats/series') return handleGetStatsSeries(request);
+  if (path === 'admin/cache') return handleGetCacheStats(request);
+  if (path === 'admin/payments') return handleGetPaymentStats(request);
 
   return NextResponse.json({ error: 'Not found' }, { status: 404 });
 }
 
-export async function POST(request, { params }) {
+async function dispatchPOST(request, { params }) {
   const path = params.path ? params.path.join('/') : '';
 
   // Auth routes
@@ -824,15 +1578,20 @@ export async function POST(request, { params }) {
 
   // Product routes
   if (path === 'products') return handleCreateProduct(request);
+  if (path === 'products/bulk') return handleBulkProducts(request);
 
   // Order routes
   if (path === 'orders') return handleCreateOrder(request);
   if (path === 'orders/verify-payment') return handleVerifyPayment(request);
 
+  // Admin routes
+  if (path === 'admin/stats/reconcile') return handleReconcileStats(request);
+  if (path === 'admin/orders/archive') return handleArchiveOrders(request);
+
   return NextResponse.json({ error: 'Not found' }, { status: 404 });
 }
 
-export async function PUT(request, { params }) {
+async function dispatchPUT(request, { params }) {
   const path = params.path ? params.path.join('/') : '';
 
   // Product routes
@@ -856,7 +1615,7 @@ export async function PUT(request, { params }) {
   return NextResponse.json({ error: 'Not found' }, { status: 404 });
 }
 
-export async function DELETE(request, { params }) {
+async function dispatchDELETE(request, { params }) {
   const path = params.path ? params.path.join('/') : '';
 
   // Product routes
@@ -866,6 +1625,8 @@ export async function DELETE(request, { params }) {
   }
 
   // Admin routes
+  if (path === 'admin/cache') return handleClearCache(request);
+
   const userMatch = path.match(/^admin\/users\/(.+)$/);
   if (userMatch) {
     return handleDeleteUser(request, userMatch[1]);
@@ -873,3 +1634,10 @@ export async function DELETE(request, { params }) {
 
   return NextResponse.json({ error: 'Not found' }, { status: 404 });
 }
+
+// Every dispatched request is timed and counted per route (see lib/metrics.js),
+// and recorded for replay when TRAFFIC_CAPTURE_FILE is set (lib/traffic-capture.js)
+export const GET = instrument('GET', captureTraffic('GET', dispatchGET));
+export const POST = instrument('POST', captureTraffic('POST', dispatchPOST));
+export const PUT = instrument('PUT', captureTraffic('PUT', dispatchPUT));
+export const DELETE = instrument('DELETE', captureTraffic('DELETE', dispatchDELETE));
@@ -5,12 +5,25 @@ Tests all authentication, product, order, and admin endpoints
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import math
 import os
+import re
+import sys
+import time
+import argparse
+import csv
+import hashlib
+import hmac
+import threading
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-# Get base URL from environment
-BASE_URL = "https://localcrop-3.preview.emergentagent.com/api"
+# Get base URL from environment (local_server.py sets this to a local instance)
+BASE_URL = os.environ.get("API_BASE_URL", "https://localcrop-3.preview.emergentagent.com/api").rstrip("/")
 
 # Test credentials from seed data
 TEST_CREDENTIALS = {
@@ -24,46 +37,219 @@ MUMBAI_GPS = {"latitude": 19.1136, "longitude": 72.8697}
 PUNE_GPS = {"latitude": 18.5204, "longitude": 73.8567}
 OUTSIDE_MAHARASHTRA_GPS = {"latitude": 28.6139, "longitude": 77.2090}  # Delhi
 
+# Path segments collapsed to ":id", mirrors routeLabel in lib/metrics.js
+ID_SEGMENT = re.compile(r"^(?:[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|c[a-z0-9]{20,}|\d+)$", re.I)
+
+
+def route_label(method, endpoint):
+    """Route label as reported by /api/metrics, e.g. PUT products/:id"""
+    segments = [":id" if ID_SEGMENT.match(part) else part for part in endpoint.split("?")[0].split("/") if part]
+    return f"{method.upper()} {'/'.join(segments) or '/'}"
+
+# Request mix each virtual user cycles through in load mode: (method, endpoint, params)
+# For POST the params are sent as the JSON body
+LOAD_SCENARIOS = {
+    "buyer": [
+        ("GET", "products", MUMBAI_GPS),
+        ("GET", "products", {"category": "Vegetable", **MUMBAI_GPS}),
+        ("GET", "products", PUNE_GPS),
+        ("GET", "orders/buyer", None),
+        ("GET", "auth/me", None),
+    ],
+    "farmer": [
+        ("GET", "products/my", None),
+        ("GET", "orders/farmer", None),
+        ("GET", "auth/me", None),
+    ],
+    "admin": [
+        ("GET", "admin/stats", None),
+        ("GET", "admin/farmers/pending", None),
+        ("GET", "admin/users", None),
+        ("GET", "admin/products", None),
+    ],
+    # Anonymous users logging in back to back, for bcrypt/login throughput
+    "login": [
+        ("POST", "auth/login", TEST_CREDENTIALS["buyer"]),
+        ("POST", "auth/login", TEST_CREDENTIALS["farmer"]),
+    ],
+}
+
 class APITester:
-    def __init__(self):
+    def __init__(self, pool_size=10):
         self.tokens = {}
         self.test_results = []
         self.created_resources = {"products": [], "orders": []}
+        self.results_lock = threading.Lock()
+        self.client_timings = defaultdict(list)
+        self.client_bytes = defaultdict(list)
+        self.client_statuses = defaultdict(Counter)
+        # Last request made on each thread, attached to the next logged result
+        self.local = threading.local()
+        # One keep-alive session for every call so suites reuse TCP/TLS connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         
     def log_result(self, test_name, success, message, details=None):
-        """Log test result"""
+        """Log test result with the route, status, latency and size of the request behind it"""
+        request = getattr(self.local, "last", None) or {}
+        self.local.last = None
         result = {
             "test": test_name,
             "success": success,
             "message": message,
             "timestamp": datetime.now().isoformat(),
+            "route": request.get("route"),
+            "status": request.get("status"),
+            "latency_ms": request.get("latency_ms"),
+            "bytes": request.get("bytes"),
             "details": details or {}
         }
-        self.test_results.append(result)
         status = "✅ PASS" if success else "❌ FAIL"
-        print(f"{status}: {test_name} - {message}")
-        if details and not success:
-            print(f"   Details: {details}")
+        with self.results_lock:
+            self.test_results.append(result)
+            print(f"{status}: {test_name} - {message}")
+            if details and not success:
+                print(f"   Details: {details}")
     
-    def make_request(self, method, endpoint, data=None, headers=None, params=None):
-        """Make HTTP request with error handling"""
+    def make_request(self, method, endpoint, data=None, headers=None, params=None, body=None):
+        """Make HTTP request with error handling (body sends a raw payload, e.g. CSV, instead of JSON)"""
         url = f"{BASE_URL}/{endpoint.lstrip('/')}"
+        started = time.perf_counter()
         try:
             if method.upper() == "GET":
-                response = requests.get(url, headers=headers, params=params, timeout=30)
+                response = self.session.get(url, headers=headers, params=params, timeout=30)
             elif method.upper() == "POST":
-                response = requests.post(url, json=data, headers=headers, params=params, timeout=30)
+                if body is not None:
+                    response = self.session.post(url, data=body, headers=headers, params=params, timeout=120)
+                else:
+                    response = self.session.post(url, json=data, headers=headers, params=params, timeout=30)
             elif method.upper() == "PUT":
-                response = requests.put(url, json=data, headers=headers, params=params, timeout=30)
+                response = self.session.put(url, json=data, headers=headers, params=params, timeout=30)
             elif method.upper() == "DELETE":
-                response = requests.delete(url, headers=headers, params=params, timeout=30)
+                response = self.session.delete(url, headers=headers, params=params, timeout=30)
             else:
                 raise ValueError(f"Unsupported method: {method}")
             
+            self.record_request(method, endpoint, started, response.status_code, len(response.content))
             return response
         except requests.exceptions.RequestException as e:
             print(f"Request failed: {e}")
+            # Status 0: no response at all
+            self.record_request(method, endpoint, started, 0, 0)
+            return None
+    
+    def record_request(self, method, endpoint, started, status, size):
+        """Keep latency, size and status per route, and remember the call for log_result"""
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        label = route_label(method, endpoint)
+        with self.results_lock:
+            self.client_timings[label].append(elapsed_ms)
+            self.client_bytes[label].append(size)
+            self.client_statuses[label][status] += 1
+        self.local.last = {"route": label, "status": status, "latency_ms": round(elapsed_ms, 2), "bytes": size}
+    
+    def endpoint_stats(self):
+        """Per-route latency percentiles, response sizes and status counts for this run"""
+        with self.results_lock:
+            timings = {label: sorted(samples) for label, samples in self.client_timings.items()}
+            sizes = {label: list(samples) for label, samples in self.client_bytes.items()}
+            statuses = {label: dict(counts) for label, counts in self.client_statuses.items()}
+        
+        stats = {}
+        for label in sorted(timings):
+            if label == "GET metrics":
+                continue
+            samples = timings[label]
+            codes = statuses[label]
+            stats[label] = {
+                "count": len(samples),
+                # 4xx are often the expected answer in the suite, so only 5xx and no-response count as errors
+                "errors": sum(n for code, n in codes.items() if code == 0 or code >= 500),
+                "client_errors": sum(n for code, n in codes.items() if 400 <= code < 500),
+                "mean_ms": sum(samples) / len(samples),
+                "p50_ms": percentile(samples, 50),
+                "p95_ms": percentile(samples, 95),
+                "p99_ms": percentile(samples, 99),
+                "mean_bytes": sum(sizes[label]) / len(sizes[label]),
+                "statuses": {str(code): n for code, n in sorted(codes.items())},
+            }
+        return stats
+    
+    def iter_pages(self, endpoint, headers=None, params=None, limit=100):
+        """Yield every row of a paginated list endpoint, one page in memory at a time"""
+        page_params = dict(params or {}, limit=limit)
+        while True:
+            response = self.make_request("GET", endpoint, headers=headers, params=page_params)
+            if response is None or response.status_code != 200:
+                raise RuntimeError(f"Paging {endpoint} failed: {response.status_code if response else 'No response'}")
+            yield from response.json()
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return
+            page_params["cursor"] = cursor
+    
+    def fetch_server_metrics(self):
+        """Snapshot of the server's /api/metrics counters, or None if unavailable"""
+        headers = {"Authorization": f"Bearer {os.environ['METRICS_TOKEN']}"} if os.environ.get("METRICS_TOKEN") else None
+        response = self.make_request("GET", "metrics", headers=headers, params={"format": "json"})
+        if response is None or response.status_code != 200:
             return None
+        return response.json()
+    
+    def print_latency_breakdown(self, before, after):
+        """Client-side latencies next to the server-side metrics delta for this run"""
+        print("\n" + "=" * 100)
+        print("⏱️  LATENCY BREAKDOWN (client vs server)")
+        print("=" * 100)
+        print(f"{'Route':<34}{'Calls':>6}{'Client avg':>12}{'Client p95':>12}"
+              f"{'Server n':>10}{'Server avg':>12}{'DB q/req':>10}{'DB ms/req':>11}")
+        
+        server_routes = (after or {}).get("routes", {})
+        before_routes = (before or {}).get("routes", {})
+        with self.results_lock:
+            timings = {label: sorted(samples) for label, samples in self.client_timings.items()}
+        
+        for label in sorted(timings):
+            if label == "GET metrics":
+                continue
+            samples = timings[label]
+            row = f"{label:<34}{len(samples):>6}{sum(samples) / len(samples):>10.1f}ms{percentile(samples, 95):>10.1f}ms"
+            now, then = server_routes.get(label), before_routes.get(label, {})
+            count = now["count"] - then.get("count", 0) if now else 0
+            if count > 0:
+                total_ms = now["totalMs"] - then.get("totalMs", 0)
+                db_queries = now["dbQueries"] - then.get("dbQueries", 0)
+                db_ms = now["dbMs"] - then.get("dbMs", 0)
+                row += f"{count:>10}{total_ms / count:>10.1f}ms{db_queries / count:>10.1f}{db_ms / count:>9.1f}ms"
+            else:
+                row += f"{'-':>10}{'-':>12}{'-':>10}{'-':>11}"
+            print(row)
+        
+        if after is None:
+            print("\n⚠️  Server metrics unavailable (GET /api/metrics failed); showing client timings only")
+    
+    def print_database_split(self, before, after):
+        """Queries the server sent to the primary and the read replica during this run"""
+        if before is None or after is None:
+            print("\n⚠️  Server metrics unavailable (GET /api/metrics failed); no database split")
+            return
+        print("\n" + "=" * 86)
+        print("🐘 DATABASE LOAD (primary vs replica)")
+        print("=" * 86)
+        print(f"{'Client':<10}{'Queries':>10}{'Share':>8}{'DB ms':>12}{'Pool':>6}{'Busy':>6}{'Waiting':>9}{'Wait avg':>11}")
+        deltas = {}
+        for name in ("dbPrimary", "dbReplica"):
+            now, then = after["gauges"].get(name, {}), before["gauges"].get(name, {})
+            if now.get("enabled"):
+                deltas[name] = (now, now["queries"] - then.get("queries", 0), now["queryMs"] - then.get("queryMs", 0))
+        total = sum(queries for _, queries, _ in deltas.values()) or 1
+        for name, (now, queries, query_ms) in deltas.items():
+            print(f"{name[2:].lower():<10}{queries:>10}{queries / total:>7.0%}{query_ms:>10.0f}ms"
+                  f"{now['poolSize'] or '-':>6}{now['busy']:>6}{now['waiting']:>9}{now['waitMsAvg']:>9.2f}ms")
+        if "dbReplica" not in deltas:
+            print("(no replica configured; start with local_server.py --replica to route reads to one)")
     
     def get_auth_headers(self, role):
         """Get authorization headers for a role"""
@@ -319,7 +505,10 @@ class APITester:
         available_products = []
         if response and response.status_code == 200:
             products = response.json()
-            available_products = [p for p in products if p.get("quantity", 0) > 0][:2]  # Take first 2 products
+            # Take 2 products, the test farmer's first so Test 5 may move the order along
+            in_stock = [p for p in products if p.get("quantity", 0) > 0]
+            in_stock.sort(key=lambda p: (p.get("farmer") or {}).get("email") != TEST_CREDENTIALS["farmer"]["email"])
+            available_products = in_stock[:2]
         
         if not available_products:
             self.log_result("Order APIs Setup", False, "No available products found for order testing")
@@ -425,8 +614,8 @@ class APITester:
             }
             
             response = self.make_request("POST", "orders", order_data, headers=self.get_auth_headers("buyer"))
-            if response and response.status_code == 200:
-                order = response.json()
+            if response and response.status_code in (200, 202):
+                order = self.wait_for_gateway_order(response.json())
                 if order.get("razorpayOrderId"):
                     self.log_result("Create Razorpay Order", True, "Razorpay order created successfully", {
                         "razorpay_order_id": order.get("razorpayOrderId"),
@@ -437,6 +626,327 @@ class APITester:
             else:
                 self.log_result("Create Razorpay Order", False, f"Razorpay order creation failed: {response.status_code if response else 'No response'}")
     
+    def wait_for_gateway_order(self, order, timeout=30):
+        """Poll an order's payment state until the outbox has attached a Razorpay order id"""
+        deadline = time.monotonic() + timeout
+        while not order.get("razorpayOrderId") and order.get("paymentStatus") != "failed" and time.monotonic() < deadline:
+            time.sleep(0.5)
+            response = self.make_request("GET", f"orders/{order['id']}/payment", headers=self.get_auth_headers("buyer"))
+            if response is not None and response.status_code == 200:
+                order = {**order, **response.json()}
+        return order
+    
+    def test_payments(self, parallel_checkouts=10):
+        """Idempotent checkout retries and batched payment verification"""
+        print("\n=== Testing Payments ===")
+        
+        if "farmer" not in self.tokens or "buyer" not in self.tokens:
+            self.log_result("Idempotent Checkout", False, "Farmer and buyer tokens required")
+            return
+        
+        response = self.make_request("POST", "products", {
+            "name": "Payment Test Grapes",
+            "category": "Fruit",
+            "price": 80.0,
+            "quantity": 100.0
+        }, headers=self.get_auth_headers("farmer"))
+        if not response or response.status_code != 200:
+            self.log_result("Idempotent Checkout", False, f"Could not create test product: {response.status_code if response else 'No response'}")
+            return
+        product_id = response.json()["id"]
+        self.created_resources["products"].append(product_id)
+        order_data = {"items": [{"productId": product_id, "quantity": 1}], "paymentMode": "razorpay"}
+        
+        # The same key sent in parallel must place exactly one order
+        key = f"test-{uuid.uuid4()}"
+        headers = {**self.get_auth_headers("buyer"), "Idempotency-Key": key}
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            responses = list(pool.map(lambda _: self.make_request("POST", "orders", order_data, headers=headers), range(5)))
+        order_ids = {r.json()["id"] for r in responses if r is not None and r.status_code in (200, 202)}
+        remaining = None
+        response = self.make_request("GET", "products/my", headers=self.get_auth_headers("farmer"))
+        if response and response.status_code == 200:
+            remaining = next((p["quantity"] for p in response.json() if p["id"] == product_id), None)
+        details = {"distinct_orders": len(order_ids), "remaining_stock": remaining}
+        if len(order_ids) == 1 and remaining == 99:
+            self.log_result("Idempotent Checkout", True, "5 retries with one Idempotency-Key placed one order", details)
+        else:
+            self.log_result("Idempotent Checkout", False, "Retried checkout placed duplicate orders", details)
+        
+        secret = os.environ.get("RAZORPAY_KEY_SECRET")
+        if not secret:
+            print("   RAZORPAY_KEY_SECRET not set, skipping payment verification (run via local_server.py)")
+            return
+        
+        # Many callbacks at once exercise the batched verification path
+        with ThreadPoolExecutor(max_workers=parallel_checkouts) as pool:
+            orders = list(pool.map(
+                lambda _: self.make_request("POST", "orders", order_data, headers=self.get_auth_headers("buyer")),
+                range(parallel_checkouts)
+            ))
+        orders = [self.wait_for_gateway_order(r.json()) for r in orders if r is not None and r.status_code in (200, 202)]
+        orders = [o for o in orders if o.get("razorpayOrderId")]
+        
+        def verify(order):
+            payment_id = f"pay_{uuid.uuid4().hex[:14]}"
+            signature = hmac.new(secret.encode(), f"{order['razorpayOrderId']}|{payment_id}".encode(), hashlib.sha256).hexdigest()
+            return self.make_request("POST", "orders/verify-payment", {
+                "orderId": order["id"],
+                "razorpayOrderId": order["razorpayOrderId"],
+                "razorpayPaymentId": payment_id,
+                "razorpaySignature": signature
+            }, headers=self.get_auth_headers("buyer"))
+        
+        with ThreadPoolExecutor(max_workers=parallel_checkouts) as pool:
+            verified = list(pool.map(verify, orders))
+        paid = sum(1 for r in verified if r is not None and r.status_code == 200
+                   and r.json().get("order", {}).get("paymentStatus") == "paid")
+        details = {"checkouts": parallel_checkouts, "gateway_orders": len(orders), "paid": paid}
+        if paid == parallel_checkouts:
+            self.log_result("Batched Payment Verification", True, f"{paid} concurrent callbacks verified", details)
+        else:
+            self.log_result("Batched Payment Verification", False, "Not every checkout was verified", details)
+        
+        # A signature for someone else's gateway order must not mark this one paid
+        if orders:
+            forged = dict(orders[0], razorpayOrderId="order_forged")
+            response = verify(forged)
+            if response is not None and response.status_code == 404:
+                self.log_result("Payment Verification Mismatch", True, "Callback for a different gateway order rejected")
+            else:
+                self.log_result("Payment Verification Mismatch", False, f"Expected 404, got {response.status_code if response else 'No response'}")
+    
+    def test_order_history(self):
+        """Delivered orders leave the default listing when archived and stay reachable with ?history=1"""
+        print("\n=== Testing Order History ===")
+        
+        if not all(role in self.tokens for role in ("farmer", "buyer", "admin")):
+            self.log_result("Order Archive", False, "Farmer, buyer and admin tokens required")
+            return
+        
+        response = self.make_request("POST", "products", {
+            "name": "Archive Test Potatoes",
+            "category": "Vegetable",
+            "price": 30.0,
+            "quantity": 10.0
+        }, headers=self.get_auth_headers("farmer"))
+        if not response or response.status_code != 200:
+            self.log_result("Order Archive", False, f"Could not create test product: {response.status_code if response else 'No response'}")
+            return
+        product_id = response.json()["id"]
+        self.created_resources["products"].append(product_id)
+        
+        key = f"archive-{uuid.uuid4()}"
+        checkout_headers = {**self.get_auth_headers("buyer"), "Idempotency-Key": key}
+        order_body = {"items": [{"productId": product_id, "quantity": 1}], "paymentMode": "cod"}
+        response = self.make_request("POST", "orders", order_body, headers=checkout_headers)
+        if not response or response.status_code != 200:
+            self.log_result("Order Archive", False, f"Could not place test order: {response.status_code if response else 'No response'}")
+            return
+        order_id = response.json()["id"]
+        
+        # Test 1: Default listing is windowed and holds the new order
+        response = self.make_request("GET", "orders/buyer", headers=self.get_auth_headers("buyer"), params={"limit": 100})
+        if response and response.status_code == 200:
+            since = response.headers.get("X-Orders-Since")
+            rows = response.json()
+            in_window = since is None or all(row["createdAt"] >= since for row in rows)
+            if any(row["id"] == order_id for row in rows) and in_window:
+                self.log_result("Recent Orders Window", True, f"Default listing starts at {since or 'the first order (window off)'}")
+            else:
+                self.log_result("Recent Orders Window", False, "New order missing or rows older than X-Orders-Since", {"since": since})
+        else:
+            self.log_result("Recent Orders Window", False, f"Listing failed: {response.status_code if response else 'No response'}")
+        
+        response = self.make_request("GET", "orders/buyer", headers=self.get_auth_headers("buyer"), params={"history": "maybe"})
+        if response is not None and response.status_code == 400:
+            self.log_result("Invalid History Param", True, "Rejected history=maybe")
+        else:
+            self.log_result("Invalid History Param", False, f"Expected 400, got {response.status_code if response else 'No response'}")
+        
+        # Test 2: Deliver it (COD counts as settled), then archive everything fulfilled
+        for status in ("packed", "delivered"):
+            response = self.make_request("PUT", f"orders/{order_id}", {"orderStatus": status}, headers=self.get_auth_headers("farmer"))
+            if not response or response.status_code != 200:
+                self.log_result("Order Archive", False, f"Could not mark order {status}: {response.status_code if response else 'No response'}")
+                return
+        
+        response = self.make_request("POST", "admin/orders/archive", headers=self.get_auth_headers("admin"), params={"olderThanDays": 0})
+        if not response or response.status_code != 200 or response.json().get("archivedOrders", 0) < 1:
+            self.log_result("Order Archive", False, f"Archive run did not move the order: {response.status_code if response else 'No response'}",
+                            response.json() if response is not None and response.status_code == 200 else None)
+            return
+        self.log_result("Order Archive", True, "Delivered order archived", response.json())
+        
+        # Test 3: Archived order leaves the default listing but not the history
+        for role, endpoint in (("buyer", "orders/buyer"), ("farmer", "orders/farmer")):
+            try:
+                recent = {row["id"] for row in self.iter_pages(endpoint, headers=self.get_auth_headers(role))}
+                history = [row for row in self.iter_pages(endpoint, headers=self.get_auth_headers(role), params={"history": 1})
+                           if row["id"] == order_id]
+            except RuntimeError as e:
+                self.log_result(f"Archived Order History ({role})", False, str(e))
+                continue
+            if order_id not in recent and history and history[0].get("archivedAt"):
+                self.log_result(f"Archived Order History ({role})", True, "Archived order only listed with history=1")
+            else:
+                self.log_result(f"Archived Order History ({role})", False, "Archived order listed wrongly",
+                                {"in_default": order_id in recent, "in_history": bool(history)})
+        
+        # Test 4: The Idempotency-Key still replays the archived order
+        response = self.make_request("POST", "orders", order_body, headers=checkout_headers)
+        if (response is not None and response.status_code == 200 and response.json().get("id") == order_id
+                and response.headers.get("Idempotent-Replayed") == "true"):
+            self.log_result("Archived Idempotency Key", True, "Retried key returned the archived order")
+        else:
+            self.log_result("Archived Idempotency Key", False, "Retried key after archival did not replay the order",
+                            response.json() if response is not None else None)
+    
+    def test_bulk_products(self):
+        """Bulk CSV upload, all-or-nothing validation and stock-delta mode"""
+        print("\n=== Testing Bulk Product Upload ===")
+        
+        if "farmer" not in self.tokens:
+            self.log_result("Bulk Upload (CSV)", False, "Farmer token required")
+            return
+        farmer_headers = self.get_auth_headers("farmer")
+        
+        csv_body = (
+            "name,category,price,quantity\n"
+            "Bulk Test Okra,Vegetable,30,40\n"
+            "\"Bulk Test Mangoes, Alphonso\",Fruit,250,12\n"
+        )
+        response = self.make_request("POST", "products/bulk", headers={**farmer_headers, "Content-Type": "text/csv"}, body=csv_body)
+        created_ids = []
+        if response and response.status_code == 200:
+            results = response.json().get("results", [])
+            created_ids = [row["id"] for row in results if row.get("status") == "created"]
+            self.created_resources["products"].extend(created_ids)
+            if len(created_ids) == 2 and [row["row"] for row in results] == [0, 1]:
+                self.log_result("Bulk Upload (CSV)", True, "2 products created from CSV with per-row results")
+            else:
+                self.log_result("Bulk Upload (CSV)", False, "Unexpected per-row results", {"results": results})
+        else:
+            self.log_result("Bulk Upload (CSV)", False, f"Bulk upload failed: {response.status_code if response else 'No response'}")
+        
+        # One bad row rejects the whole upload
+        response = self.make_request("POST", "products/bulk", [
+            {"name": "Bulk Test Wheat", "category": "Grain", "price": 35, "quantity": 100},
+            {"name": "Bulk Test Broken", "category": "Grain", "price": -1, "quantity": 100},
+        ], headers=farmer_headers)
+        if response is not None and response.status_code == 400 and [e["row"] for e in response.json().get("errors", [])] == [1]:
+            self.log_result("Bulk Upload Validation", True, "Invalid row reported and nothing inserted")
+        else:
+            self.log_result("Bulk Upload Validation", False, f"Expected 400 naming row 1, got {response.status_code if response else 'No response'}")
+        
+        if not created_ids:
+            return
+        response = self.make_request("POST", "products/bulk", [
+            {"id": created_ids[0], "delta": 10},
+            {"id": created_ids[1], "delta": -1000},
+        ], headers=farmer_headers, params={"mode": "stock"})
+        if response and response.status_code == 200:
+            results = response.json().get("results", [])
+            ok = (len(results) == 2 and results[0].get("quantity") == 50
+                  and results[1].get("error") == "Stock would go below zero")
+            if ok:
+                self.log_result("Bulk Stock Deltas", True, "Restock applied, oversized decrement rejected per row")
+            else:
+                self.log_result("Bulk Stock Deltas", False, "Unexpected stock results", {"results": results})
+        else:
+            self.log_result("Bulk Stock Deltas", False, f"Stock update failed: {response.status_code if response else 'No response'}")
+    
+    def test_conditional_get(self, repeats=5):
+        """Repeat catalog reads with If-None-Match and check they come back 304"""
+        print("\n=== Testing Conditional GET ===")
+        
+        response = self.make_request("GET", "products", params=MUMBAI_GPS)
+        if not response or response.status_code != 200:
+            self.log_result("Catalog ETag", False, f"Failed to get products: {response.status_code if response else 'No response'}")
+            return
+        etag = response.headers.get("ETag")
+        if not etag or not response.headers.get("Last-Modified"):
+            self.log_result("Catalog ETag", False, "Response missing ETag or Last-Modified", dict(response.headers))
+            return
+        body_bytes = len(response.content)
+        
+        not_modified = changed = stale = 0
+        bytes_saved = 0
+        for _ in range(repeats):
+            response = self.make_request("GET", "products", headers={"If-None-Match": etag}, params=MUMBAI_GPS)
+            if response is None:
+                stale += 1
+            elif response.status_code == 304:
+                not_modified += 1
+                bytes_saved += body_bytes - len(response.content)
+            elif response.status_code == 200 and response.headers.get("ETag") != etag:
+                # The catalog really changed (parallel suites write to it)
+                changed += 1
+                etag = response.headers.get("ETag")
+                body_bytes = len(response.content)
+            else:
+                stale += 1
+        
+        details = {"not_modified": not_modified, "changed": changed, "failed": stale,
+                   "body_bytes": body_bytes, "bytes_saved": bytes_saved}
+        if not_modified > 0 and stale == 0:
+            self.log_result("Catalog 304s", True, f"{not_modified}/{repeats} repeat reads returned 304, saved {bytes_saved} bytes", details)
+        else:
+            self.log_result("Catalog 304s", False, "Repeat reads with a matching ETag were not answered with 304", details)
+        
+        # A product write must invalidate the tag
+        if "farmer" in self.tokens and self.created_resources["products"]:
+            product_id = self.created_resources["products"][0]
+            self.make_request("PUT", f"products/{product_id}", {"price": 52.0}, headers=self.get_auth_headers("farmer"))
+            response = self.make_request("GET", "products", headers={"If-None-Match": etag}, params=MUMBAI_GPS)
+            if response is not None and response.status_code == 200 and response.headers.get("ETag") != etag:
+                self.log_result("Catalog ETag After Write", True, "Product update produced a new ETag")
+            else:
+                self.log_result("Catalog ETag After Write", False, f"Expected 200 with a new ETag, got {response.status_code if response else 'No response'}")
+    
+    def test_order_concurrency(self, parallel_orders=20, stock=5):
+        """Hammer one product with parallel orders and check stock never oversells"""
+        print("\n=== Testing Order Concurrency ===")
+        
+        if "farmer" not in self.tokens or "buyer" not in self.tokens:
+            self.log_result("Concurrent Orders", False, "Farmer and buyer tokens required")
+            return
+        
+        response = self.make_request("POST", "products", {
+            "name": "Concurrency Test Onions",
+            "category": "Vegetable",
+            "price": 10.0,
+            "quantity": float(stock)
+        }, headers=self.get_auth_headers("farmer"))
+        if not response or response.status_code != 200:
+            self.log_result("Concurrent Orders", False, f"Could not create test product: {response.status_code if response else 'No response'}")
+            return
+        product_id = response.json()["id"]
+        self.created_resources["products"].append(product_id)
+        
+        order_data = {"items": [{"productId": product_id, "quantity": 1}], "paymentMode": "cod"}
+        buyer_headers = self.get_auth_headers("buyer")
+        with ThreadPoolExecutor(max_workers=parallel_orders) as pool:
+            responses = list(pool.map(
+                lambda _: self.make_request("POST", "orders", order_data, headers=buyer_headers),
+                range(parallel_orders)
+            ))
+        
+        accepted = sum(1 for r in responses if r is not None and r.status_code == 200)
+        rejected = sum(1 for r in responses if r is not None and r.status_code == 400)
+        errored = parallel_orders - accepted - rejected
+        
+        remaining = None
+        response = self.make_request("GET", "products/my", headers=self.get_auth_headers("farmer"))
+        if response and response.status_code == 200:
+            remaining = next((p["quantity"] for p in response.json() if p["id"] == product_id), None)
+        
+        details = {"accepted": accepted, "rejected": rejected, "errored": errored, "remaining_stock": remaining}
+        if accepted == stock and errored == 0 and remaining == 0:
+            self.log_result("Concurrent Orders", True, f"{accepted}/{parallel_orders} orders accepted for stock of {stock}, none oversold", details)
+        else:
+            self.log_result("Concurrent Orders", False, "Parallel orders oversold or lost stock", details)
+    
     def test_admin_apis(self):
         """Test all admin endpoints"""
         print("\n=== Testing Admin APIs ===")
@@ -466,6 +976,7 @@ class APITester:
                 self.log_result("Get Pending Farmers", False, f"Failed to get pending farmers: {response.status_code if response else 'No response'}")
         
         # Test 3: Get All Users
+        all_users = None
         if "admin" in self.tokens:
             response = self.make_request("GET", "admin/users", headers=self.get_auth_headers("admin"))
             if response and response.status_code == 200:
@@ -474,7 +985,26 @@ class APITester:
             else:
                 self.log_result("Get All Users", False, f"Failed to get all users: {response.status_code if response else 'No response'}")
         
-        # Test 4: Admin Access Control (Buyer trying admin endpoint)
+        # Test 4: Paginated Users (keyset cursor walk must match the full list)
+        if "admin" in self.tokens:
+            try:
+                paged_ids = [u["id"] for u in self.iter_pages("admin/users", headers=self.get_auth_headers("admin"),
+                                                              params={"fields": "email,role"}, limit=2)]
+                # Other suites may register users meanwhile, so only users from the full list must all show up
+                missing = {u["id"] for u in all_users or []} - set(paged_ids)
+                if len(paged_ids) != len(set(paged_ids)):
+                    self.log_result("Paginated Users", False, "Cursor pagination returned duplicate users")
+                elif all_users is None:
+                    self.log_result("Paginated Users", False, "No full user list to compare the paged walk with")
+                elif missing:
+                    self.log_result("Paginated Users", False, f"Cursor pagination skipped {len(missing)} users",
+                                    {"missing": sorted(missing)[:10]})
+                else:
+                    self.log_result("Paginated Users", True, f"Walked {len(paged_ids)} users in pages of 2, matching the full list")
+            except RuntimeError as e:
+                self.log_result("Paginated Users", False, str(e))
+        
+        # Test 5: Admin Access Control (Buyer trying admin endpoint)
         if "buyer" in self.tokens:
             response = self.make_request("GET", "admin/stats", headers=self.get_auth_headers("buyer"))
             if response and response.status_code == 401:
@@ -533,23 +1063,53 @@ class APITester:
                 else:
                     print(f"❌ Failed to delete test product: {product_id}")
     
-    def run_all_tests(self):
+    def test_catalog_and_orders(self):
+        """Product suite followed by the order suite, which orders from the catalog it leaves behind"""
+        self.test_product_apis()
+        self.test_bulk_products()
+        self.test_conditional_get()
+        self.test_order_apis()
+        self.test_order_concurrency()
+        self.test_payments()
+        self.test_order_history()
+
+    def run_suites(self, parallel=True):
+        """Run the suites, in parallel where they don't depend on each other"""
+        # Every other suite needs the tokens collected here
+        self.test_authentication_apis()
+
+        independent = [
+            self.test_catalog_and_orders,
+            self.test_admin_apis,
+            self.test_gps_functionality,
+        ]
+        if not parallel:
+            for suite in independent:
+                suite()
+            return
+
+        with ThreadPoolExecutor(max_workers=len(independent)) as pool:
+            futures = [pool.submit(suite) for suite in independent]
+            for future in futures:
+                future.result()
+
+    def run_all_tests(self, parallel=True):
         """Run all backend tests"""
         print("🚀 Starting Comprehensive Backend API Testing")
         print(f"Base URL: {BASE_URL}")
         print("=" * 60)
         
         try:
+            metrics_before = self.fetch_server_metrics()
+            
             # Run all test suites
-            self.test_authentication_apis()
-            self.test_product_apis()
-            self.test_order_apis()
-            self.test_admin_apis()
-            self.test_gps_functionality()
+            self.run_suites(parallel=parallel)
             
             # Clean up
             self.cleanup_test_data()
             
+            self.print_latency_breakdown(metrics_before, self.fetch_server_metrics())
+            
             # Summary
             print("\n" + "=" * 60)
             print("🏁 TEST SUMMARY")
@@ -574,7 +1134,7 @@ class APITester:
             critical_tests = [
                 "Admin Login", "Farmer Login", "Buyer Login with GPS",
                 "Get Products with GPS", "Create Product (Farmer)", 
-                "Create Order (COD)", "Get Admin Stats", "GPS Distance Filtering"
+                "Create Order (COD)", "Concurrent Orders", "Get Admin Stats", "GPS Distance Filtering"
             ]
             
             for test_name in critical_tests:
@@ -593,9 +1153,233 @@ class APITester:
             traceback.print_exc()
             return 0, 1
 
+def percentile(samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not samples:
+        return 0.0
+    index = max(0, math.ceil(pct / 100 * len(samples)) - 1)
+    return samples[index]
+
+
+class LoadTester:
+    """Drive concurrent virtual buyers, farmers and admins against the API"""
+
+    def __init__(self, tester, users, duration=None, total_requests=None):
+        self.tester = tester
+        self.users = users
+        self.duration = duration
+        self.total_requests = total_requests
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+        self.issued = 0
+
+    def login_roles(self):
+        """Log every role in once; virtual users of a role share its token"""
+        for role in self.users:
+            if not self.users[role] or role in self.tester.tokens or role not in TEST_CREDENTIALS:
+                continue
+            payload = dict(TEST_CREDENTIALS[role])
+            if role == "buyer":
+                payload.update(MUMBAI_GPS)
+            response = self.tester.make_request("POST", "auth/login", payload)
+            if response is None or response.status_code != 200:
+                raise RuntimeError(f"Could not log in as {role}: {response.status_code if response else 'No response'}")
+            self.tester.tokens[role] = response.json()["token"]
+
+    def next_slot(self, deadline):
+        """Reserve the next request from the shared budget, False once exhausted"""
+        if deadline is not None and time.perf_counter() >= deadline:
+            return False
+        with self.lock:
+            if self.total_requests is not None and self.issued >= self.total_requests:
+                return False
+            self.issued += 1
+            return True
+
+    def virtual_user(self, role, offset, deadline):
+        """Cycle through the role's scenario until time or request budget runs out"""
+        scenario = LOAD_SCENARIOS[role]
+        headers = self.tester.get_auth_headers(role)
+        step = offset
+        while self.next_slot(deadline):
+            method, endpoint, params = scenario[step % len(scenario)]
+            step += 1
+            started = time.perf_counter()
+            if method == "GET":
+                response = self.tester.make_request(method, endpoint, headers=headers, params=params)
+            else:
+                response = self.tester.make_request(method, endpoint, data=params, headers=headers)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            label = f"{method} {endpoint}"
+            with self.lock:
+                self.samples[label].append(elapsed_ms)
+                if response is None or response.status_code >= 400:
+                    self.errors[label] += 1
+
+    def run(self):
+        """Run the load phase and return per-endpoint statistics"""
+        self.login_roles()
+        workers = [(role, i) for role, count in self.users.items() for i in range(count)]
+        if not workers:
+            raise ValueError("Load mode needs at least one virtual user")
+
+        print(f"🔥 Load test: {len(workers)} virtual users "
+              f"({', '.join(f'{count} {role}s' for role, count in self.users.items())})")
+
+        started = time.perf_counter()
+        deadline = started + self.duration if self.duration else None
+        with ThreadPoolExecutor(max_workers=len(workers)) as pool:
+            futures = [pool.submit(self.virtual_user, role, i, deadline) for role, i in workers]
+            for future in futures:
+                future.result()
+        wall_time = time.perf_counter() - started
+
+        report = {}
+        for label, latencies in sorted(self.samples.items()):
+            latencies.sort()
+            report[label] = {
+                "requests": len(latencies),
+                "errors": self.errors[label],
+                "rps": len(latencies) / wall_time if wall_time else 0.0,
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                "p99_ms": percentile(latencies, 99),
+            }
+        self.print_report(report, wall_time)
+        return report
+
+    def print_report(self, report, wall_time):
+        """Print the per-endpoint throughput and latency table"""
+        print("\n" + "=" * 86)
+        print(f"📊 LOAD TEST SUMMARY ({wall_time:.1f}s wall time)")
+        print("=" * 86)
+        print(f"{'Endpoint':<30}{'Reqs':>8}{'Errors':>8}{'Req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        total = 0
+        for label, row in report.items():
+            total += row["requests"]
+            print(f"{label:<30}{row['requests']:>8}{row['errors']:>8}{row['rps']:>10.1f}"
+                  f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+        print(f"\nTotal: {total} requests, {total / wall_time if wall_time else 0:.1f} req/s")
+
+
+# ============ RESULT FILES ============
+
+ENDPOINT_COLUMNS = ["route", "count", "errors", "client_errors", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "mean_bytes"]
+
+
+def write_run(path, tester, mode, label=None, load_report=None):
+    """Write this run's results: everything as .json, or the per-route table as .csv"""
+    endpoints = tester.endpoint_stats()
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=ENDPOINT_COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+            for route, row in endpoints.items():
+                writer.writerow({"route": route, **row})
+    else:
+        run = {
+            "label": label,
+            "mode": mode,
+            "base_url": BASE_URL,
+            "finished_at": datetime.now().isoformat(),
+            "endpoints": endpoints,
+            "tests": tester.test_results,
+        }
+        if load_report is not None:
+            run["load"] = load_report
+        with open(path, "w") as f:
+            json.dump(run, f, indent=2)
+    print(f"\n💾 Results written to {path}")
+
+
+def load_run(path):
+    """Per-route stats from a file written by write_run (JSON or CSV)"""
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            return {row.pop("route"): {key: float(value) for key, value in row.items()} for row in csv.DictReader(f)}
+    with open(path) as f:
+        return json.load(f)["endpoints"]
+
+
+def compare_runs(base_path, new_path, metric="p95_ms", threshold_pct=10.0, min_delta_ms=2.0):
+    """Print per-route deltas between two runs and return the routes that regressed"""
+    base, new = load_run(base_path), load_run(new_path)
+    print("\n" + "=" * 96)
+    print(f"📊 RUN COMPARISON ({metric}, regression = more than +{threshold_pct:g}% and +{min_delta_ms:g} ms)")
+    print(f"   base: {base_path}\n   new:  {new_path}")
+    print("=" * 96)
+    print(f"{'Route':<34}{'Base':>10}{'New':>10}{'Delta':>10}{'Errors':>14}{'Bytes':>16}")
+
+    regressions = []
+    for route in sorted(set(base) | set(new)):
+        if route not in base or route not in new:
+            print(f"{route:<34}{'only in ' + ('base' if route in base else 'new'):>30}")
+            continue
+        before, after = base[route], new[route]
+        delta_pct = (after[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0.0
+        slower = delta_pct > threshold_pct and after[metric] - before[metric] > min_delta_ms
+        # Compare error rates, since the two runs may have sent different numbers of requests
+        base_rate = before["errors"] / before["count"] if before["count"] else 0.0
+        new_rate = after["errors"] / after["count"] if after["count"] else 0.0
+        more_errors = new_rate > base_rate
+
+        status = "❌" if slower or more_errors else "✅"
+        print(f"{route:<34}{before[metric]:>8.1f}ms{after[metric]:>8.1f}ms{delta_pct:>+9.1f}%"
+              f"{int(before['errors']):>6} → {int(after['errors']):<5}"
+              f"{before['mean_bytes']:>7.0f} → {after['mean_bytes']:<7.0f}{status}")
+        if slower or more_errors:
+            regressions.append(route)
+
+    print(f"\n{'❌' if regressions else '✅'} {len(regressions)} route(s) regressed")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Backend API tests for the Local Farmer Marketplace")
+    parser.add_argument("--load", action="store_true", help="run the concurrent load-test mode instead of the test suite")
+    parser.add_argument("--sequential", action="store_true", help="run the test suites one after another")
+    parser.add_argument("--buyers", type=int, default=10, help="virtual buyers in load mode")
+    parser.add_argument("--farmers", type=int, default=3, help="virtual farmers in load mode")
+    parser.add_argument("--admins", type=int, default=1, help="virtual admins in load mode")
+    parser.add_argument("--logins", type=int, default=0, help="virtual users doing back-to-back logins in load mode")
+    parser.add_argument("--duration", type=float, default=None, help="load phase length in seconds")
+    parser.add_argument("--requests", type=int, default=None, help="total request budget for the load phase")
+    parser.add_argument("--output", metavar="PATH", help="write per-route latency/size/status results to .json or .csv")
+    parser.add_argument("--label", help="name for this run in the JSON results (e.g. a build or commit)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files instead of running")
+    parser.add_argument("--metric", default="p95_ms", choices=["mean_ms", "p50_ms", "p95_ms", "p99_ms"],
+                        help="latency statistic compared by --compare")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent slowdown that counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="ignore slowdowns smaller than this many ms")
+    args = parser.parse_args(argv)
+    if args.load and args.duration is None and args.requests is None:
+        args.duration = 30.0
+    return args
+
+
 if __name__ == "__main__":
+    args = parse_args()
+
+    if args.compare:
+        regressions = compare_runs(*args.compare, metric=args.metric, threshold_pct=args.threshold,
+                                   min_delta_ms=args.min_delta_ms)
+        sys.exit(1 if regressions else 0)
+
+    if args.load:
+        users = {"buyer": args.buyers, "farmer": args.farmers, "admin": args.admins, "login": args.logins}
+        tester = APITester(pool_size=max(10, sum(users.values())))
+        metrics_before = tester.fetch_server_metrics()
+        report = LoadTester(tester, users, duration=args.duration, total_requests=args.requests).run()
+        tester.print_database_split(metrics_before, tester.fetch_server_metrics())
+        if args.output:
+            write_run(args.output, tester, "load", label=args.label, load_report=report)
+        sys.exit(0 if not any(row["errors"] for row in report.values()) else 1)
+
     tester = APITester()
-    passed, failed = tester.run_all_tests()
+    passed, failed = tester.run_all_tests(parallel=not args.sequential)
+    if args.output:
+        write_run(args.output, tester, "suite", label=args.label)
     
     # Exit with appropriate code
     exit(0 if failed == 0 else 1)
\ No newline at end of file
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Bulk Product Upload Benchmark for Local Farmer Marketplace
+Times uploading a large harvest through POST /api/products/bulk (JSON and CSV)
+against one POST /api/products per row, then the same for stock updates
+
+Usage:
+    python local_server.py -- python bulk_bench.py --rows 10000
+    API_BASE_URL=http://127.0.0.1:3000/api python bulk_bench.py --per-item 500
+
+The per-item path is timed on --per-item rows and extrapolated to --rows.
+Every product the benchmark creates is deleted afterwards unless --keep is given.
+"""
+
+import argparse
+import csv
+import io
+import json
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend_test import APITester, TEST_CREDENTIALS, percentile
+
+CATALOGUE = [
+    ("Vegetable", "Tomatoes"), ("Vegetable", "Onions"), ("Vegetable", "Okra"),
+    ("Fruit", "Mangoes"), ("Fruit", "Grapes"), ("Grain", "Jowar"), ("Rice", "Kolam Rice"),
+]
+
+
+def make_rows(count, rng):
+    """Synthetic product rows as the bulk endpoint accepts them"""
+    rows = []
+    for i in range(count):
+        category, name = rng.choice(CATALOGUE)
+        rows.append({
+            "name": f"Bulk Bench {name} {i}",
+            "category": category,
+            "price": round(rng.uniform(10, 300), 2),
+            "quantity": float(rng.randint(5, 500)),
+        })
+    return rows
+
+
+def to_csv(rows):
+    """Render rows as CSV with a header line"""
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=["name", "category", "price", "quantity"])
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue()
+
+
+class BulkBenchmark:
+    """Compare the per-item and bulk product write paths for one farmer"""
+
+    def __init__(self, tester, args):
+        self.tester = tester
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.created = []
+        self.report = []
+
+    def login(self):
+        response = self.tester.make_request("POST", "auth/login", TEST_CREDENTIALS["farmer"])
+        if response is None or response.status_code != 200:
+            raise SystemExit(f"Farmer login failed: {response.status_code if response else 'No response'}")
+        self.tester.tokens["farmer"] = response.json()["token"]
+        self.headers = self.tester.get_auth_headers("farmer")
+
+    def record(self, label, rows, seconds, latencies=None, extrapolate_to=None):
+        entry = {"path": label, "rows": rows, "seconds": seconds, "rows_per_s": rows / seconds if seconds else 0.0}
+        if latencies:
+            latencies.sort()
+            entry["p50_ms"] = percentile(latencies, 50)
+            entry["p95_ms"] = percentile(latencies, 95)
+        if extrapolate_to:
+            entry["estimated_seconds"] = seconds / rows * extrapolate_to
+        self.report.append(entry)
+        print(f"  {label:<28} {rows:>7} rows in {seconds:8.2f}s ({entry['rows_per_s']:9.1f} rows/s)")
+
+    def per_item_create(self, rows):
+        latencies = []
+        started = time.perf_counter()
+        for row in rows:
+            t0 = time.perf_counter()
+            response = self.tester.make_request("POST", "products", row, headers=self.headers)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if response is None or response.status_code != 200:
+                raise SystemExit(f"Per-item create failed: {response.status_code if response else 'No response'}")
+            self.created.append(response.json()["id"])
+        return time.perf_counter() - started, latencies
+
+    def bulk_create(self, rows, as_csv):
+        if as_csv:
+            headers = {**self.headers, "Content-Type": "text/csv"}
+            payload = {"body": to_csv(rows)}
+        else:
+            headers = {**self.headers, "Content-Type": "application/json"}
+            payload = {"body": json.dumps(rows)}
+        started = time.perf_counter()
+        response = self.tester.make_request("POST", "products/bulk", headers=headers, **payload)
+        elapsed = time.perf_counter() - started
+        if response is None or response.status_code != 200:
+            detail = response.text[:300] if response is not None else "No response"
+            raise SystemExit(f"Bulk create failed: {detail}")
+        results = response.json()["results"]
+        if len(results) != len(rows):
+            raise SystemExit(f"Bulk create returned {len(results)} results for {len(rows)} rows")
+        self.created.extend(row["id"] for row in results)
+        return elapsed
+
+    def per_item_restock(self, ids):
+        latencies = []
+        started = time.perf_counter()
+        for product_id in ids:
+            t0 = time.perf_counter()
+            # PUT sets an absolute quantity; the bulk path applies a delta
+            response = self.tester.make_request("PUT", f"products/{product_id}", {"quantity": 1000.0}, headers=self.headers)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if response is None or response.status_code != 200:
+                raise SystemExit(f"Per-item restock failed: {response.status_code if response else 'No response'}")
+        return time.perf_counter() - started, latencies
+
+    def bulk_restock(self, ids):
+        deltas = [{"id": product_id, "delta": 10} for product_id in ids]
+        started = time.perf_counter()
+        response = self.tester.make_request("POST", "products/bulk", deltas, headers=self.headers, params={"mode": "stock"})
+        elapsed = time.perf_counter() - started
+        if response is None or response.status_code != 200 or response.json()["updated"] != len(ids):
+            detail = response.text[:300] if response is not None else "No response"
+            raise SystemExit(f"Bulk restock failed: {detail}")
+        return elapsed
+
+    def cleanup(self):
+        if self.args.keep or not self.created:
+            return
+        print(f"\n🧹 Deleting {len(self.created)} benchmark products")
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(lambda pid: self.tester.make_request("DELETE", f"products/{pid}", headers=self.headers),
+                          self.created))
+
+    def run(self):
+        args = self.args
+        self.login()
+        per_item = min(args.per_item, args.rows)
+
+        print(f"\n=== Create: {args.rows} rows bulk vs {per_item} rows one by one ===")
+        seconds, latencies = self.per_item_create(make_rows(per_item, self.rng))
+        self.record("POST /products (per item)", per_item, seconds, latencies, extrapolate_to=args.rows)
+        self.record("POST /products/bulk (JSON)", args.rows, self.bulk_create(make_rows(args.rows, self.rng), False))
+        self.record("POST /products/bulk (CSV)", args.rows, self.bulk_create(make_rows(args.rows, self.rng), True))
+
+        bulk_ids = self.created[per_item:per_item + args.rows]
+        print(f"\n=== Restock: {len(bulk_ids)} rows bulk vs {per_item} rows one by one ===")
+        seconds, latencies = self.per_item_restock(bulk_ids[:per_item])
+        self.record("PUT /products/:id (per item)", per_item, seconds, latencies, extrapolate_to=len(bulk_ids))
+        self.record("POST /products/bulk?mode=stock", len(bulk_ids), self.bulk_restock(bulk_ids))
+
+        self.print_summary()
+
+    def print_summary(self):
+        rows = self.args.rows
+        create_item, create_json, _, stock_item, stock_bulk = self.report
+        print("\n" + "=" * 70)
+        print(f"📊 BULK UPLOAD SUMMARY ({rows} rows)")
+        print("=" * 70)
+        for label, item, bulk in (("create", create_item, create_json), ("restock", stock_item, stock_bulk)):
+            estimate = item["estimated_seconds"]
+            print(f"{label:<8} per item ≈ {estimate:8.1f}s (p50 {item['p50_ms']:.1f} ms/row)   "
+                  f"bulk {bulk['seconds']:6.2f}s   speedup ×{estimate / bulk['seconds']:.0f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark bulk product upload against the per-item API")
+    parser.add_argument("--rows", type=int, default=10000, help="rows per bulk upload")
+    parser.add_argument("--per-item", type=int, default=1000, help="rows timed on the per-item path (extrapolated to --rows)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for the generated rows")
+    parser.add_argument("--json", metavar="PATH", help="also write the measurements to a JSON file")
+    parser.add_argument("--keep", action="store_true", help="leave the created products in place")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    bench = BulkBenchmark(APITester(), args)
+    try:
+        bench.run()
+    finally:
+        bench.cleanup()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(bench.report, f, indent=2)
+    sys.exit(0)
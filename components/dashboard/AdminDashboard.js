@@ -10,6 +10,12 @@ import {
 } from "@/components/ui/card";
 import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs";
 import { Badge } from "@/components/ui/badge";
+import {
+  ChartContainer,
+  ChartTooltip,
+  ChartTooltipContent,
+} from "@/components/ui/chart";
+import { Bar, BarChart, CartesianGrid, Line, LineChart, XAxis } from "recharts";
 import { toast } from "sonner";
 import {
   Loader2,
@@ -33,11 +39,13 @@ export const AdminDashboard = ({ user, token, logout }) => {
   const [allUsers, setAllUsers] = useState([]);
   const [allProducts, setAllProducts] = useState([]);
   const [stats, setStats] = useState(null);
+  const [series, setSeries] = useState([]);
   const [activeTab, setActiveTab] = useState("approvals");
 
   // Fetch stats once
   useEffect(() => {
     fetchStats();
+    fetchSeries();
   }, []);
 
   // Fetch tab-specific data
@@ -65,6 +73,18 @@ export const AdminDashboard = ({ user, token, logout }) => {
     }
   };
 
+  const fetchSeries = async () => {
+    try {
+      const response = await fetch("/api/admin/stats/series?days=30", {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      const data = await response.json();
+      if (Array.isArray(data)) setSeries(data);
+    } catch (error) {
+      toast.error("Failed to load order history");
+    }
+  };
+
   const fetchPendingFarmers = async () => {
     setLoading(true);
     try {
@@ -235,6 +255,48 @@ export const AdminDashboard = ({ user, token, logout }) => {
           </div>
         )}
 
+        {/* Orders and GMV per day (last 30 days) */}
+        {series.length > 0 && (
+          <div className="grid md:grid-cols-2 gap-4 mb-8">
+            <Card>
+              <CardHeader className="pb-2">
+                <CardDescription>Orders per day</CardDescription>
+              </CardHeader>
+              <CardContent>
+                <ChartContainer
+                  config={{ orders: { label: "Orders", color: "#16a34a" } }}
+                  className="h-48 w-full"
+                >
+                  <BarChart data={series}>
+                    <CartesianGrid vertical={false} />
+                    <XAxis dataKey="day" tickFormatter={(day) => day.slice(5)} tickLine={false} />
+                    <ChartTooltip content={<ChartTooltipContent />} />
+                    <Bar dataKey="orders" fill="var(--color-orders)" radius={2} />
+                  </BarChart>
+                </ChartContainer>
+              </CardContent>
+            </Card>
+            <Card>
+              <CardHeader className="pb-2">
+                <CardDescription>GMV per day (₹)</CardDescription>
+              </CardHeader>
+              <CardContent>
+                <ChartContainer
+                  config={{ gmv: { label: "GMV", color: "#ca8a04" } }}
+                  className="h-48 w-full"
+                >
+                  <LineChart data={series}>
+                    <CartesianGrid vertical={false} />
+                    <XAxis dataKey="day" tickFormatter={(day) => day.slice(5)} tickLine={false} />
+                    <ChartTooltip content={<ChartTooltipContent />} />
+                    <Line dataKey="gmv" stroke="var(--color-gmv)" dot={false} strokeWidth={2} />
+                  </LineChart>
+                </ChartContainer>
+              </CardContent>
+            </Card>
+          </div>
+        )}
+
         <Tabs value={activeTab} onValueChange={setActiveTab}>
           <TabsList className="mb-6 flex flex-wrap h-auto gap-2">
             <TabsTrigger value="approvals" className="flex-1">
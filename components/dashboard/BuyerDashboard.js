@@ -25,6 +25,13 @@ import {
   Leaf,
 } from "lucide-react";
 import { Footer } from "@/components/layout/Footer";
+import { useOrderEvents } from "@/hooks/use-order-events";
+
+// Idempotency key for one checkout attempt (randomUUID needs a secure context)
+const newCheckoutKey = () =>
+  typeof crypto !== "undefined" && crypto.randomUUID
+    ? crypto.randomUUID()
+    : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
 
 export const BuyerDashboard = ({
   user,
@@ -41,6 +48,12 @@ export const BuyerDashboard = ({
   const [activeTab, setActiveTab] = useState("products");
   const [selectedCategory, setSelectedCategory] = useState("all");
   const [showCheckout, setShowCheckout] = useState(false);
+  const [checkoutKey, setCheckoutKey] = useState(newCheckoutKey);
+
+  // A changed cart is a new checkout
+  useEffect(() => {
+    setCheckoutKey(newCheckoutKey());
+  }, [cart]);
 
   useEffect(() => {
     if(activeTab==="orders"){
@@ -82,6 +95,21 @@ export const BuyerDashboard = ({
     }
   };
 
+  // Pushed order events replace re-polling the order list
+  useOrderEvents(token, (type, event) => {
+    if (type === "order.status") {
+      setOrders((current) =>
+        current.map((order) =>
+          order.id === event.orderId
+            ? { ...order, orderStatus: event.orderStatus, paymentStatus: event.paymentStatus }
+            : order,
+        ),
+      );
+      return;
+    }
+    if (activeTab === "orders") fetchOrders();
+  });
+
   const fetchOrders = async () => {
     setLoading(true);
     try {
@@ -132,6 +160,22 @@ export const BuyerDashboard = ({
     toast.success("Removed from cart");
   };
 
+  // Polls until the server has created the Razorpay order for a 202 checkout
+  // or given up on it; returns the last payment state seen
+  const waitForRazorpayOrder = async (order) => {
+    let payment = order;
+    for (let attempt = 0; attempt < 20; attempt++) {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      const response = await fetch(`/api/orders/${order.id}/payment`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      if (!response.ok) break;
+      payment = await response.json();
+      if (payment.razorpayOrderId || payment.paymentStatus === "failed") break;
+    }
+    return payment;
+  };
+
   const checkout = async (paymentMode) => {
     setLoading(true);
     try {
@@ -140,6 +184,8 @@ export const BuyerDashboard = ({
         headers: {
           "Content-Type": "application/json",
           Authorization: `Bearer ${token}`,
+          // Same key for retries of this checkout, so it is never placed twice
+          "Idempotency-Key": checkoutKey,
         },
         body: JSON.stringify({
           items: cart.map((item) => ({
@@ -159,6 +205,21 @@ export const BuyerDashboard = ({
       }
 
       if (paymentMode === "razorpay") {
+        if (!data.razorpayOrderId && data.paymentStatus !== "failed") {
+          Object.assign(data, await waitForRazorpayOrder(data));
+        }
+        if (!data.razorpayOrderId) {
+          if (data.paymentStatus === "failed") {
+            // The server cancelled that order and returned its stock, so a retry is a new checkout
+            setCheckoutKey(newCheckoutKey());
+            toast.error("Payment gateway unavailable, please try again");
+          } else {
+            // Still being set up: retrying with the same key picks up the same order
+            toast.error("Payment is taking longer than usual, please try again in a moment");
+          }
+          return;
+        }
+
         // Initialize Razorpay
         const options = {
           key: process.env.NEXT_PUBLIC_RAZORPAY_KEY_ID,
@@ -23,6 +23,7 @@ import { toast } from "sonner";
 import { Loader2, Leaf, LogOut, Plus, X } from "lucide-react";
 import { productSchema } from "@/lib/validations";
 import { Footer } from "@/components/layout/Footer";
+import { useOrderEvents } from "@/hooks/use-order-events";
 
 export const FarmerDashboard = ({
   user,
@@ -68,6 +69,22 @@ export const FarmerDashboard = ({
     }
   };
 
+  // Pushed order events replace re-polling the order list
+  useOrderEvents(token, (type, event) => {
+    if (type === "order.status") {
+      setOrders((current) =>
+        current.map((order) =>
+          order.id === event.orderId
+            ? { ...order, orderStatus: event.orderStatus, paymentStatus: event.paymentStatus }
+            : order,
+        ),
+      );
+      return;
+    }
+    if (type === "order.created") toast.success("New order received");
+    if (activeTab === "orders") fetchOrders();
+  });
+
   const fetchOrders = async () => {
     setLoading(true);
     try {
@@ -370,6 +387,14 @@ export const FarmerDashboard = ({
                           Mark as Packed
                         </Button>
                       )}
+                      {order.orderStatus === "packed" && (
+                        <Button
+                          onClick={() => updateOrderStatus(order.id, "delivered")}
+                          className="bg-green-600 hover:bg-green-700"
+                        >
+                          Mark as Delivered
+                        </Button>
+                      )}
                     </CardFooter>
                   </Card>
                 ))}
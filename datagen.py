@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Synthetic Data Generator for Local Farmer Marketplace
+Streams users, buyer/farmer profiles, products and order history into
+PostgreSQL with COPY, for performance testing at realistic scale
+
+Usage:
+    DATABASE_URL=postgresql://localhost/freshlocal python datagen.py --farmers 20000 --buyers 200000 --orders 3000000
+    python datagen.py --layout grid --grid-km 2 --orders 0 --defer-indexes   # dense farmer grid over Maharashtra
+    python datagen.py --clean                                               # remove every generated row
+
+Rows are rendered while COPY reads them, so memory stays flat however many
+orders are generated; only compact per-product price/owner arrays are kept.
+The same --seed always produces the same rows and ids. Generated users have
+"gen_" e-mail addresses and share the seeded buyer's password (buyer123) when
+that user exists. Requires psycopg2 and a migrated database.
+"""
+
+import argparse
+import bisect
+import hashlib
+import itertools
+import math
+import random
+import sys
+import time
+from array import array
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+import perf_bench
+
+GEN_PREFIX = "gen_"
+
+PASSWORD_SOURCE_EMAIL = "buyer@example.com"
+
+CITY_PINCODES = {
+    "Mumbai": "400001", "Pune": "411001", "Nagpur": "440001",
+    "Nashik": "422001", "Aurangabad": "431001", "Kolhapur": "416001",
+}
+
+# Tables written, in foreign-key order
+TABLES = ["User", "FarmerProfile", "BuyerProfile", "Product", "Order", "OrderItem"]
+
+COPY_CHUNK = 1 << 16
+
+# Item ids are derived from order index * MAX_ITEMS_LIMIT + position
+MAX_ITEMS_LIMIT = 16
+
+
+def id_prefix(seed, kind):
+    """First four UUID groups for (seed, kind); the last group is the row index"""
+    h = hashlib.blake2b(f"{seed}:{kind}".encode(), digest_size=16).hexdigest()
+    return f"{h[:8]}-{h[8:12]}-4{h[13:16]}-{'89ab'[int(h[16], 16) & 3]}{h[17:20]}-"
+
+
+def timestamp(epoch):
+    """UTC timestamp literal as Prisma stores DateTime columns"""
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+class CopyStream:
+    """Read-only file object rendering rows in COPY text format as they are read.
+    Generated values never contain tabs, newlines or backslashes, so no escaping is needed."""
+
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.buffer = b""
+        self.count = 0
+
+    def read(self, size=-1):
+        chunks = [self.buffer]
+        length = len(self.buffer)
+        for row in self.rows:
+            line = "\t".join("\\N" if value is None else str(value) for value in row).encode() + b"\n"
+            chunks.append(line)
+            length += len(line)
+            self.count += 1
+            if 0 <= size <= length:
+                break
+        data = b"".join(chunks)
+        if size < 0:
+            self.buffer = b""
+            return data
+        self.buffer = data[size:]
+        return data[:size]
+
+
+def copy_rows(conn, table, columns, rows):
+    """COPY generated rows into one table and commit; returns the row count"""
+    started = time.perf_counter()
+    stream = CopyStream(rows)
+    column_list = ", ".join(f'"{c}"' for c in columns)
+    with conn.cursor() as cur:
+        cur.copy_expert(f'COPY "{table}" ({column_list}) FROM STDIN', stream, size=COPY_CHUNK)
+    conn.commit()
+    elapsed = time.perf_counter() - started
+    print(f"  {table:<14} {stream.count:>11,} rows in {elapsed:7.1f}s ({stream.count / elapsed if elapsed else 0:>10,.0f} rows/s)")
+    return stream.count
+
+
+def skewed_index(rng, count, skew):
+    """Index in [0, count) where low indices are picked more often as skew grows (1 = uniform)"""
+    return min(int(count * rng.random() ** skew), count - 1)
+
+
+class Generator:
+    """Deterministic dataset; each table's rows come from their own seeded stream"""
+
+    def __init__(self, args, password):
+        self.args = args
+        self.password = password
+        self.now = datetime.fromisoformat(args.now).timestamp() if args.now else time.time()
+        self.cities = perf_bench.CITY_CENTRES
+        self.prefixes = {}
+        self.farmer_count = 0
+        # Compact lookups filled while generating, used by the order streams
+        self.farmer_city = array("B")
+        self.buyer_city = array("B")
+        self.product_price = array("d")
+        self.product_farmer = array("I")
+        self.city_products = [array("I") for _ in self.cities]
+
+    def rng(self, stream):
+        return random.Random(f"{self.args.seed}:{stream}")
+
+    def id(self, kind, index):
+        """UUID-shaped id, the same for (seed, kind, index) on every run"""
+        prefix = self.prefixes.get(kind)
+        if prefix is None:
+            prefix = self.prefixes[kind] = id_prefix(self.args.seed, kind)
+        return f"{prefix}{index:012x}"
+
+    def nearest_city(self, lat, lon):
+        return min(range(len(self.cities)),
+                   key=lambda c: (self.cities[c][1] - lat) ** 2 + (self.cities[c][2] - lon) ** 2)
+
+    def around_city(self, rng, city):
+        """Point scattered around a city centre, clamped to the lib/gps.isInMaharashtra bounds"""
+        _, lat, lon = self.cities[city]
+        spread = self.args.spread_km
+        lat += rng.gauss(0, spread / 111.0)
+        lon += rng.gauss(0, spread / (111.0 * math.cos(math.radians(lat))))
+        bounds = perf_bench.MAHARASHTRA_BOUNDS
+        return (min(max(lat, bounds["min_lat"]), bounds["max_lat"]),
+                min(max(lon, bounds["min_lon"]), bounds["max_lon"]))
+
+    # ============ FARMERS ============
+
+    def farmer_locations(self):
+        """(lat, lon, city) per farmer: a jittered grid over Maharashtra or clusters around cities"""
+        rng = self.rng("farmer-locations")
+        if self.args.layout == "grid":
+            bounds = perf_bench.MAHARASHTRA_BOUNDS
+            lat_step = self.args.grid_km / 111.0
+            lat = bounds["min_lat"] + lat_step / 2
+            while lat < bounds["max_lat"]:
+                lon_step = self.args.grid_km / (111.0 * math.cos(math.radians(lat)))
+                lon = bounds["min_lon"] + lon_step / 2
+                while lon < bounds["max_lon"]:
+                    f_lat = lat + rng.uniform(-0.4, 0.4) * lat_step
+                    f_lon = lon + rng.uniform(-0.4, 0.4) * lon_step
+                    yield f_lat, f_lon, self.nearest_city(f_lat, f_lon)
+                    lon += lon_step
+                lat += lat_step
+        else:
+            weights = list(range(len(self.cities), 0, -1))
+            for _ in range(self.args.farmers):
+                city = rng.choices(range(len(self.cities)), weights=weights)[0]
+                yield (*self.around_city(rng, city), city)
+
+    def farmers(self):
+        """(index, lat, lon, city, approved) per farmer; the same sequence on every call"""
+        rng = self.rng("farmers")
+        for i, (lat, lon, city) in enumerate(self.farmer_locations()):
+            yield i, lat, lon, city, rng.random() < self.args.approved_share
+
+    def farmer_users(self):
+        created = timestamp(self.now - 400 * 86400)
+        for i, _, _, city, approved in self.farmers():
+            self.farmer_city.append(city)
+            yield (self.id("farmer", i), f"{GEN_PREFIX}farmer{i}@example.com", self.password,
+                   f"Gen Farmer {i}", "farmer", approved, created, created)
+        self.farmer_count = len(self.farmer_city)
+
+    def farmer_profiles(self):
+        created = timestamp(self.now - 400 * 86400)
+        for i, lat, lon, _, _ in self.farmers():
+            yield (self.id("farmer-profile", i), self.id("farmer", i), f"98{i % 100000000:08d}",
+                   round(lat, 6), round(lon, 6), created, created)
+
+    # ============ BUYERS ============
+
+    def buyers(self):
+        rng = self.rng("buyers")
+        weights = list(range(len(self.cities), 0, -1))
+        for i in range(self.args.buyers):
+            city = rng.choices(range(len(self.cities)), weights=weights)[0]
+            lat, lon = self.around_city(rng, city)
+            yield i, lat, lon, city, rng.randint(1, 999)
+
+    def buyer_users(self):
+        created = timestamp(self.now - 400 * 86400)
+        for i, _, _, city, _ in self.buyers():
+            self.buyer_city.append(city)
+            yield (self.id("buyer", i), f"{GEN_PREFIX}buyer{i}@example.com", self.password,
+                   f"Gen Buyer {i}", "buyer", True, created, created)
+
+    def buyer_profiles(self):
+        created = timestamp(self.now - 400 * 86400)
+        for i, lat, lon, city, house in self.buyers():
+            name = self.cities[city][0]
+            yield (self.id("buyer-profile", i), self.id("buyer", i), f"97{i % 100000000:08d}",
+                   f"{house} Market Road", name, CITY_PINCODES.get(name, "400001"),
+                   round(lat, 6), round(lon, 6), created, created)
+
+    # ============ PRODUCTS ============
+
+    def products(self):
+        rng = self.rng("products")
+        categories = list(perf_bench.PRODUCT_NAMES)
+        mean = self.args.products_per_farmer
+        index = 0
+        for farmer in range(self.farmer_count):
+            farmer_id = self.id("farmer", farmer)
+            for _ in range(rng.randint(1, max(1, 2 * mean - 1))):
+                category = rng.choice(categories)
+                name = f"{rng.choice(['Fresh', 'Organic', 'Local'])} {rng.choice(perf_bench.PRODUCT_NAMES[category])}"
+                price = round(rng.uniform(10, 300), 2)
+                quantity = 0.0 if rng.random() < self.args.sold_out_share else float(rng.randint(5, 500))
+                created = timestamp(self.now - rng.uniform(0, 365) * 86400)
+
+                self.product_price.append(price)
+                self.product_farmer.append(farmer)
+                self.city_products[self.farmer_city[farmer]].append(index)
+                yield (self.id("product", index), farmer_id, name, category, price, quantity, created, created)
+                index += 1
+
+    # ============ ORDERS ============
+
+    def orders(self):
+        """(order row, item rows) per order; the same sequence on every call"""
+        args = self.args
+        rng = self.rng("orders")
+        sizes = range(1, args.max_items + 1)
+        cum_weights = list(itertools.accumulate(1 / k for k in sizes))
+        all_products = range(len(self.product_price))
+
+        for i in range(args.orders):
+            buyer = skewed_index(rng, args.buyers, args.buyer_skew)
+            pool = self.city_products[self.buyer_city[buyer]] or all_products
+            size = sizes[bisect.bisect_left(cum_weights, rng.random() * cum_weights[-1])]
+            age_days = args.days * rng.random() ** args.recency
+            created_at = self.now - age_days * 86400
+            created = timestamp(created_at)
+            order_id = self.id("order", i)
+
+            items, total, seen = [], 0.0, set()
+            for j in range(size):
+                product = pool[skewed_index(rng, len(pool), args.product_skew)]
+                if product in seen:
+                    continue
+                seen.add(product)
+                quantity = float(rng.randint(1, 5))
+                price = self.product_price[product]
+                total += quantity * price
+                items.append((self.id("item", i * MAX_ITEMS_LIMIT + j), order_id, self.id("product", product), quantity, price,
+                              self.id("farmer", self.product_farmer[product]), created))
+
+            # Older orders have moved further through fulfilment
+            status = "delivered" if age_days > 3 else ("packed" if age_days > 1 and rng.random() < 0.6 else "new")
+            if rng.random() < args.cod_share:
+                mode, payment, gateway_order, gateway_payment = "cod", "pending", None, None
+            else:
+                mode = "razorpay"
+                payment = "failed" if rng.random() < 0.03 else "paid"
+                gateway_order = f"order_gen{i:012d}"
+                gateway_payment = f"pay_gen{i:012d}" if payment == "paid" else None
+            updated = timestamp(min(created_at + rng.uniform(0, min(age_days, 3)) * 86400, self.now))
+            order = (order_id, self.id("buyer", buyer), mode, payment, status, gateway_order, gateway_payment,
+                     round(total, 2), created, updated)
+            yield order, items
+
+    def order_rows(self):
+        for order, _ in self.orders():
+            yield order
+
+    def item_rows(self):
+        for _, items in self.orders():
+            yield from items
+
+
+# ============ DATABASE ============
+
+def existing_rows(conn):
+    with conn.cursor() as cur:
+        cur.execute('SELECT COUNT(*) FROM "User" WHERE email LIKE %s', (GEN_PREFIX + "%",))
+        count = cur.fetchone()[0]
+    conn.rollback()
+    return count
+
+
+def shared_password(conn):
+    """Password hash of the seeded demo buyer, so generated users can log in as buyer123"""
+    with conn.cursor() as cur:
+        cur.execute('SELECT password FROM "User" WHERE email = %s', (PASSWORD_SOURCE_EMAIL,))
+        row = cur.fetchone()
+    conn.rollback()
+    return row[0] if row else "x"
+
+
+class DeferredIndexes:
+    """Drop secondary indexes of the loaded tables for the load and rebuild them afterwards
+
+    Unique indexes stay: Prisma's @unique fields are plain unique indexes, not
+    constraints, and dropping them would let duplicates in while loading.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.definitions = []
+
+    def __enter__(self):
+        with self.conn.cursor() as cur:
+            cur.execute('''
+                SELECT i.indexname, i.indexdef
+                FROM pg_indexes i
+                WHERE i.schemaname = current_schema() AND i.tablename = ANY(%s)
+                  AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conname = i.indexname)
+                  AND NOT (SELECT x.indisunique FROM pg_index x
+                           WHERE x.indexrelid = (quote_ident(i.schemaname) || '.' || quote_ident(i.indexname))::regclass)
+            ''', (TABLES,))
+            self.definitions = cur.fetchall()
+            for name, _ in self.definitions:
+                cur.execute(f'DROP INDEX "{name}"')
+        self.conn.commit()
+        print(f"  dropped {len(self.definitions)} secondary indexes for the load")
+        return self
+
+    def __exit__(self, *exc):
+        # A failed COPY leaves the transaction aborted; the rebuild needs a fresh one
+        self.conn.rollback()
+        started = time.perf_counter()
+        with self.conn.cursor() as cur:
+            for _, definition in self.definitions:
+                # Indexes of partitioned tables are listed as "ON ONLY"; rebuild them on every partition
+                cur.execute(definition.replace(" ON ONLY ", " ON ", 1))
+        self.conn.commit()
+        print(f"  rebuilt {len(self.definitions)} indexes in {time.perf_counter() - started:.1f}s")
+        return False
+
+
+def refresh_stats(conn):
+    """Recount the admin dashboard counters, as lib/stats.reconcileStats does"""
+    with conn.cursor() as cur:
+        cur.execute('''
+            INSERT INTO "StatCounter" ("key", "value", "updatedAt")
+            SELECT k, v, NOW() FROM (VALUES
+                ('totalFarmers', (SELECT COUNT(*) FROM "User" WHERE role = 'farmer' AND approved)::int),
+                ('totalBuyers', (SELECT COUNT(*) FROM "User" WHERE role = 'buyer')::int),
+                ('totalProducts', (SELECT COUNT(*) FROM "Product")::int),
+                ('totalOrders', ((SELECT COUNT(*) FROM "Order") + (SELECT COUNT(*) FROM "OrderArchive"))::int),
+                ('pendingApprovals', (SELECT COUNT(*) FROM "User" WHERE role = 'farmer' AND NOT approved)::int)
+            ) AS d(k, v)
+            ON CONFLICT ("key") DO UPDATE SET "value" = EXCLUDED."value", "updatedAt" = NOW()
+        ''')
+        cur.execute('DELETE FROM "DailyOrderStat"')
+        cur.execute('''
+            INSERT INTO "DailyOrderStat" ("day", "orders", "gmv", "updatedAt")
+            SELECT "createdAt"::date, COUNT(*)::int, COALESCE(SUM("totalAmount"), 0), NOW()
+            FROM (
+                SELECT "createdAt", "totalAmount" FROM "Order"
+                UNION ALL
+                SELECT "createdAt", "totalAmount" FROM "OrderArchive"
+            ) AS o
+            GROUP BY "createdAt"::date
+        ''')
+    conn.commit()
+
+
+def clean(conn):
+    """Remove every generated user; profiles, products and orders cascade"""
+    started = time.perf_counter()
+    with conn.cursor() as cur:
+        cur.execute('DELETE FROM "User" WHERE email LIKE %s', (GEN_PREFIX + "%",))
+        deleted = cur.rowcount
+    conn.commit()
+    refresh_stats(conn)
+    print(f"🧹 Removed {deleted} generated users (and everything they owned) in {time.perf_counter() - started:.1f}s")
+
+
+def generate(conn, args):
+    gen = Generator(args, shared_password(conn))
+    user_columns = ["id", "email", "password", "name", "role", "approved", "createdAt", "updatedAt"]
+    started = time.perf_counter()
+    total = 0
+
+    print(f"🌾 Generating (seed {args.seed}, {args.layout} layout)")
+    with DeferredIndexes(conn) if args.defer_indexes else nullcontext():
+        total += copy_rows(conn, "User", user_columns, gen.farmer_users())
+        total += copy_rows(conn, "FarmerProfile",
+                           ["id", "userId", "phone", "latitude", "longitude", "createdAt", "updatedAt"],
+                           gen.farmer_profiles())
+        total += copy_rows(conn, "User", user_columns, gen.buyer_users())
+        total += copy_rows(conn, "BuyerProfile",
+                           ["id", "userId", "phone", "address", "city", "pincode", "latitude", "longitude",
+                            "createdAt", "updatedAt"],
+                           gen.buyer_profiles())
+        total += copy_rows(conn, "Product",
+                           ["id", "farmerId", "name", "category", "price", "quantity", "createdAt", "updatedAt"],
+                           gen.products())
+        if args.orders and args.buyers and len(gen.product_price):
+            # Monthly partitions for the whole history, so no order lands in the default partition
+            with conn.cursor() as cur:
+                cur.execute("SELECT ensure_order_partitions(%s, %s)",
+                            (timestamp(gen.now - args.days * 86400), timestamp(gen.now)))
+            conn.commit()
+            total += copy_rows(conn, "Order",
+                               ["id", "buyerId", "paymentMode", "paymentStatus", "orderStatus", "razorpayOrderId",
+                                "razorpayPaymentId", "totalAmount", "createdAt", "updatedAt"],
+                               gen.order_rows())
+            total += copy_rows(conn, "OrderItem",
+                               ["id", "orderId", "productId", "quantity", "price", "farmerId", "createdAt"],
+                               gen.item_rows())
+
+    refresh_stats(conn)
+    with conn.cursor() as cur:
+        cur.execute("ANALYZE")
+    conn.commit()
+    elapsed = time.perf_counter() - started
+    print(f"\n📊 {total:,} rows in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/s)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stream a large synthetic marketplace dataset into PostgreSQL with COPY")
+    parser.add_argument("--seed", type=int, default=42, help="random seed; the same seed gives the same rows and ids")
+    parser.add_argument("--farmers", type=int, default=10000, help="farmers (cities layout)")
+    parser.add_argument("--layout", choices=["cities", "grid"], default="cities",
+                        help="farmers clustered around cities, or one per cell of a grid over Maharashtra")
+    parser.add_argument("--grid-km", type=float, default=5.0, help="grid cell size for --layout grid")
+    parser.add_argument("--spread-km", type=float, default=40.0, help="std-dev of the scatter around a city centre")
+    parser.add_argument("--approved-share", type=float, default=0.95, help="share of farmers already approved")
+    parser.add_argument("--buyers", type=int, default=100000, help="buyers")
+    parser.add_argument("--products-per-farmer", type=int, default=10, help="mean products per farmer")
+    parser.add_argument("--sold-out-share", type=float, default=0.1, help="share of products with zero stock")
+    parser.add_argument("--orders", type=int, default=1000000, help="orders (each with 1..--max-items items)")
+    parser.add_argument("--max-items", type=int, default=4, help="most items in one order")
+    parser.add_argument("--days", type=float, default=365.0, help="order history length in days")
+    parser.add_argument("--recency", type=float, default=1.5, help="above 1 puts more orders in recent days")
+    parser.add_argument("--buyer-skew", type=float, default=2.0, help="above 1 concentrates orders on fewer buyers")
+    parser.add_argument("--product-skew", type=float, default=1.5, help="above 1 makes some products best sellers")
+    parser.add_argument("--cod-share", type=float, default=0.4, help="share of cash-on-delivery orders")
+    parser.add_argument("--now", help="ISO timestamp treated as now (default: current time)")
+    parser.add_argument("--defer-indexes", action="store_true", help="drop secondary indexes during the load, rebuild after")
+    parser.add_argument("--clean", action="store_true", help="remove previously generated rows and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not 1 <= args.max_items <= MAX_ITEMS_LIMIT:
+        print(f"❌ --max-items must be 1-{MAX_ITEMS_LIMIT}")
+        return 1
+    conn = perf_bench.connect()
+    try:
+        if args.clean:
+            clean(conn)
+            return 0
+        if existing_rows(conn):
+            print("❌ Generated rows already exist; run with --clean first (ids are deterministic per seed)")
+            return 1
+        generate(conn, args)
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
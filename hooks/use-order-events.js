@@ -0,0 +1,20 @@
+"use client";
+import * as React from "react"
+
+const EVENT_TYPES = ["order.created", "order.status", "reset"]
+
+// Subscribes to the order event stream (/api/orders/stream) while mounted.
+// EventSource reconnects by itself and resumes from the last event id it saw.
+export function useOrderEvents(token, onEvent) {
+  const handler = React.useRef(onEvent)
+  handler.current = onEvent
+
+  React.useEffect(() => {
+    if (!token || typeof EventSource === "undefined") return
+
+    const source = new EventSource(`/api/orders/stream?token=${encodeURIComponent(token)}`)
+    const listener = (event) => handler.current(event.type, JSON.parse(event.data))
+    EVENT_TYPES.forEach((type) => source.addEventListener(type, listener))
+    return () => source.close();
+  }, [token])
+}
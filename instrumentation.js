@@ -0,0 +1,11 @@
+// Next.js calls register() once when a server instance starts. Background jobs
+// start here so they run whether or not any request comes in.
+export async function register() {
+  if (process.env.NEXT_RUNTIME !== 'nodejs') return;
+
+  const { startOrderMaintenance } = await import('@/lib/order-archive');
+  startOrderMaintenance();
+
+  const { startReconciler } = await import('@/lib/stats');
+  startReconciler();
+}
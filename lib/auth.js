@@ -1,14 +1,46 @@
 import jwt from 'jsonwebtoken';
-import bcrypt from 'bcryptjs';
+import crypto from 'crypto';
+import prisma from '@/lib/prisma';
+import { hashInPool, compareInPool } from '@/lib/password-pool';
+import { LRUCache } from '@/lib/lru';
 
 const JWT_SECRET = process.env.JWT_SECRET || 'your-super-secret-jwt-key';
 
+// Verified token claims are cached (keyed by a hash of the token) so repeated
+// dashboard calls skip jwt.verify; entries never outlive the token's own expiry.
+// User rows for /auth/me are cached briefly and evicted on approval/deletion.
+const TOKEN_CACHE_SIZE = parseInt(process.env.AUTH_TOKEN_CACHE_SIZE || '10000', 10);
+const TOKEN_CACHE_TTL_MS = parseInt(process.env.AUTH_TOKEN_CACHE_TTL_MS || '300000', 10);
+const USER_CACHE_SIZE = parseInt(process.env.AUTH_USER_CACHE_SIZE || '5000', 10);
+const USER_CACHE_TTL_MS = parseInt(process.env.AUTH_USER_CACHE_TTL_MS || '30000', 10);
+
+const globalForAuth = global;
+
+// Keep tokensByUser no larger than the token cache: forget a token's key
+// once the LRU drops it or finds it expired
+function forgetToken(key, claims) {
+  const keys = authCache.tokensByUser.get(claims.userId);
+  if (!keys) return;
+  keys.delete(key);
+  if (keys.size === 0) authCache.tokensByUser.delete(claims.userId);
+}
+
+const authCache = globalForAuth.authCache || {
+  tokens: new LRUCache(TOKEN_CACHE_SIZE, forgetToken),
+  users: new LRUCache(USER_CACHE_SIZE),
+  tokensByUser: new Map(),
+  stats: { tokenHits: 0, tokenMisses: 0, userHits: 0, userMisses: 0, evictions: 0 },
+};
+
+if (process.env.NODE_ENV !== 'production') globalForAuth.authCache = authCache;
+
+// bcrypt runs on the worker pool in lib/password-pool.js, off the event loop
 export function hashPassword(password) {
-  return bcrypt.hashSync(password, 10);
+  return hashInPool(password, 10);
 }
 
 export function comparePassword(password, hashedPassword) {
-  return bcrypt.compareSync(password, hashedPassword);
+  return compareInPool(password, hashedPassword);
 }
 
 export function generateToken(user) {
@@ -34,5 +66,78 @@ export function getAuthUser(request) {
   }
   
   const token = authHeader.substring(7);
-  return verifyToken(token);
+  const key = crypto.createHash('sha256').update(token).digest('base64url');
+
+  const cached = authCache.tokens.get(key);
+  if (cached) {
+    authCache.stats.tokenHits++;
+    return cached;
+  }
+
+  authCache.stats.tokenMisses++;
+  const claims = verifyToken(token);
+  if (claims) {
+    const expiresAt = Math.min(claims.exp * 1000, Date.now() + TOKEN_CACHE_TTL_MS);
+    authCache.tokens.set(key, claims, expiresAt);
+
+    let keys = authCache.tokensByUser.get(claims.userId);
+    if (!keys) {
+      keys = new Set();
+      authCache.tokensByUser.set(claims.userId, keys);
+    }
+    keys.add(key);
+  }
+  return claims;
+}
+
+// User row with profiles, cached for a short time
+export async function getCachedUser(userId) {
+  const cached = authCache.users.get(userId);
+  if (cached) {
+    authCache.stats.userHits++;
+    return cached;
+  }
+
+  authCache.stats.userMisses++;
+  const user = await prisma.user.findUnique({
+    where: { id: userId },
+    include: {
+      buyerProfile: true,
+      farmerProfile: true,
+    },
+  });
+  if (user) {
+    authCache.users.set(userId, user, Date.now() + USER_CACHE_TTL_MS);
+  }
+  return user;
+}
+
+// Drop everything cached for a user (approval change, profile change, deletion)
+export function evictAuthUser(userId) {
+  authCache.users.delete(userId);
+
+  const keys = authCache.tokensByUser.get(userId);
+  if (keys) {
+    for (const key of keys) authCache.tokens.delete(key);
+    authCache.tokensByUser.delete(userId);
+  }
+  authCache.stats.evictions++;
+}
+
+export function clearAuthCache() {
+  authCache.tokens.clear();
+  authCache.users.clear();
+  authCache.tokensByUser.clear();
+}
+
+export function getAuthCacheStats() {
+  const { tokenHits, tokenMisses, userHits, userMisses } = authCache.stats;
+  return {
+    ...authCache.stats,
+    tokenHitRate: tokenHits + tokenMisses ? tokenHits / (tokenHits + tokenMisses) : 0,
+    userHitRate: userHits + userMisses ? userHits / (userHits + userMisses) : 0,
+    tokens: authCache.tokens.size,
+    users: authCache.users.size,
+    indexedUsers: authCache.tokensByUser.size,
+  };
 }
\ No newline at end of file
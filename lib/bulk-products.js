@@ -0,0 +1,146 @@
+// Parsing and validation for POST /api/products/bulk. Bodies are either CSV
+// (text/csv, header row first) or JSON (an array, or { rows: [...] }). Every
+// row is checked up front so the handler can write them in one statement and
+// report per-row results in input order.
+export const MAX_BULK_ROWS = parseInt(process.env.BULK_MAX_ROWS || '10000', 10);
+
+export const BULK_MODES = ['create', 'stock'];
+
+// Bad upload body as a whole (not a single row), reported as a 400
+export class BulkInputError extends Error {}
+
+// RFC 4180 style: quoted fields may contain commas, newlines and "" escapes
+export function parseCsv(text) {
+  const records = [];
+  let record = [];
+  let field = '';
+  let quoted = false;
+
+  for (let i = 0; i < text.length; i++) {
+    const ch = text[i];
+    if (quoted) {
+      if (ch === '"' && text[i + 1] === '"') {
+        field += '"';
+        i++;
+      } else if (ch === '"') {
+        quoted = false;
+      } else {
+        field += ch;
+      }
+    } else if (ch === '"') {
+      quoted = true;
+    } else if (ch === ',') {
+      record.push(field);
+      field = '';
+    } else if (ch === '\n' || ch === '\r') {
+      if (ch === '\r' && text[i + 1] === '\n') i++;
+      record.push(field);
+      records.push(record);
+      record = [];
+      field = '';
+    } else {
+      field += ch;
+    }
+  }
+  if (quoted) {
+    throw new BulkInputError('Unterminated quoted field in CSV');
+  }
+  if (field !== '' || record.length > 0) {
+    record.push(field);
+    records.push(record);
+  }
+
+  const nonEmpty = records.filter(r => r.length > 1 || r[0].trim() !== '');
+  if (nonEmpty.length === 0) return [];
+
+  const header = nonEmpty[0].map(h => h.trim());
+  return nonEmpty.slice(1).map(values => {
+    const row = {};
+    header.forEach((name, i) => {
+      row[name] = values[i] === undefined ? '' : values[i].trim();
+    });
+    return row;
+  });
+}
+
+// Raw rows from the request body, CSV or JSON depending on Content-Type
+export async function readBulkRows(request) {
+  const contentType = request.headers.get('content-type') || '';
+  let rows;
+
+  if (contentType.includes('text/csv')) {
+    rows = parseCsv(await request.text());
+  } else {
+    let body;
+    try {
+      body = await request.json();
+    } catch {
+      throw new BulkInputError('Body must be a JSON array or CSV');
+    }
+    rows = Array.isArray(body) ? body : body?.rows;
+  }
+
+  if (!Array.isArray(rows) || rows.length === 0) {
+    throw new BulkInputError('No rows to upload');
+  }
+  if (rows.length > MAX_BULK_ROWS) {
+    throw new BulkInputError(`Too many rows (max ${MAX_BULK_ROWS})`);
+  }
+  return rows;
+}
+
+// CSV cells arrive as strings; empty means missing
+function toNumber(value) {
+  if (value === undefined || value === null || value === '') return NaN;
+  return typeof value === 'number' ? value : Number(value);
+}
+
+// New products: same required fields as POST /api/products
+export function validateProductRows(rows) {
+  const valid = [];
+  const errors = [];
+
+  rows.forEach((row, index) => {
+    const name = typeof row?.name === 'string' ? row.name.trim() : '';
+    const category = typeof row?.category === 'string' ? row.category.trim() : '';
+    const price = toNumber(row?.price);
+    const quantity = toNumber(row?.quantity);
+
+    let error = null;
+    if (!name || !category) error = 'Missing name or category';
+    else if (!Number.isFinite(price) || price <= 0) error = 'Invalid price';
+    else if (!Number.isFinite(quantity) || quantity <= 0) error = 'Invalid quantity';
+
+    if (error) {
+      errors.push({ row: index, error });
+    } else {
+      valid.push({ index, name, category, price, quantity, image: row.image || null });
+    }
+  });
+
+  return { valid, errors };
+}
+
+// Stock deltas: { id, delta }; repeated ids are summed into one change
+export function validateStockRows(rows) {
+  const deltas = new Map();
+  const errors = [];
+
+  rows.forEach((row, index) => {
+    const id = typeof row?.id === 'string' ? row.id.trim() : '';
+    const delta = toNumber(row?.delta);
+
+    if (!id) {
+      errors.push({ row: index, error: 'Missing id' });
+    } else if (!Number.isFinite(delta) || delta === 0) {
+      errors.push({ row: index, error: 'Invalid delta' });
+    } else {
+      const entry = deltas.get(id) || { delta: 0, rows: [] };
+      entry.delta += delta;
+      entry.rows.push(index);
+      deltas.set(id, entry);
+    }
+  });
+
+  return { deltas, errors };
+}
@@ -0,0 +1,150 @@
+import crypto from 'crypto';
+import { NextResponse } from 'next/server';
+import { LRUCache } from '@/lib/lru';
+import { markWritten } from '@/lib/prisma';
+
+// Conditional GET support for the public catalog. Every product write and
+// stock movement bumps a per-category catalog version; a listing's ETag is
+// derived from the version of what it covers, so an unchanged catalog answers
+// If-None-Match with a 304 before touching the database. Serialized bodies are
+// kept in a small LRU keyed by version + normalized query, and buyer locations
+// are rounded first so nearby buyers share entries.
+//
+// Versions are per process. Tags and Last-Modified also roll over every
+// CATALOG_CACHE_TTL_MS so writes made by another instance are picked up within
+// that window.
+const CACHE_SIZE = parseInt(process.env.CATALOG_CACHE_SIZE || '500', 10);
+const TTL_MS = parseInt(process.env.CATALOG_CACHE_TTL_MS || '60000', 10);
+
+// 2 decimals is roughly 1.1 km, small next to the 10 km delivery radius
+const LOCATION_PRECISION = parseInt(process.env.CATALOG_LOCATION_PRECISION || '2', 10);
+
+const globalForCatalog = global;
+
+const catalog = globalForCatalog.catalogCache || {
+  // Changes on restart so clients never match a tag from a previous process
+  epoch: crypto.randomBytes(4).toString('hex'),
+  // Bumped by changes that can affect every listing (farmer approval/deletion)
+  generation: 0,
+  generationAt: Date.now(),
+  // Bumped by every product/stock change; covers unfiltered listings
+  all: { version: 0, modifiedAt: Date.now() },
+  categories: new Map(),
+  entries: new LRUCache(CACHE_SIZE),
+  stats: { notModified: 0, hits: 0, misses: 0, bumps: 0 },
+};
+
+if (process.env.NODE_ENV !== 'production') globalForCatalog.catalogCache = catalog;
+
+function touch(entry, now) {
+  entry.version++;
+  entry.modifiedAt = now;
+}
+
+// Record a product or stock change in the given categories.
+// With no categories, every listing is invalidated.
+export function bumpCatalog(categories) {
+  const now = Date.now();
+  catalog.stats.bumps++;
+  // The next load is cached under the new tag, so it must not read a lagging replica
+  markWritten('catalog');
+
+  if (!categories) {
+    catalog.generation++;
+    catalog.generationAt = now;
+    touch(catalog.all, now);
+    return;
+  }
+
+  touch(catalog.all, now);
+  for (const category of new Set(categories)) {
+    if (!category) continue;
+    const entry = catalog.categories.get(category);
+    if (entry) touch(entry, now);
+    else catalog.categories.set(category, { version: 1, modifiedAt: now });
+  }
+}
+
+export function roundLocation(value) {
+  return Number(parseFloat(value).toFixed(LOCATION_PRECISION));
+}
+
+function currentVersion(category) {
+  const entry = category
+    ? catalog.categories.get(category) || { version: 0, modifiedAt: catalog.all.modifiedAt }
+    : catalog.all;
+  const window = TTL_MS > 0 ? Math.floor(Date.now() / TTL_MS) : 0;
+  return {
+    tag: `${catalog.epoch}.${window}.${catalog.generation}.${entry.version}`,
+    // Never older than the window start, so If-Modified-Since rolls over with the tag
+    modifiedAt: Math.max(entry.modifiedAt, catalog.generationAt, window * TTL_MS),
+  };
+}
+
+function matchesEtag(header, etag) {
+  if (!header) return false;
+  if (header.trim() === '*') return true;
+  // Weak comparison, as required for If-None-Match
+  const bare = etag.replace(/^W\//, '');
+  return header.split(',').some(candidate => candidate.trim().replace(/^W\//, '') === bare);
+}
+
+function notModifiedSince(header, modifiedAt) {
+  if (!header) return false;
+  const since = Date.parse(header);
+  // HTTP dates have one-second resolution
+  return !Number.isNaN(since) && Math.floor(modifiedAt / 1000) * 1000 <= since;
+}
+
+// Serve a catalog listing with ETag/Last-Modified validation.
+// `key` identifies the normalized query; `load` returns { rows, headers }.
+export async function catalogResponse(request, { category, key }, load) {
+  const { tag, modifiedAt } = currentVersion(category);
+  const etag = `W/"${crypto.createHash('sha1').update(`${tag}|${key}`).digest('base64url')}"`;
+  const validators = {
+    ETag: etag,
+    'Last-Modified': new Date(modifiedAt).toUTCString(),
+    'Cache-Control': 'public, no-cache',
+  };
+
+  // If-None-Match takes precedence over If-Modified-Since when both are sent
+  const ifNoneMatch = request.headers.get('if-none-match');
+  const fresh = ifNoneMatch
+    ? matchesEtag(ifNoneMatch, etag)
+    : notModifiedSince(request.headers.get('if-modified-since'), modifiedAt);
+  if (fresh) {
+    catalog.stats.notModified++;
+    return new NextResponse(null, { status: 304, headers: validators });
+  }
+
+  const cacheKey = `${tag}|${key}`;
+  let entry = catalog.entries.get(cacheKey);
+  if (entry) {
+    catalog.stats.hits++;
+  } else {
+    catalog.stats.misses++;
+    const { rows, headers } = await load();
+    entry = { body: JSON.stringify(rows), headers };
+    catalog.entries.set(cacheKey, entry, Date.now() + TTL_MS);
+  }
+
+  return new NextResponse(entry.body, {
+    headers: { 'Content-Type': 'application/json', ...entry.headers, ...validators },
+  });
+}
+
+export function clearCatalogCache() {
+  catalog.entries.clear();
+  bumpCatalog();
+}
+
+export function getCatalogCacheStats() {
+  const { hits, misses } = catalog.stats;
+  return {
+    ...catalog.stats,
+    hitRate: hits + misses ? hits / (hits + misses) : 0,
+    entries: catalog.entries.size,
+    categories: catalog.categories.size,
+    ttlMs: TTL_MS,
+  };
+}
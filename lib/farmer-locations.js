@@ -0,0 +1,259 @@
+import prisma from '@/lib/prisma';
+import { calculateDistance, getBoundingBox } from '@/lib/gps';
+
+// In-process table of approved farmer coordinates used by the nearby-products
+// lookup. Ids live in a plain array and coordinates in packed Float64Arrays so a
+// radius scan touches contiguous memory instead of Prisma result objects.
+// Slots are bucketed by FARMER_CELL_DEG grid cell (0.1 degrees is ~11 km), and
+// a lookup only visits the cells its bounding box overlaps, so its cost follows
+// the farmers near the buyer, not the total.
+// Approval and deletion update it incrementally; the TTL is only a safety net.
+// Until the first load finishes, lookups use the indexed bounding-box query on
+// FarmerProfile(latitude, longitude) instead of waiting for every farmer.
+const TTL_MS = parseInt(process.env.FARMER_CACHE_TTL_MS || '300000', 10);
+const CELL_DEG = parseFloat(process.env.FARMER_CELL_DEG || '0.1');
+
+// Cells per row of the grid; a cell key is row * CELL_COLS + col
+const CELL_COLS = Math.ceil(360 / CELL_DEG) + 1;
+
+function cellRow(lat) {
+  return Math.floor((lat + 90) / CELL_DEG);
+}
+
+function cellCol(lon) {
+  return Math.min(Math.max(Math.floor((lon + 180) / CELL_DEG), 0), CELL_COLS - 1);
+}
+
+function createTable(capacity = 64) {
+  return {
+    ids: [],
+    slots: new Map(),
+    lats: new Float64Array(capacity),
+    lons: new Float64Array(capacity),
+    cellKeys: [],
+    cells: new Map(),
+    loadedAt: 0,
+  };
+}
+
+const globalForFarmers = global;
+
+const cache = globalForFarmers.farmerLocations || {
+  table: null,
+  loading: null,
+  generation: 0,
+  stats: { hits: 0, misses: 0, queries: 0, reloads: 0, updates: 0, invalidations: 0 },
+};
+
+if (process.env.NODE_ENV !== 'production') globalForFarmers.farmerLocations = cache;
+
+function grow(table) {
+  const capacity = table.lats.length * 2;
+  const lats = new Float64Array(capacity);
+  const lons = new Float64Array(capacity);
+  lats.set(table.lats);
+  lons.set(table.lons);
+  table.lats = lats;
+  table.lons = lons;
+}
+
+function addToCell(table, slot) {
+  const key = cellRow(table.lats[slot]) * CELL_COLS + cellCol(table.lons[slot]);
+  table.cellKeys[slot] = key;
+  const bucket = table.cells.get(key);
+  if (bucket) bucket.push(slot);
+  else table.cells.set(key, [slot]);
+}
+
+// Buckets are small, so a linear search and swap-remove is enough
+function removeFromCell(table, slot) {
+  const key = table.cellKeys[slot];
+  const bucket = table.cells.get(key);
+  const index = bucket.indexOf(slot);
+  bucket[index] = bucket[bucket.length - 1];
+  bucket.pop();
+  if (bucket.length === 0) table.cells.delete(key);
+}
+
+function setLocation(table, farmerId, latitude, longitude) {
+  let slot = table.slots.get(farmerId);
+  if (slot === undefined) {
+    if (table.ids.length === table.lats.length) grow(table);
+    slot = table.ids.length;
+    table.ids.push(farmerId);
+    table.slots.set(farmerId, slot);
+  } else {
+    removeFromCell(table, slot);
+  }
+  table.lats[slot] = latitude;
+  table.lons[slot] = longitude;
+  addToCell(table, slot);
+}
+
+async function loadTable() {
+  const profiles = await prisma.farmerProfile.findMany({
+    where: { user: { role: 'farmer', approved: true } },
+    select: { userId: true, latitude: true, longitude: true },
+  });
+
+  const table = createTable(Math.max(64, profiles.length));
+  for (const profile of profiles) {
+    setLocation(table, profile.userId, profile.latitude, profile.longitude);
+  }
+  table.loadedAt = Date.now();
+  cache.stats.reloads++;
+  return table;
+}
+
+// The table, or null while the first load is still running
+async function getTable() {
+  if (cache.table && Date.now() - cache.table.loadedAt < TTL_MS) {
+    cache.stats.hits++;
+    return cache.table;
+  }
+
+  cache.stats.misses++;
+  // Concurrent misses share a single reload
+  if (!cache.loading) {
+    const generation = cache.generation;
+    cache.loading = loadTable()
+      .then(table => {
+        // A write raced the reload, so serve this table once but reload next time
+        if (generation !== cache.generation) table.loadedAt = 0;
+        cache.table = table;
+        return table;
+      })
+      .finally(() => {
+        cache.loading = null;
+      });
+  }
+  if (!cache.table) {
+    cache.loading.catch(error => console.error('Farmer location load error:', error));
+    return null;
+  }
+  return cache.loading;
+}
+
+// Cold-start lookup: bounding box on the FarmerProfile(latitude, longitude) index
+async function queryBoundingBox(box) {
+  cache.stats.queries++;
+  const profiles = await prisma.farmerProfile.findMany({
+    where: {
+      latitude: { gte: box.minLat, lte: box.maxLat },
+      longitude: { gte: box.minLon, lte: box.maxLon },
+      user: { role: 'farmer', approved: true },
+    },
+    select: { userId: true, latitude: true, longitude: true },
+  });
+  return profiles.map(profile => [profile.userId, profile.latitude, profile.longitude]);
+}
+
+// Slots in the grid cells the box overlaps
+function* candidateSlots(table, box) {
+  const minRow = cellRow(box.minLat);
+  const maxRow = cellRow(box.maxLat);
+  const minCol = cellCol(box.minLon);
+  const maxCol = cellCol(box.maxLon);
+
+  // A huge box (near the poles) covers more cells than are occupied
+  if ((maxRow - minRow + 1) * (maxCol - minCol + 1) > table.cells.size) {
+    for (const bucket of table.cells.values()) yield* bucket;
+    return;
+  }
+
+  for (let row = minRow; row <= maxRow; row++) {
+    for (let col = minCol; col <= maxCol; col++) {
+      const bucket = table.cells.get(row * CELL_COLS + col);
+      if (bucket) yield* bucket;
+    }
+  }
+}
+
+// Approved farmers within radiusKm of the buyer, as a Map of id -> distance in km
+export async function findFarmersWithinRadius(buyerLat, buyerLon, radiusKm = 10) {
+  const box = getBoundingBox(buyerLat, buyerLon, radiusKm);
+  const table = await getTable();
+  const result = new Map();
+
+  if (!table) {
+    for (const [id, lat, lon] of await queryBoundingBox(box)) {
+      const distance = calculateDistance(buyerLat, buyerLon, lat, lon);
+      if (distance <= radiusKm) {
+        result.set(id, distance);
+      }
+    }
+    return result;
+  }
+
+  const { ids, lats, lons } = table;
+  for (const i of candidateSlots(table, box)) {
+    const lat = lats[i];
+    const lon = lons[i];
+    if (lat < box.minLat || lat > box.maxLat || lon < box.minLon || lon > box.maxLon) continue;
+    const distance = calculateDistance(buyerLat, buyerLon, lat, lon);
+    if (distance <= radiusKm) {
+      result.set(ids[i], distance);
+    }
+  }
+
+  return result;
+}
+
+// Ids of approved farmers within radiusKm of the buyer
+export async function findFarmerIdsWithinRadius(buyerLat, buyerLon, radiusKm = 10) {
+  return [...(await findFarmersWithinRadius(buyerLat, buyerLon, radiusKm)).keys()];
+}
+
+// Add or move a farmer (e.g. after approval)
+export function upsertFarmerLocation(farmerId, latitude, longitude) {
+  cache.generation++;
+  if (!cache.table) return;
+  setLocation(cache.table, farmerId, latitude, longitude);
+  cache.stats.updates++;
+}
+
+// Drop a farmer (rejected or deleted); the last slot moves into the gap
+export function removeFarmerLocation(farmerId) {
+  cache.generation++;
+  const table = cache.table;
+  if (!table) return;
+
+  const slot = table.slots.get(farmerId);
+  if (slot === undefined) return;
+
+  removeFromCell(table, slot);
+  const last = table.ids.length - 1;
+  if (slot !== last) {
+    const movedId = table.ids[last];
+    const bucket = table.cells.get(table.cellKeys[last]);
+    bucket[bucket.indexOf(last)] = slot;
+    table.ids[slot] = movedId;
+    table.lats[slot] = table.lats[last];
+    table.lons[slot] = table.lons[last];
+    table.cellKeys[slot] = table.cellKeys[last];
+    table.slots.set(movedId, slot);
+  }
+  table.ids.pop();
+  table.cellKeys.pop();
+  table.slots.delete(farmerId);
+  cache.stats.updates++;
+}
+
+// Force the next lookup to reload from the database
+export function invalidateFarmerLocations() {
+  cache.generation++;
+  cache.table = null;
+  cache.stats.invalidations++;
+}
+
+export function getFarmerLocationStats() {
+  const lookups = cache.stats.hits + cache.stats.misses;
+  return {
+    ...cache.stats,
+    hitRate: lookups ? cache.stats.hits / lookups : 0,
+    size: cache.table ? cache.table.ids.length : 0,
+    cells: cache.table ? cache.table.cells.size : 0,
+    ageMs: cache.table ? Date.now() - cache.table.loadedAt : null,
+    ttlMs: TTL_MS,
+  };
+}
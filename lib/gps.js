@@ -30,6 +30,22 @@ export function isInMaharashtra(lat, lon) {
   return lat >= MIN_LAT && lat <= MAX_LAT && lon >= MIN_LON && lon <= MAX_LON;
 }
 
+// Bounding box that contains every point within radiusKm of (lat, lon).
+// Cheap to test in SQL against the FarmerProfile(latitude, longitude) index,
+// so only nearby candidates need the exact haversine check.
+export function getBoundingBox(lat, lon, radiusKm) {
+  const R = 6371; // Radius of Earth in kilometers
+  const latDelta = (radiusKm / R) * (180 / Math.PI);
+  const lonDelta = latDelta / Math.max(Math.cos(toRad(lat)), 0.01);
+
+  return {
+    minLat: lat - latDelta,
+    maxLat: lat + latDelta,
+    minLon: lon - lonDelta,
+    maxLon: lon + lonDelta,
+  };
+}
+
 // Filter farmers within radius
 export function filterFarmersWithinRadius(farmers, buyerLat, buyerLon, radiusKm = 10) {
   return farmers.filter(farmer => {
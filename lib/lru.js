@@ -0,0 +1,47 @@
+// Small LRU map with per-entry expiry. A Map keeps insertion order, so the
+// first key is always the least recently used one. onEvict(key, value) is
+// called when an entry is dropped for size or found expired, so callers can
+// keep secondary indexes in step (explicit delete/clear do not call it).
+export class LRUCache {
+  constructor(maxSize, onEvict = null) {
+    this.maxSize = maxSize;
+    this.onEvict = onEvict;
+    this.entries = new Map();
+  }
+
+  get(key) {
+    const entry = this.entries.get(key);
+    if (!entry) return undefined;
+
+    this.entries.delete(key);
+    if (entry.expiresAt <= Date.now()) {
+      this.onEvict?.(key, entry.value);
+      return undefined;
+    }
+
+    this.entries.set(key, entry);
+    return entry.value;
+  }
+
+  set(key, value, expiresAt) {
+    this.entries.delete(key);
+    this.entries.set(key, { value, expiresAt });
+    if (this.entries.size > this.maxSize) {
+      const [oldestKey, oldest] = this.entries.entries().next().value;
+      this.entries.delete(oldestKey);
+      this.onEvict?.(oldestKey, oldest.value);
+    }
+  }
+
+  delete(key) {
+    return this.entries.delete(key);
+  }
+
+  clear() {
+    this.entries.clear();
+  }
+
+  get size() {
+    return this.entries.size;
+  }
+}
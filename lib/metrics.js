@@ -0,0 +1,177 @@
+import { AsyncLocalStorage } from 'node:async_hooks';
+
+// Per-route request metrics for the catch-all API handler: request and error
+// counts, a latency histogram and the number of Prisma queries each request
+// issued. The active route is tracked with AsyncLocalStorage so the Prisma
+// query hook (lib/prisma.js) can attribute queries to it.
+const BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000];
+
+// Unknown paths past this many series are folded into "<METHOD> other"
+const MAX_ROUTES = 200;
+
+const globalForMetrics = global;
+
+const registry = globalForMetrics.apiMetrics || {
+  startedAt: Date.now(),
+  routes: new Map(),
+  gauges: new Map(),
+};
+
+if (process.env.NODE_ENV !== 'production') globalForMetrics.apiMetrics = registry;
+
+const requestContext = new AsyncLocalStorage();
+
+// Collapse ids so /products/<uuid> and /products/<other uuid> share a series
+const ID_SEGMENT = /^(?:[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|c[a-z0-9]{20,}|\d+)$/i;
+
+export function routeLabel(method, path) {
+  const normalized = path
+    .split('/')
+    .filter(Boolean)
+    .map(segment => (ID_SEGMENT.test(segment) ? ':id' : segment))
+    .join('/');
+  return `${method} ${normalized || '/'}`;
+}
+
+function getRoute(label) {
+  let route = registry.routes.get(label);
+  const overflow = `${label.split(' ')[0]} other`;
+  if (!route && label !== overflow && registry.routes.size >= MAX_ROUTES) {
+    return getRoute(overflow);
+  }
+  if (!route) {
+    route = {
+      count: 0,
+      errors: 0,
+      clientErrors: 0,
+      totalMs: 0,
+      dbQueries: 0,
+      dbMs: 0,
+      buckets: new Array(BUCKETS_MS.length + 1).fill(0),
+    };
+    registry.routes.set(label, route);
+  }
+  return route;
+}
+
+function observe(route, elapsedMs) {
+  route.totalMs += elapsedMs;
+  let i = 0;
+  while (i < BUCKETS_MS.length && elapsedMs > BUCKETS_MS[i]) i++;
+  route.buckets[i]++;
+}
+
+// Wrap a route dispatcher (GET/POST/...) so every request is timed and counted
+export function instrument(method, dispatch) {
+  return async (request, context) => {
+    const path = context?.params?.path ? context.params.path.join('/') : '';
+    const label = routeLabel(method, path);
+    const scope = { label, dbQueries: 0, dbMs: 0 };
+    const started = performance.now();
+
+    let status = 500;
+    try {
+      const response = await requestContext.run(scope, () => dispatch(request, context));
+      status = response.status;
+      return response;
+    } finally {
+      const route = getRoute(label);
+      route.count++;
+      if (status >= 500) route.errors++;
+      else if (status >= 400) route.clientErrors++;
+      route.dbQueries += scope.dbQueries;
+      route.dbMs += scope.dbMs;
+      observe(route, performance.now() - started);
+    }
+  };
+}
+
+// Called by the Prisma query hook for every query
+export function recordDbQuery(elapsedMs) {
+  const scope = requestContext.getStore();
+  if (!scope) return;
+  scope.dbQueries++;
+  scope.dbMs += elapsedMs;
+}
+
+// Register a callback whose numeric fields are exported as gauges (e.g. cache stats)
+export function registerGauges(name, collect) {
+  registry.gauges.set(name, collect);
+}
+
+export function getMetricsSnapshot() {
+  const routes = {};
+  for (const [label, route] of registry.routes) {
+    routes[label] = { ...route, buckets: [...route.buckets] };
+  }
+
+  const gauges = {};
+  for (const [name, collect] of registry.gauges) {
+    gauges[name] = collect();
+  }
+
+  return {
+    uptimeSeconds: (Date.now() - registry.startedAt) / 1000,
+    bucketsMs: BUCKETS_MS,
+    routes,
+    gauges,
+  };
+}
+
+function escapeLabel(value) {
+  return String(value).replace(/\\/g, '\\\\').replace(/"/g, '\\"');
+}
+
+// Prometheus text exposition format (each metric family is one contiguous group)
+export function renderPrometheus(snapshot = getMetricsSnapshot()) {
+  const routes = Object.entries(snapshot.routes).map(([label, route]) => {
+    const [method, path] = label.split(' ');
+    return { tags: `method="${method}",route="${escapeLabel(path)}"`, route };
+  });
+  const lines = [];
+
+  lines.push('# TYPE api_requests_total counter');
+  for (const { tags, route } of routes) {
+    lines.push(`api_requests_total{${tags}} ${route.count}`);
+  }
+
+  lines.push('# TYPE api_request_errors_total counter');
+  for (const { tags, route } of routes) {
+    lines.push(`api_request_errors_total{${tags},class="5xx"} ${route.errors}`);
+    lines.push(`api_request_errors_total{${tags},class="4xx"} ${route.clientErrors}`);
+  }
+
+  lines.push('# TYPE api_request_duration_ms histogram');
+  for (const { tags, route } of routes) {
+    let cumulative = 0;
+    snapshot.bucketsMs.forEach((bound, i) => {
+      cumulative += route.buckets[i];
+      lines.push(`api_request_duration_ms_bucket{${tags},le="${bound}"} ${cumulative}`);
+    });
+    lines.push(`api_request_duration_ms_bucket{${tags},le="+Inf"} ${route.count}`);
+    lines.push(`api_request_duration_ms_sum{${tags}} ${route.totalMs.toFixed(3)}`);
+    lines.push(`api_request_duration_ms_count{${tags}} ${route.count}`);
+  }
+
+  lines.push('# TYPE api_db_queries_total counter');
+  for (const { tags, route } of routes) {
+    lines.push(`api_db_queries_total{${tags}} ${route.dbQueries}`);
+  }
+
+  lines.push('# TYPE api_db_duration_ms_total counter');
+  for (const { tags, route } of routes) {
+    lines.push(`api_db_duration_ms_total{${tags}} ${route.dbMs.toFixed(3)}`);
+  }
+
+  lines.push('# TYPE api_gauge gauge');
+  for (const [name, values] of Object.entries(snapshot.gauges)) {
+    for (const [key, value] of Object.entries(values)) {
+      if (typeof value !== 'number') continue;
+      lines.push(`api_gauge{source="${escapeLabel(name)}",name="${escapeLabel(key)}"} ${value}`);
+    }
+  }
+
+  lines.push('# TYPE api_uptime_seconds gauge');
+  lines.push(`api_uptime_seconds ${snapshot.uptimeSeconds.toFixed(0)}`);
+  return lines.join('\n') + '\n';
+}
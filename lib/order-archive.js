@@ -0,0 +1,277 @@
+import { NextResponse } from 'next/server';
+import prisma from '@/lib/prisma';
+import { KEYSET_ORDER, QueryParamError, withCursor, pageTake, pagePayload } from '@/lib/pagination';
+
+// Time-partitioned order storage. "Order" and "OrderItem" are range
+// partitioned by month of createdAt (20261017150000_order_partitions).
+//
+// Listings: buyer and farmer order lists cover the last ORDER_RECENT_MONTHS
+// calendar months by default, so Postgres only visits those partitions however
+// long the history grows; the window start is sent in X-Orders-Since.
+// ?history=1 reads every partition plus the archive, merged in keyset order.
+//
+// Maintenance, at startup (instrumentation.js) and then every
+// ORDER_MAINTENANCE_INTERVAL_MS: create the monthly
+// partitions ORDER_PARTITIONS_AHEAD months ahead, move fulfilled orders
+// created more than ORDER_ARCHIVE_AFTER_DAYS ago into "OrderArchive"/
+// "OrderItemArchive" (ORDER_ARCHIVE_BATCH per statement, rows claimed with
+// SKIP LOCKED so instances can overlap), then drop old monthly partitions
+// archiving left empty. Fulfilled means the farmer marked the order delivered
+// and it is settled: paid, or cash on delivery.
+const RECENT_MONTHS = parseInt(process.env.ORDER_RECENT_MONTHS || '3', 10);
+const ARCHIVE_AFTER_DAYS = parseInt(process.env.ORDER_ARCHIVE_AFTER_DAYS || '180', 10);
+const ARCHIVE_BATCH = parseInt(process.env.ORDER_ARCHIVE_BATCH || '1000', 10);
+const MAINTENANCE_INTERVAL_MS = parseInt(process.env.ORDER_MAINTENANCE_INTERVAL_MS || '3600000', 10);
+const PARTITIONS_AHEAD = parseInt(process.env.ORDER_PARTITIONS_AHEAD || '3', 10);
+
+const PARTITION_NAME = /^(Order|OrderItem)_p(\d{4})_(\d{2})$/;
+
+const globalForOrderArchive = global;
+
+const state = globalForOrderArchive.orderArchive || {
+  timer: null,
+  running: null,
+  stats: {
+    runs: 0,
+    errors: 0,
+    archivedOrders: 0,
+    archivedItems: 0,
+    partitionsCreated: 0,
+    partitionsDropped: 0,
+    lastRunMs: 0,
+  },
+};
+
+if (process.env.NODE_ENV !== 'production') globalForOrderArchive.orderArchive = state;
+
+// ============ LISTINGS ============
+
+// Start (UTC) of the oldest month default listings include, or null when the window is off
+export function recentOrdersSince(now = new Date()) {
+  if (RECENT_MONTHS <= 0) return null;
+  return new Date(Date.UTC(now.getUTCFullYear(), now.getUTCMonth() - (RECENT_MONTHS - 1), 1));
+}
+
+// { history, since } from ?history=; history mode has no lower bound
+export function parseOrderWindow(searchParams) {
+  const value = searchParams.get('history');
+  if (value === null || value === '0' || value === 'false') {
+    return { history: false, since: recentOrdersSince() };
+  }
+  if (value === '1' || value === 'true') {
+    return { history: true, since: null };
+  }
+  throw new QueryParamError('Invalid history');
+}
+
+// Limit a where clause on Order or OrderItem to the window; createdAt is the
+// partition key, so this is what prunes old partitions
+export function inOrderWindow(where, window) {
+  return window.since ? { ...where, createdAt: { gte: window.since } } : where;
+}
+
+function compareKeyset(a, b) {
+  return b.createdAt - a.createdAt || (a.id < b.id ? 1 : a.id > b.id ? -1 : 0);
+}
+
+// Orders matching `where`, newest first. `query` holds the select or include;
+// archived orders have the same fields and relation names plus archivedAt.
+export async function findOrders(client, where, page, query, window) {
+  const args = {
+    where: withCursor(where, page),
+    ...query,
+    orderBy: KEYSET_ORDER,
+    ...pageTake(page),
+  };
+  if (!window.history) return client.order.findMany(args);
+
+  // Each side returns its own first page; the merged page is the newest of both
+  const [recent, archived] = await Promise.all([
+    client.order.findMany(args),
+    client.orderArchive.findMany(args),
+  ]);
+  const rows = recent.concat(archived).sort(compareKeyset);
+  return page ? rows.slice(0, page.limit + 1) : rows;
+}
+
+// JSON array with X-Next-Cursor, plus X-Orders-Since when the window applied
+export function orderListResponse(rows, page, window) {
+  const payload = pagePayload(rows, page);
+  const headers = { ...payload.headers };
+  if (window.since) headers['X-Orders-Since'] = window.since.toISOString();
+  return NextResponse.json(payload.rows, { headers });
+}
+
+// ============ MAINTENANCE ============
+
+// Monthly partitions from the current window through PARTITIONS_AHEAD months ahead
+async function ensurePartitions(now) {
+  const from = recentOrdersSince(now) ?? new Date(Date.UTC(now.getUTCFullYear(), now.getUTCMonth(), 1));
+  const until = new Date(Date.UTC(now.getUTCFullYear(), now.getUTCMonth() + PARTITIONS_AHEAD, 1));
+  const [{ created }] = await prisma.$queryRaw`
+    SELECT ensure_order_partitions(${from}::timestamp, ${until}::timestamp) AS "created"
+  `;
+  return created;
+}
+
+// Move one batch of old fulfilled orders and their items to the archive tables.
+// Deleting the order cascades to its items, payment outbox row and idempotency key.
+async function archiveBatch(before) {
+  const [moved] = await prisma.$queryRaw`
+    WITH picked AS (
+      SELECT "id", "createdAt" FROM "Order"
+      WHERE "createdAt" < ${before}::timestamp
+        AND "orderStatus" = 'delivered'
+        AND ("paymentMode" = 'cod' OR "paymentStatus" = 'paid')
+      LIMIT ${ARCHIVE_BATCH}
+      FOR UPDATE SKIP LOCKED
+    ),
+    removed AS (
+      DELETE FROM "Order" o
+      USING picked p
+      WHERE o."id" = p."id" AND o."createdAt" = p."createdAt"
+      RETURNING o.*
+    ),
+    orders AS (
+      INSERT INTO "OrderArchive" ("id", "buyerId", "paymentMode", "paymentStatus", "orderStatus",
+                                  "razorpayOrderId", "razorpayPaymentId", "idempotencyKey",
+                                  "totalAmount", "createdAt", "updatedAt", "archivedAt")
+      SELECT "id", "buyerId", "paymentMode", "paymentStatus", "orderStatus",
+             "razorpayOrderId", "razorpayPaymentId", "idempotencyKey",
+             "totalAmount", "createdAt", "updatedAt", NOW()
+      FROM removed
+      RETURNING 1
+    ),
+    items AS (
+      INSERT INTO "OrderItemArchive" ("id", "orderId", "productId", "quantity", "price", "farmerId", "createdAt")
+      SELECT oi."id", oi."orderId", oi."productId", oi."quantity", oi."price", oi."farmerId", oi."createdAt"
+      FROM "OrderItem" oi
+      JOIN removed r ON oi."orderId" = r."id" AND oi."createdAt" = r."createdAt"
+      RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM orders)::int AS "orders", (SELECT COUNT(*) FROM items)::int AS "items"
+  `;
+  return moved;
+}
+
+// Detach and drop monthly partitions that ended before `before` and hold no rows
+async function dropEmptyPartitions(before) {
+  const partitions = await prisma.$queryRaw`
+    SELECT c.relname AS "name"
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent IN ('"Order"'::regclass, '"OrderItem"'::regclass)
+  `;
+
+  // Month suffix (p2026_01) -> partitioned tables that have it
+  const months = new Map();
+  for (const { name } of partitions) {
+    const match = PARTITION_NAME.exec(name);
+    if (!match) continue;
+    const [, parent, year, month] = match;
+    // Month numbers are 1-based, so this is the first day of the next month
+    if (Date.UTC(Number(year), Number(month), 1) > before.getTime()) continue;
+    const suffix = `p${year}_${month}`;
+    if (!months.has(suffix)) months.set(suffix, new Set());
+    months.get(suffix).add(parent);
+  }
+
+  let dropped = 0;
+  for (const [suffix, present] of months) {
+    // Items first: their partition references the order partition
+    const parents = ['OrderItem', 'Order'].filter(parent => present.has(parent));
+    const tables = parents.map(parent => `${parent}_${suffix}`);
+    const [{ empty }] = await prisma.$queryRawUnsafe(
+      `SELECT ${tables.map(table => `NOT EXISTS (SELECT 1 FROM "${table}")`).join(' AND ')} AS "empty"`
+    );
+    if (!empty) continue;
+
+    try {
+      await prisma.$transaction(async (tx) => {
+        // Detaching locks the parent; give up rather than queue behind long reads
+        await tx.$executeRawUnsafe(`SET LOCAL lock_timeout = '2s'`);
+        for (const parent of parents) {
+          const table = `${parent}_${suffix}`;
+          await tx.$executeRawUnsafe(`ALTER TABLE "${parent}" DETACH PARTITION "${table}"`);
+          // A loader may have written into the month since the check above
+          const [{ stillEmpty }] = await tx.$queryRawUnsafe(
+            `SELECT NOT EXISTS (SELECT 1 FROM "${table}") AS "stillEmpty"`
+          );
+          if (!stillEmpty) throw new Error(`${table} is no longer empty`);
+          await tx.$executeRawUnsafe(`DROP TABLE "${table}"`);
+        }
+      }, { timeout: 30000 });
+      dropped += parents.length;
+    } catch (error) {
+      console.error(`Order partition drop error (${suffix}):`, error);
+    }
+  }
+  return dropped;
+}
+
+// One maintenance pass; concurrent calls share it. `archiveBefore` replaces
+// the ORDER_ARCHIVE_AFTER_DAYS cutoff for this pass.
+export async function runOrderMaintenance({ archiveBefore } = {}) {
+  if (state.running) {
+    if (!archiveBefore) return state.running;
+    // A pass with its own cutoff runs after the current one instead of sharing it
+    await state.running.catch(() => {});
+    return runOrderMaintenance({ archiveBefore });
+  }
+
+  state.running = (async () => {
+    const started = Date.now();
+    const now = new Date(started);
+    const result = { partitionsCreated: 0, archivedOrders: 0, archivedItems: 0, partitionsDropped: 0 };
+
+    try {
+      result.partitionsCreated = await ensurePartitions(now);
+
+      const before = archiveBefore
+        ?? (ARCHIVE_AFTER_DAYS > 0 ? new Date(started - ARCHIVE_AFTER_DAYS * 24 * 60 * 60 * 1000) : null);
+      if (before) {
+        for (;;) {
+          const { orders, items } = await archiveBatch(before);
+          result.archivedOrders += orders;
+          result.archivedItems += items;
+          if (orders < ARCHIVE_BATCH) break;
+        }
+        // Never drop the months ensurePartitions keeps, even with a recent cutoff
+        const keepFrom = recentOrdersSince(now) ?? new Date(Date.UTC(now.getUTCFullYear(), now.getUTCMonth(), 1));
+        result.partitionsDropped = await dropEmptyPartitions(before < keepFrom ? before : keepFrom);
+      }
+    } catch (error) {
+      state.stats.errors++;
+      throw error;
+    } finally {
+      state.stats.runs++;
+      state.stats.archivedOrders += result.archivedOrders;
+      state.stats.archivedItems += result.archivedItems;
+      state.stats.partitionsCreated += result.partitionsCreated;
+      state.stats.partitionsDropped += result.partitionsDropped;
+      state.stats.lastRunMs = Date.now() - started;
+    }
+    return result;
+  })().finally(() => {
+    state.running = null;
+  });
+
+  return state.running;
+}
+
+// Run once now, then on the interval; called from register() in instrumentation.js
+export function startOrderMaintenance() {
+  if (state.timer || MAINTENANCE_INTERVAL_MS <= 0) return;
+  runOrderMaintenance().catch(error => console.error('Order maintenance error:', error));
+  state.timer = setInterval(() => {
+    runOrderMaintenance().catch(error => console.error('Order maintenance error:', error));
+  }, MAINTENANCE_INTERVAL_MS);
+  state.timer.unref?.();
+}
+
+export function getOrderArchiveStats() {
+  return {
+    ...state.stats,
+    running: state.running ? 1 : 0,
+  };
+}
@@ -0,0 +1,277 @@
+import prisma from '@/lib/prisma';
+
+// Order events pushed to buyers and farmers over server-sent events.
+//
+// Write paths append an OrderEvent row inside their transaction and publish it
+// to this process's subscribers after commit. The row id is the SSE event id:
+// a reconnecting client sends Last-Event-ID and gets what it missed replayed
+// from the table, and GET /orders/events?after= serves the same deltas as JSON.
+// Subscribers are indexed by user and share one heartbeat timer, so an idle
+// connection costs a small object plus its socket. When there are subscribers,
+// one query per ORDER_EVENTS_POLL_MS picks up events written by other instances.
+const HEARTBEAT_MS = 25000;
+const REPLAY_LIMIT = 500;
+// Queued bytes a slow client may fall behind by before it is disconnected
+const MAX_BUFFERED_BYTES = 256 * 1024;
+const POLL_MS = parseInt(process.env.ORDER_EVENTS_POLL_MS || '1000', 10);
+// Re-read this far back on every poll so rows that commit out of id order are not missed
+const POLL_OVERLAP_MS = 5000;
+const RETENTION_DAYS = parseInt(process.env.ORDER_EVENTS_RETENTION_DAYS || '7', 10);
+const PRUNE_INTERVAL_MS = 3600000;
+
+const encoder = new TextEncoder();
+
+const globalForEvents = global;
+
+const hub = globalForEvents.orderEvents || {
+  byUser: new Map(),
+  connections: 0,
+  heartbeat: null,
+  poller: null,
+  polling: false,
+  cursor: null,
+  delivered: new Map(),
+  prunedAt: 0,
+  stats: { peakConnections: 0, published: 0, delivered: 0, replayed: 0, dropped: 0, resets: 0 },
+};
+
+if (process.env.NODE_ENV !== 'production') globalForEvents.orderEvents = hub;
+
+// ============ WRITING ============
+
+// Append an event inside the caller's transaction; publish the result after commit
+export function recordOrderEvent(tx, type, order, farmerIds) {
+  return tx.orderEvent.create({
+    data: {
+      type,
+      orderId: order.id,
+      buyerId: order.buyerId,
+      farmerIds: [...new Set(farmerIds)],
+      orderStatus: order.orderStatus,
+      paymentStatus: order.paymentStatus,
+    },
+  });
+}
+
+function toMessage(event) {
+  const data = {
+    id: event.id,
+    type: event.type,
+    orderId: event.orderId,
+    orderStatus: event.orderStatus,
+    paymentStatus: event.paymentStatus,
+    createdAt: event.createdAt,
+  };
+  return `id: ${event.id}\nevent: ${event.type}\ndata: ${JSON.stringify(data)}\n\n`;
+}
+
+function removeSubscriber(sub) {
+  const subs = hub.byUser.get(sub.userId);
+  if (!subs || !subs.delete(sub)) return;
+  if (subs.size === 0) hub.byUser.delete(sub.userId);
+  hub.connections--;
+  if (hub.connections === 0) stopTimers();
+}
+
+function write(sub, chunk) {
+  try {
+    if (sub.controller.desiredSize !== null && -sub.controller.desiredSize > MAX_BUFFERED_BYTES) {
+      hub.stats.dropped++;
+      sub.controller.close();
+      removeSubscriber(sub);
+      return;
+    }
+    sub.controller.enqueue(encoder.encode(chunk));
+  } catch {
+    // Stream already closed by the client
+    removeSubscriber(sub);
+  }
+}
+
+function deliver(sub, event) {
+  if (sub.replaying) {
+    sub.pending.push(event);
+    return;
+  }
+  // Live events that raced the replay; the hub itself never publishes an id twice
+  if (sub.replayed.has(event.id)) return;
+  hub.stats.delivered++;
+  write(sub, toMessage(event));
+}
+
+// Fan an event out to the buyer and farmers it concerns
+export function publishOrderEvent(event) {
+  if (hub.connections === 0 || hub.delivered.has(event.id)) return;
+  hub.delivered.set(event.id, Date.now());
+  hub.cursor = hub.cursor === null ? event.id : Math.max(hub.cursor, event.id);
+  hub.stats.published++;
+
+  for (const userId of new Set([event.buyerId, ...event.farmerIds])) {
+    const subs = hub.byUser.get(userId);
+    if (!subs) continue;
+    for (const sub of subs) deliver(sub, event);
+  }
+}
+
+// ============ READING ============
+
+function scopeFor(user) {
+  return user.role === 'farmer'
+    ? { farmerIds: { has: user.userId } }
+    : { buyerId: user.userId };
+}
+
+// Events for this user after the given id, oldest first
+export function getOrderEventsAfter(user, afterId, limit = REPLAY_LIMIT) {
+  return prisma.orderEvent.findMany({
+    where: { id: { gt: afterId }, ...scopeFor(user) },
+    orderBy: { id: 'asc' },
+    take: limit,
+  });
+}
+
+async function replay(sub, user, afterId) {
+  try {
+    const events = await getOrderEventsAfter(user, afterId, REPLAY_LIMIT + 1);
+    if (events.length > REPLAY_LIMIT) {
+      // Too far behind to stream the gap; the client reloads its lists instead
+      const latest = await prisma.orderEvent.aggregate({ _max: { id: true } });
+      hub.stats.resets++;
+      write(sub, `id: ${latest._max.id ?? afterId}\nevent: reset\ndata: {}\n\n`);
+    } else {
+      for (const event of events) {
+        sub.replayed.add(event.id);
+        hub.stats.replayed++;
+        write(sub, toMessage(event));
+      }
+    }
+  } catch (error) {
+    console.error('Order event replay error:', error);
+    write(sub, 'event: reset\ndata: {}\n\n');
+  } finally {
+    sub.replaying = false;
+    for (const event of sub.pending.splice(0)) deliver(sub, event);
+    sub.replayed.clear();
+  }
+}
+
+// SSE body for one subscriber; lastEventId (a number or null) resumes a stream
+export function openOrderStream(user, lastEventId, signal) {
+  const resume = Number.isInteger(lastEventId);
+  let sub;
+
+  const stream = new ReadableStream({
+    start(controller) {
+      sub = {
+        userId: user.userId,
+        controller,
+        replaying: resume,
+        replayed: new Set(),
+        pending: [],
+      };
+
+      if (!hub.byUser.has(user.userId)) hub.byUser.set(user.userId, new Set());
+      hub.byUser.get(user.userId).add(sub);
+      hub.connections++;
+      hub.stats.peakConnections = Math.max(hub.stats.peakConnections, hub.connections);
+      startTimers();
+
+      write(sub, 'retry: 3000\n\n');
+      if (sub.replaying) replay(sub, user, lastEventId);
+    },
+    cancel() {
+      removeSubscriber(sub);
+    },
+  }, new ByteLengthQueuingStrategy({ highWaterMark: 16 * 1024 }));
+
+  signal?.addEventListener('abort', () => {
+    if (!sub) return;
+    removeSubscriber(sub);
+    try {
+      sub.controller.close();
+    } catch {
+      // already closed
+    }
+  });
+
+  return stream;
+}
+
+// ============ TIMERS ============
+
+function heartbeat() {
+  for (const subs of [...hub.byUser.values()]) {
+    for (const sub of [...subs]) write(sub, ': ping\n\n');
+  }
+}
+
+async function poll() {
+  if (hub.polling) return;
+  hub.polling = true;
+  try {
+    if (hub.cursor === null) {
+      const latest = await prisma.orderEvent.aggregate({ _max: { id: true } });
+      hub.cursor = latest._max.id ?? 0;
+      return;
+    }
+
+    const events = await prisma.orderEvent.findMany({
+      where: {
+        OR: [
+          { id: { gt: hub.cursor } },
+          { createdAt: { gt: new Date(Date.now() - POLL_OVERLAP_MS) } },
+        ],
+      },
+      orderBy: { id: 'asc' },
+      take: 1000,
+    });
+    for (const event of events) publishOrderEvent(event);
+
+    const horizon = Date.now() - POLL_OVERLAP_MS * 2;
+    for (const [id, seenAt] of hub.delivered) {
+      if (seenAt < horizon) hub.delivered.delete(id);
+    }
+
+    if (RETENTION_DAYS > 0 && Date.now() - hub.prunedAt > PRUNE_INTERVAL_MS) {
+      hub.prunedAt = Date.now();
+      await prisma.orderEvent.deleteMany({
+        where: { createdAt: { lt: new Date(Date.now() - RETENTION_DAYS * 86400000) } },
+      });
+    }
+  } catch (error) {
+    console.error('Order event poll error:', error);
+  } finally {
+    hub.polling = false;
+  }
+}
+
+function startTimers() {
+  if (!hub.heartbeat) {
+    hub.heartbeat = setInterval(heartbeat, HEARTBEAT_MS);
+    hub.heartbeat.unref?.();
+  }
+  if (!hub.poller && POLL_MS > 0) {
+    hub.poller = setInterval(poll, POLL_MS);
+    hub.poller.unref?.();
+    poll();
+  }
+}
+
+// Nothing to push to; the next subscriber re-reads the cursor from the table
+function stopTimers() {
+  clearInterval(hub.heartbeat);
+  clearInterval(hub.poller);
+  hub.heartbeat = null;
+  hub.poller = null;
+  hub.cursor = null;
+  hub.delivered.clear();
+}
+
+export function getOrderEventStats() {
+  return {
+    ...hub.stats,
+    connections: hub.connections,
+    users: hub.byUser.size,
+    cursor: hub.cursor,
+  };
+}
@@ -0,0 +1,100 @@
+import { NextResponse } from 'next/server';
+
+// Keyset pagination and field projection for list endpoints.
+// Lists are ordered newest first by (createdAt, id); a cursor encodes the last
+// row of a page. Responses stay plain JSON arrays so existing clients keep
+// working, and the next cursor travels in the X-Next-Cursor header.
+const DEFAULT_LIMIT = 50;
+const MAX_LIMIT = 200;
+
+export const KEYSET_ORDER = [{ createdAt: 'desc' }, { id: 'desc' }];
+
+// Bad pagination/projection input, reported to the client as a 400
+export class QueryParamError extends Error {}
+
+export function encodeCursor(row) {
+  return Buffer.from(`${new Date(row.createdAt).toISOString()}|${row.id}`).toString('base64url');
+}
+
+export function decodeCursor(cursor) {
+  const [createdAt, id] = Buffer.from(cursor, 'base64url').toString().split('|');
+  const date = new Date(createdAt);
+  if (!id || Number.isNaN(date.getTime())) {
+    throw new QueryParamError('Invalid cursor');
+  }
+  return { createdAt: date, id };
+}
+
+// Returns null when the request asked for no paging (legacy full list)
+export function parsePagination(searchParams) {
+  const limitParam = searchParams.get('limit');
+  const cursorParam = searchParams.get('cursor');
+  if (limitParam === null && cursorParam === null) return null;
+
+  const limit = limitParam === null ? DEFAULT_LIMIT : Number(limitParam);
+  if (!Number.isInteger(limit) || limit < 1) {
+    throw new QueryParamError('Invalid limit');
+  }
+
+  return {
+    limit: Math.min(limit, MAX_LIMIT),
+    cursor: cursorParam ? decodeCursor(cursorParam) : null,
+  };
+}
+
+// Adds the "strictly after the cursor" condition to a where clause
+export function withCursor(where, page) {
+  if (!page?.cursor) return where;
+  const { createdAt, id } = page.cursor;
+  return {
+    AND: [
+      where,
+      {
+        OR: [
+          { createdAt: { lt: createdAt } },
+          { createdAt, id: { lt: id } },
+        ],
+      },
+    ],
+  };
+}
+
+// take one extra row to know whether another page exists
+export function pageTake(page) {
+  return page ? { take: page.limit + 1 } : {};
+}
+
+// Builds a Prisma select from ?fields=a,b,c against the handler's allowed shape.
+// Returns null when no projection was requested.
+export function parseFields(searchParams, shape) {
+  const fieldsParam = searchParams.get('fields');
+  if (!fieldsParam) return null;
+
+  const select = { id: true, createdAt: true };
+  for (const field of fieldsParam.split(',').map(f => f.trim()).filter(Boolean)) {
+    if (!(field in shape)) {
+      throw new QueryParamError(`Unknown field: ${field}`);
+    }
+    select[field] = shape[field];
+  }
+  return select;
+}
+
+// Page rows plus the headers carrying the next cursor (if any)
+export function pagePayload(rows, page) {
+  if (!page || rows.length <= page.limit) {
+    return { rows, headers: {} };
+  }
+
+  const pageRows = rows.slice(0, page.limit);
+  return {
+    rows: pageRows,
+    headers: { 'X-Next-Cursor': encodeCursor(pageRows[pageRows.length - 1]) },
+  };
+}
+
+// JSON array response with the next cursor (if any) in X-Next-Cursor
+export function pageResponse(rows, page) {
+  const payload = pagePayload(rows, page);
+  return NextResponse.json(payload.rows, { headers: payload.headers });
+}
@@ -0,0 +1,199 @@
+import { Worker } from 'node:worker_threads';
+import os from 'node:os';
+import bcrypt from 'bcryptjs';
+
+// bcrypt on a small worker_threads pool so login/register don't block the
+// event loop. Jobs queue up to MAX_QUEUE; past that callers get a PoolBusyError
+// instead of piling more work onto an overloaded server.
+const POOL_SIZE = parseInt(
+  process.env.PASSWORD_WORKERS || String(Math.max(1, Math.min(4, os.cpus().length - 1))),
+  10
+);
+const MAX_QUEUE = parseInt(process.env.PASSWORD_QUEUE_LIMIT || '1000', 10);
+
+// Workers that die before they are ready are respawned with backoff; after
+// this many in a row (e.g. bcryptjs cannot be resolved from the worker) the
+// pool is disabled and hashing falls back to in-process bcrypt
+const MAX_START_FAILURES = 3;
+const RESPAWN_BASE_MS = 500;
+
+// Inline source keeps the worker independent of the Next.js bundle layout
+const WORKER_SOURCE = `
+const { parentPort } = require('worker_threads');
+const bcrypt = require('bcryptjs');
+parentPort.postMessage({ ready: true });
+parentPort.on('message', ({ id, op, password, hash, rounds }) => {
+  try {
+    const result = op === 'hash'
+      ? bcrypt.hashSync(password, rounds)
+      : bcrypt.compareSync(password, hash);
+    parentPort.postMessage({ id, result });
+  } catch (error) {
+    parentPort.postMessage({ id, error: error.message });
+  }
+});
+`;
+
+export class PoolBusyError extends Error {
+  constructor() {
+    super('Password hashing queue is full');
+  }
+}
+
+const globalForPool = global;
+
+const pool = globalForPool.passwordPool || {
+  workers: [],
+  idle: [],
+  queue: [],
+  pending: new Map(),
+  nextId: 1,
+  disabled: false,
+  startFailures: 0,
+  respawning: 0,
+  stats: { completed: 0, rejected: 0, maxQueued: 0 },
+};
+
+if (process.env.NODE_ENV !== 'production') globalForPool.passwordPool = pool;
+
+function spawnWorker() {
+  const worker = new Worker(WORKER_SOURCE, { eval: true });
+  worker.unref();
+
+  worker.on('message', ({ id, result, error, ready }) => {
+    if (ready) {
+      worker.ready = true;
+      pool.startFailures = 0;
+      return;
+    }
+    const job = pool.pending.get(id);
+    pool.pending.delete(id);
+    pool.stats.completed++;
+    if (error) job.reject(new Error(error));
+    else job.resolve(result);
+    release(worker);
+  });
+
+  worker.on('error', (error) => {
+    console.error('Password worker error:', error);
+    const orphaned = [];
+    for (const [id, job] of pool.pending) {
+      if (job.worker === worker) {
+        pool.pending.delete(id);
+        orphaned.push(job);
+      }
+    }
+    pool.workers = pool.workers.filter(w => w !== worker);
+    pool.idle = pool.idle.filter(w => w !== worker);
+
+    if (worker.ready) {
+      for (const job of orphaned) job.reject(error);
+      spawnWorker();
+      return;
+    }
+
+    // It never loaded, so its jobs never ran; give them to the next worker
+    pool.queue.unshift(...orphaned);
+    pool.startFailures++;
+    if (pool.startFailures >= MAX_START_FAILURES) {
+      disablePool(error);
+      return;
+    }
+    pool.respawning++;
+    setTimeout(() => {
+      pool.respawning--;
+      if (pool.disabled) return;
+      try {
+        spawnWorker();
+      } catch (spawnError) {
+        disablePool(spawnError);
+      }
+    }, RESPAWN_BASE_MS * 2 ** (pool.startFailures - 1)).unref();
+  });
+
+  pool.workers.push(worker);
+  release(worker);
+}
+
+function inProcess(message) {
+  return message.op === 'hash'
+    ? bcrypt.hash(message.password, message.rounds)
+    : bcrypt.compare(message.password, message.hash);
+}
+
+// Stop using workers; anything queued runs on bcryptjs' own async API
+function disablePool(error) {
+  console.error('Password pool unavailable, using in-process bcrypt:', error);
+  pool.disabled = true;
+  for (const worker of pool.workers) worker.terminate();
+  pool.workers = [];
+  pool.idle = [];
+  for (const job of pool.queue.splice(0)) {
+    inProcess(job.message).then(job.resolve, job.reject);
+  }
+}
+
+function ensureWorkers() {
+  if (pool.disabled || pool.workers.length > 0 || pool.respawning > 0) return;
+  try {
+    for (let i = 0; i < POOL_SIZE; i++) spawnWorker();
+  } catch (error) {
+    // No worker_threads here
+    disablePool(error);
+  }
+}
+
+function dispatch(worker, job) {
+  job.worker = worker;
+  pool.pending.set(job.message.id, job);
+  worker.postMessage(job.message);
+}
+
+function release(worker) {
+  const next = pool.queue.shift();
+  if (next) {
+    dispatch(worker, next);
+  } else if (pool.workers.includes(worker)) {
+    pool.idle.push(worker);
+  }
+}
+
+function run(message) {
+  ensureWorkers();
+  if (pool.disabled) return inProcess(message);
+
+  return new Promise((resolve, reject) => {
+    const job = { message: { ...message, id: pool.nextId++ }, resolve, reject };
+    const worker = pool.idle.pop();
+    if (worker) {
+      dispatch(worker, job);
+      return;
+    }
+    if (pool.queue.length >= MAX_QUEUE) {
+      pool.stats.rejected++;
+      reject(new PoolBusyError());
+      return;
+    }
+    pool.queue.push(job);
+    pool.stats.maxQueued = Math.max(pool.stats.maxQueued, pool.queue.length);
+  });
+}
+
+export function hashInPool(password, rounds) {
+  return run({ op: 'hash', password, rounds });
+}
+
+export function compareInPool(password, hash) {
+  return run({ op: 'compare', password, hash });
+}
+
+export function getPasswordPoolStats() {
+  return {
+    ...pool.stats,
+    size: pool.workers.length,
+    busy: pool.workers.length - pool.idle.length,
+    queued: pool.queue.length,
+    queueLimit: MAX_QUEUE,
+    disabled: pool.disabled ? 1 : 0,
+  };
+}
@@ -0,0 +1,328 @@
+import crypto from 'crypto';
+import prisma, { markWritten } from '@/lib/prisma';
+import razorpay, { GATEWAY_TIMEOUT_MS } from '@/lib/razorpay';
+import { bumpCatalog } from '@/lib/catalog-cache';
+import { recordOrderEvent, publishOrderEvent } from '@/lib/order-events';
+
+// Razorpay work kept off the checkout request path.
+//
+// Gateway orders: handleCreateOrder writes a PaymentOutbox row in the same
+// transaction as the Order, and a drain loop here creates the Razorpay order
+// and attaches its id, retrying with exponential backoff. Rows are claimed by
+// pushing nextAttemptAt forward (FOR UPDATE SKIP LOCKED), so several app
+// instances can drain the same table without double-sending. After
+// PAYMENT_OUTBOX_MAX_ATTEMPTS the order is cancelled and its stock returned.
+//
+// Verification: callbacks are queued for a few milliseconds and applied with
+// one UPDATE per batch instead of one per callback.
+const DRAIN_INTERVAL_MS = parseInt(process.env.PAYMENT_OUTBOX_INTERVAL_MS || '2000', 10);
+const DRAIN_BATCH_SIZE = parseInt(process.env.PAYMENT_OUTBOX_BATCH || '20', 10);
+const MAX_ATTEMPTS = parseInt(process.env.PAYMENT_OUTBOX_MAX_ATTEMPTS || '8', 10);
+// A claimed row becomes visible again after this long if its worker died.
+// An attempt makes at most two gateway calls (receipt lookup, then create),
+// each aborted after GATEWAY_TIMEOUT_MS, so the lease outlasts the worst case
+// and no other drainer can claim the row while a call is in flight.
+const CLAIM_LEASE_MS = Math.max(30000, 3 * GATEWAY_TIMEOUT_MS);
+const BACKOFF_BASE_MS = 1000;
+const BACKOFF_MAX_MS = 60000;
+
+const VERIFY_BATCH_MS = parseInt(process.env.PAYMENT_VERIFY_BATCH_MS || '10', 10);
+const VERIFY_BATCH_SIZE = parseInt(process.env.PAYMENT_VERIFY_BATCH_SIZE || '100', 10);
+
+const globalForPayments = global;
+
+const payments = globalForPayments.payments || {
+  timer: null,
+  draining: null,
+  again: false,
+  waiters: new Map(),
+  verifyQueue: [],
+  verifyTimer: null,
+  stats: {
+    gatewayCreated: 0,
+    gatewayErrors: 0,
+    gatewayFailed: 0,
+    verifyBatches: 0,
+    verified: 0,
+    verifyRejected: 0,
+  },
+};
+
+if (process.env.NODE_ENV !== 'production') globalForPayments.payments = payments;
+
+// ============ OUTBOX ============
+
+function backoff(attempts) {
+  return Math.min(BACKOFF_MAX_MS, BACKOFF_BASE_MS * 2 ** (attempts - 1));
+}
+
+async function claimBatch() {
+  return prisma.$queryRaw`
+    UPDATE "PaymentOutbox" AS o
+    SET "attempts" = o."attempts" + 1,
+        "nextAttemptAt" = NOW() + make_interval(secs => ${CLAIM_LEASE_MS / 1000}),
+        "updatedAt" = NOW()
+    WHERE o."id" IN (
+      SELECT "id" FROM "PaymentOutbox"
+      WHERE "status" = 'pending' AND "nextAttemptAt" <= NOW()
+      ORDER BY "nextAttemptAt"
+      LIMIT ${DRAIN_BATCH_SIZE}
+      FOR UPDATE SKIP LOCKED
+    )
+    RETURNING o."id", o."orderId", o."orderCreatedAt", o."amount", o."attempts"
+  `;
+}
+
+function settle(orderId, result) {
+  const waiters = payments.waiters.get(orderId);
+  if (!waiters) return;
+  payments.waiters.delete(orderId);
+  for (const resolve of waiters) resolve(result);
+}
+
+class GatewayTimeoutError extends Error {}
+
+// Backstop for the client's own abort, in case a call ignores it
+function withTimeout(promise, ms) {
+  let timer;
+  const timeout = new Promise((_, reject) => {
+    timer = setTimeout(() => reject(new GatewayTimeoutError(`Gateway call timed out after ${ms}ms`)), ms);
+  });
+  return Promise.race([promise, timeout]).finally(() => clearTimeout(timer));
+}
+
+function isTimeout(error) {
+  return error instanceof GatewayTimeoutError
+    || error?.name === 'TimeoutError' // fetch aborted by AbortSignal.timeout
+    || error?.code === 'ECONNABORTED'; // axios timeout in the SDK
+}
+
+// Gateway order an earlier attempt created for this order, if any. Razorpay
+// does not dedupe by receipt, so a retry looks before it creates.
+async function findGatewayOrder(receipt) {
+  const { items = [] } = await withTimeout(razorpay.orders.all({ receipt }), GATEWAY_TIMEOUT_MS);
+  return items.find(order => order.receipt === receipt) || null;
+}
+
+// Give up on an order: mark it failed and cancelled and put its items' stock
+// back, together with the outbox row, so the stock is never held twice
+async function failEntry(entry, message) {
+  const { restocked, event } = await prisma.$transaction(async (tx) => {
+    await tx.paymentOutbox.update({
+      where: { id: entry.id },
+      data: { status: 'failed', lastError: message },
+    });
+    const restocked = await tx.$queryRaw`
+      UPDATE "Product" AS p
+      SET "quantity" = p."quantity" + s.qty, "updatedAt" = NOW()
+      FROM (
+        SELECT "productId", SUM("quantity") AS qty FROM "OrderItem"
+        WHERE "orderId" = ${entry.orderId} AND "createdAt" = ${entry.orderCreatedAt}::timestamp
+        GROUP BY "productId"
+      ) AS s
+      WHERE p."id" = s."productId"
+      RETURNING p."category"
+    `;
+    const { orderItems, ...order } = await tx.order.update({
+      where: { id_createdAt: { id: entry.orderId, createdAt: entry.orderCreatedAt } },
+      data: { paymentStatus: 'failed', orderStatus: 'cancelled' },
+      include: { orderItems: { select: { farmerId: true } } },
+    });
+    return {
+      restocked,
+      event: await recordOrderEvent(tx, 'order.status', order, orderItems.map(item => item.farmerId)),
+    };
+  });
+
+  markWritten(`user:${event.buyerId}`, ...event.farmerIds.map(id => `user:${id}`));
+  bumpCatalog(restocked.map(row => row.category));
+  publishOrderEvent(event);
+}
+
+async function processEntry(entry) {
+  try {
+    // The receipt is our order id, so a retry can find what an earlier attempt created
+    const gatewayOrder = (entry.attempts > 1 && await findGatewayOrder(entry.orderId))
+      || await withTimeout(razorpay.orders.create({
+        amount: entry.amount,
+        currency: 'INR',
+        receipt: entry.orderId,
+      }), GATEWAY_TIMEOUT_MS);
+
+    await prisma.$transaction([
+      prisma.order.update({
+        where: { id_createdAt: { id: entry.orderId, createdAt: entry.orderCreatedAt } },
+        data: { razorpayOrderId: gatewayOrder.id },
+      }),
+      prisma.paymentOutbox.update({
+        where: { id: entry.id },
+        data: { status: 'done', lastError: null },
+      }),
+    ]);
+    payments.stats.gatewayCreated++;
+    settle(entry.orderId, { razorpayOrderId: gatewayOrder.id, paymentStatus: 'pending' });
+  } catch (error) {
+    payments.stats.gatewayErrors++;
+    const message = String(error?.message || error).slice(0, 500);
+
+    if (entry.attempts >= MAX_ATTEMPTS) {
+      payments.stats.gatewayFailed++;
+      await failEntry(entry, message);
+      settle(entry.orderId, { razorpayOrderId: null, paymentStatus: 'failed' });
+      return;
+    }
+
+    await prisma.paymentOutbox.update({
+      where: { id: entry.id },
+      data: {
+        lastError: message,
+        // A timed-out create may still be landing on the gateway; give it time
+        // to show up in the next attempt's receipt lookup
+        nextAttemptAt: new Date(Date.now() + Math.max(backoff(entry.attempts), isTimeout(error) ? GATEWAY_TIMEOUT_MS : 0)),
+      },
+    });
+  }
+}
+
+async function drain() {
+  for (;;) {
+    const batch = await claimBatch();
+    if (batch.length === 0) return;
+    await Promise.all(batch.map(processEntry));
+  }
+}
+
+// Drain now; a call while a drain is running schedules one more pass
+export function kickOutbox() {
+  startDrainLoop();
+  if (payments.draining) {
+    payments.again = true;
+    return payments.draining;
+  }
+
+  payments.draining = drain()
+    .catch(error => console.error('Payment outbox error:', error))
+    .finally(() => {
+      payments.draining = null;
+      if (payments.again) {
+        payments.again = false;
+        kickOutbox();
+      }
+    });
+  return payments.draining;
+}
+
+// Picks up retries and rows left behind by other instances
+function startDrainLoop() {
+  if (payments.timer || DRAIN_INTERVAL_MS <= 0) return;
+  payments.timer = setInterval(kickOutbox, DRAIN_INTERVAL_MS);
+  payments.timer.unref?.();
+}
+
+// Wait up to timeoutMs for this process to attach a gateway order id.
+// Resolves null on timeout; the caller then lets the client poll.
+export function waitForGatewayOrder(orderId, timeoutMs) {
+  return new Promise(resolve => {
+    const timer = setTimeout(() => {
+      const waiters = payments.waiters.get(orderId);
+      if (waiters) {
+        waiters.delete(done);
+        if (waiters.size === 0) payments.waiters.delete(orderId);
+      }
+      resolve(null);
+    }, timeoutMs);
+
+    function done(result) {
+      clearTimeout(timer);
+      resolve(result);
+    }
+
+    if (!payments.waiters.has(orderId)) payments.waiters.set(orderId, new Set());
+    payments.waiters.get(orderId).add(done);
+  });
+}
+
+// ============ VERIFICATION ============
+
+export function isValidSignature(razorpayOrderId, razorpayPaymentId, signature) {
+  const expected = crypto
+    .createHmac('sha256', process.env.RAZORPAY_KEY_SECRET)
+    .update(`${razorpayOrderId}|${razorpayPaymentId}`)
+    .digest('hex');
+  return typeof signature === 'string'
+    && signature.length === expected.length
+    && crypto.timingSafeEqual(Buffer.from(signature), Buffer.from(expected));
+}
+
+async function flushVerifications() {
+  payments.verifyTimer = null;
+  const batch = payments.verifyQueue.splice(0, payments.verifyQueue.length);
+  if (batch.length === 0) return;
+
+  try {
+    // Only the buyer's own order with the matching gateway order id is marked paid.
+    // Every gateway order came from an outbox row, which also holds the order's
+    // createdAt; matching on it lets each update touch one monthly partition.
+    const updated = await prisma.$queryRaw`
+      WITH d AS MATERIALIZED (
+        SELECT d.id, po."orderCreatedAt" AS created_at, d.buyer_id, d.gateway_order_id, d.payment_id
+        FROM unnest(
+          ${batch.map(job => job.orderId)}::text[],
+          ${batch.map(job => job.buyerId)}::text[],
+          ${batch.map(job => job.razorpayOrderId)}::text[],
+          ${batch.map(job => job.razorpayPaymentId)}::text[]
+        ) AS d(id, buyer_id, gateway_order_id, payment_id)
+        JOIN "PaymentOutbox" po ON po."orderId" = d.id
+      )
+      UPDATE "Order" AS o
+      SET "paymentStatus" = 'paid', "razorpayPaymentId" = d.payment_id, "updatedAt" = NOW()
+      FROM d
+      WHERE o."id" = d.id AND o."createdAt" = d.created_at
+        AND o."buyerId" = d.buyer_id AND o."razorpayOrderId" = d.gateway_order_id
+      RETURNING o.*, ARRAY(
+        SELECT DISTINCT oi."farmerId" FROM "OrderItem" oi
+        WHERE oi."orderId" = o."id" AND oi."createdAt" = o."createdAt"
+      ) AS "farmerIds"
+    `;
+    const byId = new Map(updated.map(({ farmerIds, ...order }) => [order.id, { order, farmerIds }]));
+
+    payments.stats.verifyBatches++;
+    payments.stats.verified += updated.length;
+    payments.stats.verifyRejected += batch.length - updated.length;
+    for (const job of batch) job.resolve(byId.get(job.orderId) || null);
+  } catch (error) {
+    for (const job of batch) job.reject(error);
+  }
+}
+
+// Queue a verified callback; resolves with { order, farmerIds } for the updated
+// order, or null when no order of this buyer carries that gateway order id
+export function markOrderPaid({ orderId, buyerId, razorpayOrderId, razorpayPaymentId }) {
+  return new Promise((resolve, reject) => {
+    payments.verifyQueue.push({ orderId, buyerId, razorpayOrderId, razorpayPaymentId, resolve, reject });
+
+    if (payments.verifyQueue.length >= VERIFY_BATCH_SIZE) {
+      clearTimeout(payments.verifyTimer);
+      flushVerifications();
+    } else if (!payments.verifyTimer) {
+      payments.verifyTimer = setTimeout(flushVerifications, VERIFY_BATCH_MS);
+    }
+  });
+}
+
+export function getPaymentStats() {
+  return {
+    ...payments.stats,
+    draining: payments.draining ? 1 : 0,
+    waiting: payments.waiters.size,
+    verifyQueued: payments.verifyQueue.length,
+  };
+}
+
+// Outbox rows by status, for the admin cache/metrics view
+export async function getOutboxCounts() {
+  const rows = await prisma.paymentOutbox.groupBy({ by: ['status'], _count: { _all: true } });
+  const counts = { pending: 0, done: 0, failed: 0 };
+  for (const row of rows) counts[row.status] = row._count._all;
+  return counts;
+}
@@ -1,9 +1,160 @@
 import { PrismaClient } from '@prisma/client';
+import { recordDbQuery } from '@/lib/metrics';
+import { LRUCache } from '@/lib/lru';
+
+// Primary and (optional) read-replica clients.
+//
+// The default export is the primary and takes every write and checkout.
+// Read-heavy list handlers call readClient(scope), which returns the replica
+// when DATABASE_REPLICA_URL is set. A scope that this process wrote to in the
+// last REPLICA_STICKY_MS (markWritten) reads from the primary instead, so a
+// buyer sees the order they just placed despite replication lag.
+//
+// Each client has its own connection pool: DATABASE_POOL_SIZE /
+// DATABASE_REPLICA_POOL_SIZE connections (unset keeps Prisma's default of
+// 2 x CPUs + 1), waiting at most DATABASE_POOL_TIMEOUT seconds for one. Pool
+// occupancy and wait times come from Prisma's metrics.
+const POOL_SIZE = process.env.DATABASE_POOL_SIZE;
+const REPLICA_POOL_SIZE = process.env.DATABASE_REPLICA_POOL_SIZE || POOL_SIZE;
+const POOL_TIMEOUT_S = process.env.DATABASE_POOL_TIMEOUT;
+const STICKY_MS = parseInt(process.env.REPLICA_STICKY_MS || '5000', 10);
+const STICKY_SCOPES = 10000;
+// Pool metrics are read asynchronously; gauges serve the last sample
+const POOL_SAMPLE_MS = 1000;
 
 const globalForPrisma = global;
 
-const prisma = globalForPrisma.prisma || new PrismaClient();
+// Connection pool settings travel as datasource URL parameters
+function withPool(url, size) {
+  if (!url) return url;
+  const parsed = new URL(url);
+  if (size) parsed.searchParams.set('connection_limit', size);
+  if (POOL_TIMEOUT_S) parsed.searchParams.set('pool_timeout', POOL_TIMEOUT_S);
+  return parsed.toString();
+}
+
+function createStats(url) {
+  const limit = url ? new URL(url).searchParams.get('connection_limit') : null;
+  return {
+    queries: 0,
+    queryMs: 0,
+    // 0 means Prisma's default size
+    poolSize: limit ? parseInt(limit, 10) : 0,
+    sampledAt: 0,
+    sampling: null,
+    pool: { open: 0, busy: 0, idle: 0, waiting: 0, waitCount: 0, waitMsTotal: 0 },
+  };
+}
+
+// Count and time every query against the API route that issued it
+function createClient(url, stats) {
+  return new PrismaClient({ datasourceUrl: url }).$extends({
+    query: {
+      async $allOperations({ args, query }) {
+        const started = performance.now();
+        try {
+          return await query(args);
+        } finally {
+          const elapsed = performance.now() - started;
+          stats.queries++;
+          stats.queryMs += elapsed;
+          recordDbQuery(elapsed);
+        }
+      },
+    },
+  });
+}
+
+function createClients() {
+  const primaryUrl = withPool(process.env.DATABASE_URL, POOL_SIZE);
+  const replicaUrl = withPool(process.env.DATABASE_REPLICA_URL, REPLICA_POOL_SIZE);
+  const primaryStats = createStats(primaryUrl);
+  const replicaStats = replicaUrl ? createStats(replicaUrl) : null;
+  return {
+    primary: createClient(primaryUrl, primaryStats),
+    primaryStats,
+    replica: replicaUrl ? createClient(replicaUrl, replicaStats) : null,
+    replicaStats,
+    written: new LRUCache(STICKY_SCOPES),
+    stats: { replicaReads: 0, stickyReads: 0 },
+  };
+}
+
+const clients = globalForPrisma.prismaClients || createClients();
+
+if (process.env.NODE_ENV !== 'production') globalForPrisma.prismaClients = clients;
+
+const prisma = clients.primary;
+
+// Record a write so reads in these scopes stay on the primary for a while.
+// Scopes are free-form keys, e.g. 'catalog' or `user:${userId}`.
+export function markWritten(...scopes) {
+  if (!clients.replica) return;
+  const until = Date.now() + STICKY_MS;
+  for (const scope of scopes) clients.written.set(scope, true, until);
+}
+
+// Client for a read-only query in the given scopes
+export function readClient(...scopes) {
+  if (!clients.replica) return prisma;
+  if (scopes.some(scope => clients.written.get(scope))) {
+    clients.stats.stickyReads++;
+    return prisma;
+  }
+  clients.stats.replicaReads++;
+  return clients.replica;
+}
+
+function metricValue(list, key) {
+  return list.find(metric => metric.key === key)?.value ?? 0;
+}
+
+async function samplePool(client, stats) {
+  try {
+    const { gauges, histograms } = await client.$metrics.json();
+    const wait = histograms.find(metric => metric.key === 'prisma_client_queries_wait_histogram_ms')?.value;
+    stats.pool = {
+      open: metricValue(gauges, 'prisma_pool_connections_open'),
+      busy: metricValue(gauges, 'prisma_pool_connections_busy'),
+      idle: metricValue(gauges, 'prisma_pool_connections_idle'),
+      waiting: metricValue(gauges, 'prisma_client_queries_wait'),
+      waitCount: wait?.count ?? 0,
+      waitMsTotal: wait?.sum ?? 0,
+    };
+  } catch (error) {
+    console.error('Prisma metrics error:', error);
+  } finally {
+    stats.sampledAt = Date.now();
+    stats.sampling = null;
+  }
+}
+
+function poolGauges(client, stats) {
+  if (!client) return { enabled: 0 };
+  if (!stats.sampling && Date.now() - stats.sampledAt > POOL_SAMPLE_MS) {
+    stats.sampling = samplePool(client, stats);
+  }
+  const { pool } = stats;
+  return {
+    enabled: 1,
+    queries: stats.queries,
+    queryMs: Math.round(stats.queryMs),
+    poolSize: stats.poolSize,
+    ...pool,
+    waitMsAvg: pool.waitCount ? pool.waitMsTotal / pool.waitCount : 0,
+  };
+}
+
+export function getPrimaryPoolStats() {
+  return poolGauges(clients.primary, clients.primaryStats);
+}
 
-if (process.env.NODE_ENV !== 'production') globalForPrisma.prisma = prisma;
+export function getReplicaPoolStats() {
+  return {
+    ...poolGauges(clients.replica, clients.replicaStats),
+    ...clients.stats,
+    stickyScopes: clients.written.size,
+  };
+}
 
-export default prisma;
\ No newline at end of file
+export default prisma;
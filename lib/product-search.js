@@ -0,0 +1,102 @@
+import { Prisma } from '@prisma/client';
+import { readClient } from '@/lib/prisma';
+import { QueryParamError } from '@/lib/pagination';
+
+// Product name search for GET /api/products/search.
+// Matching runs in Postgres against the pg_trgm GIN index on Product.name
+// (word similarity, so "tomato" finds "Cherry Tomatoes" and survives typos,
+// plus ILIKE for queries too short to have useful trigrams). The best
+// SEARCH_CANDIDATES matches are then ranked here by relevance discounted by
+// distance to the buyer, and paged by position in that ranking. Rows carry the
+// farmer's name only, not the full profile that /api/products includes.
+const DEFAULT_LIMIT = 20;
+const MAX_LIMIT = 100;
+const MIN_QUERY_LENGTH = 2;
+const MAX_QUERY_LENGTH = 100;
+const SEARCH_CANDIDATES = parseInt(process.env.PRODUCT_SEARCH_CANDIDATES || '500', 10);
+// Share of the relevance score a product at the edge of the radius loses
+const DISTANCE_WEIGHT = parseFloat(process.env.PRODUCT_SEARCH_DISTANCE_WEIGHT || '0.5');
+
+function encodeOffset(offset) {
+  return Buffer.from(String(offset)).toString('base64url');
+}
+
+function decodeOffset(cursor) {
+  const offset = Number(Buffer.from(cursor, 'base64url').toString());
+  if (!Number.isInteger(offset) || offset < 0) {
+    throw new QueryParamError('Invalid cursor');
+  }
+  return offset;
+}
+
+// q, limit and cursor from the query string
+export function parseSearchParams(searchParams) {
+  const q = (searchParams.get('q') || '').trim().replace(/\s+/g, ' ');
+  if (q.length < MIN_QUERY_LENGTH || q.length > MAX_QUERY_LENGTH) {
+    throw new QueryParamError(`q must be ${MIN_QUERY_LENGTH}-${MAX_QUERY_LENGTH} characters`);
+  }
+
+  const limitParam = searchParams.get('limit');
+  const limit = limitParam === null ? DEFAULT_LIMIT : Number(limitParam);
+  if (!Number.isInteger(limit) || limit < 1) {
+    throw new QueryParamError('Invalid limit');
+  }
+
+  const cursor = searchParams.get('cursor');
+  return {
+    q,
+    limit: Math.min(limit, MAX_LIMIT),
+    offset: cursor ? decodeOffset(cursor) : 0,
+  };
+}
+
+function likePattern(q) {
+  return `%${q.replace(/[\\%_]/g, '\\$&')}%`;
+}
+
+// Matching in-stock products, best text match first. farmerIds narrows the
+// search to nearby farmers; null searches the whole catalog.
+function findCandidates(q, category, farmerIds) {
+  return readClient('catalog').$queryRaw`
+    SELECT p."id", p."farmerId", u."name" AS "farmerName", p."name", p."category",
+           p."price", p."quantity", p."image", p."createdAt",
+           word_similarity(${q}, p."name") AS "relevance"
+    FROM "Product" AS p
+    JOIN "User" AS u ON u."id" = p."farmerId"
+    WHERE p."quantity" > 0
+      AND (p."name" %> ${q} OR p."name" ILIKE ${likePattern(q)})
+      ${category ? Prisma.sql`AND p."category" = ${category}` : Prisma.empty}
+      ${farmerIds ? Prisma.sql`AND p."farmerId" = ANY(${farmerIds}::text[])` : Prisma.empty}
+    ORDER BY "relevance" DESC, p."id"
+    LIMIT ${SEARCH_CANDIDATES}
+  `;
+}
+
+// One page of ranked results plus the X-Next-Cursor header (if any).
+// distances maps farmer id -> km from the buyer, or is null without a location.
+export async function searchProducts({ q, limit, offset }, { category, distances, radiusKm }) {
+  if (distances && distances.size === 0) {
+    return { rows: [], headers: {} };
+  }
+
+  const candidates = await findCandidates(q, category, distances ? [...distances.keys()] : null);
+
+  const ranked = candidates.map(product => {
+    const relevance = Number(product.relevance);
+    const distanceKm = distances ? distances.get(product.farmerId) : null;
+    const score = distances
+      ? relevance * (1 - DISTANCE_WEIGHT * Math.min(distanceKm / radiusKm, 1))
+      : relevance;
+    return {
+      ...product,
+      relevance: Math.round(relevance * 1000) / 1000,
+      distanceKm: distanceKm === null ? null : Math.round(distanceKm * 100) / 100,
+      score,
+    };
+  });
+  ranked.sort((a, b) => b.score - a.score || (a.distanceKm ?? 0) - (b.distanceKm ?? 0) || (a.id < b.id ? -1 : 1));
+
+  const rows = ranked.slice(offset, offset + limit).map(({ score, ...row }) => row);
+  const headers = offset + limit < ranked.length ? { 'X-Next-Cursor': encodeOffset(offset + limit) } : {};
+  return { rows, headers };
+}
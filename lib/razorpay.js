@@ -0,0 +1,53 @@
+import Razorpay from 'razorpay';
+
+// Razorpay client used by checkout. When RAZORPAY_API_URL is set (e.g. by
+// local_server.py) orders are created against that URL instead, so the API can
+// run offline against a local stub that speaks the same /v1/orders contract.
+//
+// Every call is aborted after PAYMENT_GATEWAY_TIMEOUT_MS, so a call the
+// payment outbox gave up on cannot still create a gateway order later.
+export const GATEWAY_TIMEOUT_MS = parseInt(process.env.PAYMENT_GATEWAY_TIMEOUT_MS || '10000', 10);
+
+function createStubClient(baseUrl, keyId, keySecret) {
+  const auth = Buffer.from(`${keyId}:${keySecret}`).toString('base64');
+  const ordersUrl = `${baseUrl.replace(/\/$/, '')}/v1/orders`;
+
+  async function call(url, init = {}) {
+    const response = await fetch(url, {
+      ...init,
+      headers: { 'Content-Type': 'application/json', Authorization: `Basic ${auth}` },
+      signal: AbortSignal.timeout(GATEWAY_TIMEOUT_MS),
+    });
+    if (!response.ok) {
+      throw new Error(`Razorpay stub returned ${response.status}`);
+    }
+    return response.json();
+  }
+
+  return {
+    orders: {
+      create(params) {
+        return call(ordersUrl, { method: 'POST', body: JSON.stringify(params) });
+      },
+      all(params = {}) {
+        return call(`${ordersUrl}?${new URLSearchParams(params)}`);
+      },
+    },
+  };
+}
+
+function createClient() {
+  const client = new Razorpay({
+    key_id: process.env.RAZORPAY_KEY_ID,
+    key_secret: process.env.RAZORPAY_KEY_SECRET,
+  });
+  // The SDK has no timeout option; its requests go through this axios instance
+  if (client.api?.rq?.defaults) client.api.rq.defaults.timeout = GATEWAY_TIMEOUT_MS;
+  return client;
+}
+
+const razorpay = process.env.RAZORPAY_API_URL
+  ? createStubClient(process.env.RAZORPAY_API_URL, process.env.RAZORPAY_KEY_ID, process.env.RAZORPAY_KEY_SECRET)
+  : createClient();
+
+export default razorpay;
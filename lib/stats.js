@@ -0,0 +1,181 @@
+import prisma from '@/lib/prisma';
+
+// Platform counters for the admin dashboard, kept in the StatCounter table and
+// bumped by the write paths instead of running COUNT(*) on every refresh.
+// Orders per day and GMV per day are bucketed in DailyOrderStat as orders are
+// placed. Bumps are best effort; a periodic reconciliation recounts from the
+// source tables (live and archived orders) and corrects any drift.
+export const COUNTER_KEYS = [
+  'totalFarmers',
+  'totalBuyers',
+  'totalProducts',
+  'totalOrders',
+  'pendingApprovals',
+];
+
+const RECONCILE_INTERVAL_MS = parseInt(process.env.STATS_RECONCILE_INTERVAL_MS || '3600000', 10);
+
+const globalForStats = global;
+
+const state = globalForStats.platformStats || { timer: null, reconciling: null };
+
+if (process.env.NODE_ENV !== 'production') globalForStats.platformStats = state;
+
+// Apply counter deltas, e.g. bumpCounters({ totalProducts: 1 })
+export async function bumpCounters(deltas) {
+  const keys = Object.keys(deltas).filter(key => deltas[key]);
+  if (keys.length === 0) return;
+
+  try {
+    const values = keys.map(key => deltas[key]);
+    await prisma.$executeRaw`
+      INSERT INTO "StatCounter" ("key", "value", "updatedAt")
+      SELECT k, v, NOW() FROM unnest(${keys}::text[], ${values}::int[]) AS d(k, v)
+      ON CONFLICT ("key") DO UPDATE
+      SET "value" = "StatCounter"."value" + EXCLUDED."value", "updatedAt" = NOW()
+    `;
+  } catch (error) {
+    console.error('Stats bump error:', error);
+  }
+}
+
+// Count a new order and add it to its day's bucket
+export async function recordOrder(order) {
+  await bumpCounters({ totalOrders: 1 });
+
+  try {
+    await prisma.$executeRaw`
+      INSERT INTO "DailyOrderStat" ("day", "orders", "gmv", "updatedAt")
+      VALUES (${order.createdAt}::date, 1, ${order.totalAmount}, NOW())
+      ON CONFLICT ("day") DO UPDATE
+      SET "orders" = "DailyOrderStat"."orders" + 1,
+          "gmv" = "DailyOrderStat"."gmv" + EXCLUDED."gmv",
+          "updatedAt" = NOW()
+    `;
+  } catch (error) {
+    console.error('Stats order bucket error:', error);
+  }
+}
+
+// Recount every counter and daily bucket from the source tables. The source
+// counts and the stored values are read from one REPEATABLE READ snapshot and
+// only the difference is written back, so bumps from orders, signups and
+// product changes that commit in between are added on top, not overwritten.
+export async function reconcileStats() {
+  if (state.reconciling) return state.reconciling;
+
+  state.reconciling = (async () => {
+    const { counterDeltas, dayDeltas } = await prisma.$transaction(async tx => {
+      const [totalFarmers, totalBuyers, totalProducts, liveOrders, archivedOrders, pendingApprovals, stored] = await Promise.all([
+        tx.user.count({ where: { role: 'farmer', approved: true } }),
+        tx.user.count({ where: { role: 'buyer' } }),
+        tx.product.count(),
+        tx.order.count(),
+        tx.orderArchive.count(),
+        tx.user.count({ where: { role: 'farmer', approved: false } }),
+        tx.statCounter.findMany({ where: { key: { in: COUNTER_KEYS } } }),
+      ]);
+      const totalOrders = liveOrders + archivedOrders;
+      const counts = { totalFarmers, totalBuyers, totalProducts, totalOrders, pendingApprovals };
+      const storedValues = new Map(stored.map(row => [row.key, row.value]));
+
+      // Per day: source totals minus the stored bucket
+      const dayDeltas = await tx.$queryRaw`
+        SELECT "day", SUM("orders")::int AS "orders", SUM("gmv")::float8 AS "gmv"
+        FROM (
+          SELECT "createdAt"::date AS "day", COUNT(*)::int AS "orders", COALESCE(SUM("totalAmount"), 0) AS "gmv"
+          FROM (
+            SELECT "createdAt", "totalAmount" FROM "Order"
+            UNION ALL
+            SELECT "createdAt", "totalAmount" FROM "OrderArchive"
+          ) AS o
+          GROUP BY 1
+          UNION ALL
+          SELECT "day", -"orders", -"gmv" FROM "DailyOrderStat"
+        ) AS d
+        GROUP BY "day"
+        HAVING SUM("orders") <> 0 OR SUM("gmv") <> 0
+      `;
+
+      return {
+        counterDeltas: COUNTER_KEYS.map(key => counts[key] - (storedValues.get(key) ?? 0)),
+        dayDeltas,
+      };
+    }, { isolationLevel: 'RepeatableRead' });
+
+    const [counters] = await prisma.$transaction([
+      prisma.$queryRaw`
+        INSERT INTO "StatCounter" ("key", "value", "updatedAt")
+        SELECT k, v, NOW() FROM unnest(${COUNTER_KEYS}::text[], ${counterDeltas}::int[]) AS d(k, v)
+        ON CONFLICT ("key") DO UPDATE
+        SET "value" = "StatCounter"."value" + EXCLUDED."value", "updatedAt" = NOW()
+        RETURNING "key", "value"
+      `,
+      prisma.$executeRaw`
+        INSERT INTO "DailyOrderStat" ("day", "orders", "gmv", "updatedAt")
+        SELECT day, orders, gmv, NOW()
+        FROM unnest(${dayDeltas.map(row => row.day)}::date[], ${dayDeltas.map(row => row.orders)}::int[], ${dayDeltas.map(row => row.gmv)}::float8[]) AS d(day, orders, gmv)
+        ON CONFLICT ("day") DO UPDATE
+        SET "orders" = "DailyOrderStat"."orders" + EXCLUDED."orders",
+            "gmv" = "DailyOrderStat"."gmv" + EXCLUDED."gmv",
+            "updatedAt" = NOW()
+      `,
+    ]);
+
+    const counts = {};
+    for (const row of counters) {
+      counts[row.key] = row.value;
+    }
+    return counts;
+  })().finally(() => {
+    state.reconciling = null;
+  });
+
+  return state.reconciling;
+}
+
+// Reconcile on the interval; called from register() in instrumentation.js
+export function startReconciler() {
+  if (state.timer || RECONCILE_INTERVAL_MS <= 0) return;
+  state.timer = setInterval(() => {
+    reconcileStats().catch(error => console.error('Stats reconcile error:', error));
+  }, RECONCILE_INTERVAL_MS);
+  state.timer.unref?.();
+}
+
+// Current counters; the first call on an empty table reconciles to seed it
+export async function getStats() {
+  const rows = await prisma.statCounter.findMany({ where: { key: { in: COUNTER_KEYS } } });
+  if (rows.length < COUNTER_KEYS.length) {
+    return reconcileStats();
+  }
+
+  const stats = {};
+  for (const row of rows) {
+    stats[row.key] = row.value;
+  }
+  return stats;
+}
+
+// Orders and GMV per day for the last `days` days, oldest first, gaps filled with zeros
+export async function getDailySeries(days = 30) {
+  const since = new Date();
+  since.setUTCHours(0, 0, 0, 0);
+  since.setUTCDate(since.getUTCDate() - (days - 1));
+
+  const rows = await prisma.dailyOrderStat.findMany({
+    where: { day: { gte: since } },
+    orderBy: { day: 'asc' },
+  });
+  const byDay = new Map(rows.map(row => [row.day.toISOString().slice(0, 10), row]));
+
+  const series = [];
+  for (let i = 0; i < days; i++) {
+    const day = new Date(since);
+    day.setUTCDate(since.getUTCDate() + i);
+    const key = day.toISOString().slice(0, 10);
+    const row = byDay.get(key);
+    series.push({ day: key, orders: row ? row.orders : 0, gmv: row ? row.gmv : 0 });
+  }
+  return series;
+}
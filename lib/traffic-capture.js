@@ -0,0 +1,164 @@
+import fs from 'fs';
+import { getAuthUser } from '@/lib/auth';
+
+// Opt-in traffic capture for replay.py. With TRAFFIC_CAPTURE_FILE set, each
+// API request is appended to that file as one compact JSON line: arrival time,
+// method, path, query, the caller's role, the body with credentials and
+// personal fields masked, the response status and the handler's time.
+//
+// Lines go through a buffered append stream. When the disk falls more than
+// TRAFFIC_CAPTURE_MAX_BUFFER bytes behind, records are dropped (and counted)
+// instead of holding up requests. TRAFFIC_CAPTURE_SAMPLE captures only a share
+// of requests. Long-lived streams and metrics scrapes are never captured.
+const CAPTURE_FILE = process.env.TRAFFIC_CAPTURE_FILE;
+const SAMPLE_RATE = parseFloat(process.env.TRAFFIC_CAPTURE_SAMPLE || '1');
+const MAX_BODY_BYTES = parseInt(process.env.TRAFFIC_CAPTURE_MAX_BODY || '65536', 10);
+const MAX_BUFFER_BYTES = parseInt(process.env.TRAFFIC_CAPTURE_MAX_BUFFER || '8388608', 10);
+
+export const REDACTED = '***';
+
+const SENSITIVE_FIELDS = new Set([
+  'password',
+  'token',
+  'email',
+  'phone',
+  'address',
+  'razorpaySignature',
+  'razorpay_signature',
+]);
+
+// Extra fields masked on specific routes (a product's name is not personal, a user's is)
+const ROUTE_FIELDS = {
+  'auth/register': new Set(['name']),
+};
+
+const SKIP_PATHS = new Set(['orders/stream', 'metrics']);
+
+const globalForCapture = global;
+
+const capture = globalForCapture.trafficCapture || {
+  stream: null,
+  failed: false,
+  stats: { captured: 0, dropped: 0, bodiesOmitted: 0 },
+};
+
+if (process.env.NODE_ENV !== 'production') globalForCapture.trafficCapture = capture;
+
+function getStream() {
+  if (!capture.stream && !capture.failed) {
+    capture.stream = fs.createWriteStream(CAPTURE_FILE, { flags: 'a' });
+    capture.stream.on('error', error => {
+      console.error('Traffic capture error:', error);
+      capture.failed = true;
+      capture.stream = null;
+    });
+  }
+  return capture.stream;
+}
+
+function write(record) {
+  const stream = getStream();
+  if (!stream || stream.writableLength > MAX_BUFFER_BYTES) {
+    capture.stats.dropped++;
+    return;
+  }
+  stream.write(JSON.stringify(record) + '\n');
+  capture.stats.captured++;
+}
+
+function mask(value, fields) {
+  if (Array.isArray(value)) return value.map(item => mask(item, fields));
+  if (!value || typeof value !== 'object') return value;
+  const masked = {};
+  for (const [key, field] of Object.entries(value)) {
+    masked[key] = SENSITIVE_FIELDS.has(key) || fields?.has(key) ? REDACTED : mask(field, fields);
+  }
+  return masked;
+}
+
+function maskQuery(searchParams) {
+  if (searchParams.has('token')) searchParams.set('token', REDACTED);
+  return searchParams.toString();
+}
+
+// Body text to store, or null with the reason in `omitted` (size in bytes, or -1 if unparseable JSON)
+async function readBody(clone, path, contentType) {
+  const text = await clone.text();
+  if (!text) return { body: null };
+  const size = Buffer.byteLength(text);
+  if (size > MAX_BODY_BYTES) return { body: null, omitted: size };
+  if (contentType && !contentType.includes('json')) return { body: text };
+  try {
+    return { body: JSON.stringify(mask(JSON.parse(text), ROUTE_FIELDS[path])) };
+  } catch {
+    return { body: null, omitted: -1 };
+  }
+}
+
+async function finish(entry, bodyPromise, loginResponse) {
+  const { body, omitted } = await bodyPromise;
+  if (body !== null) entry.b = body;
+  if (omitted !== undefined) {
+    entry.x = omitted;
+    capture.stats.bodiesOmitted++;
+  }
+  // A login's caller is anonymous; record the role it logged in as
+  if (loginResponse) {
+    entry.r = (await loginResponse.json()).user?.role ?? null;
+  }
+  write(entry);
+}
+
+// Wrap a route dispatcher so its requests are appended to the capture file.
+// Returns the dispatcher unchanged when capture is off.
+export function captureTraffic(method, dispatch) {
+  if (!CAPTURE_FILE) return dispatch;
+
+  return async (request, context) => {
+    const path = context?.params?.path ? context.params.path.join('/') : '';
+    if (SKIP_PATHS.has(path) || Math.random() >= SAMPLE_RATE) {
+      return dispatch(request, context);
+    }
+
+    const arrivedAt = performance.timeOrigin + performance.now();
+    const contentType = request.headers.get('content-type') || '';
+    const declaredSize = parseInt(request.headers.get('content-length') || '0', 10);
+    // Read from a clone so the handler still gets the body; skip reading bodies too big to keep
+    const bodyPromise = declaredSize > MAX_BODY_BYTES
+      ? Promise.resolve({ body: null, omitted: declaredSize })
+      : readBody(request.clone(), path, contentType);
+
+    const entry = {
+      t: Math.round(arrivedAt * 10) / 10,
+      m: method,
+      p: path,
+    };
+    const query = maskQuery(new URL(request.url).searchParams);
+    if (query) entry.q = query;
+    const role = getAuthUser(request)?.role;
+    if (role) entry.r = role;
+    if (contentType) entry.ct = contentType;
+    if (request.headers.get('idempotency-key')) entry.ik = 1;
+
+    let response;
+    try {
+      response = await dispatch(request, context);
+      return response;
+    } finally {
+      entry.s = response ? response.status : 500;
+      entry.d = Math.round((performance.now() + performance.timeOrigin - arrivedAt) * 100) / 100;
+      const loginResponse = path === 'auth/login' && entry.s === 200 ? response.clone() : null;
+      finish(entry, bodyPromise, loginResponse).catch(error => {
+        console.error('Traffic capture error:', error);
+      });
+    }
+  };
+}
+
+export function getTrafficCaptureStats() {
+  return {
+    enabled: CAPTURE_FILE && !capture.failed ? 1 : 0,
+    ...capture.stats,
+    bufferedBytes: capture.stream ? capture.stream.writableLength : 0,
+  };
+}
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Local Stand-in Server for the Backend API Tests
+Boots the Next.js API against a throwaway PostgreSQL seeded from prisma/seed.js,
+with Razorpay replaced by a local stub, so backend_test.py runs offline and its
+numbers are reproducible
+
+Usage:
+    python local_server.py                                   # start, print API_BASE_URL, wait for Ctrl-C
+    python local_server.py -- python backend_test.py         # run a command against it, then tear down
+    python local_server.py --prod --farmers 5000 --products-per-farmer 10 --orders 200000 \\
+        -- python backend_test.py --load --duration 60
+
+By default a temporary cluster is created with the local initdb/pg_ctl binaries.
+With --database-url a fresh database is created on that server instead and
+dropped afterwards. Use --prod (next build + next start) for performance runs.
+--replica adds a streaming standby of the temporary cluster and points the
+app's read-heavy endpoints at it (DATABASE_REPLICA_URL).
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+import requests
+
+import perf_bench
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+RAZORPAY_KEY_ID = "rzp_test_stub"
+RAZORPAY_KEY_SECRET = "stub_secret"
+
+
+def free_port():
+    """Ask the OS for an unused TCP port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run(cmd, env=None, quiet=False):
+    """Run a setup step from the project root, failing loudly"""
+    print(f"$ {' '.join(cmd)}")
+    subprocess.run(cmd, cwd=ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL if quiet else None)
+
+
+# ============ RAZORPAY STUB ============
+
+class RazorpayStub:
+    """Minimal stand-in for the Razorpay Orders API (POST /v1/orders, GET /v1/orders?receipt=)
+
+    latency_ms delays every call and fail_rate answers that share of calls with
+    a 503, to exercise the payment outbox's retries. Like the real API it does
+    not dedupe by receipt: every create makes a new order, and the outbox has
+    to look up its receipt before retrying. GET /v1/orders without a receipt
+    reports counters, including receipts with more than one order.
+    """
+
+    def __init__(self, latency_ms=0, fail_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.orders = {}
+        self.receipts = {}
+        self.calls = 0
+        self.failures = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.rstrip("/") != "/v1/orders":
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                params = json.loads(self.rfile.read(length) or b"{}")
+                if stub.latency_ms:
+                    time.sleep(stub.latency_ms / 1000)
+                if stub.should_fail():
+                    self.reply(503, {"error": {"code": "SERVER_ERROR", "description": "injected failure"}})
+                    return
+                self.reply(200, stub.create_order(params))
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                receipt = dict(parse_qsl(url.query)).get("receipt")
+                if url.path.rstrip("/") == "/v1/orders" and receipt is not None:
+                    if stub.latency_ms:
+                        time.sleep(stub.latency_ms / 1000)
+                    if stub.should_fail():
+                        self.reply(503, {"error": {"code": "SERVER_ERROR", "description": "injected failure"}})
+                        return
+                    with stub.lock:
+                        items = [stub.orders[order_id] for order_id in stub.receipts.get(receipt, [])]
+                    self.reply(200, {"entity": "collection", "count": len(items), "items": items})
+                    return
+                with stub.lock:
+                    duplicates = sum(1 for ids in stub.receipts.values() if len(ids) > 1)
+                    self.reply(200, {"count": len(stub.orders), "calls": stub.calls, "failures": stub.failures,
+                                     "duplicateReceipts": duplicates})
+
+            def reply(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", free_port()), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.running = False
+
+    def should_fail(self):
+        with self.lock:
+            self.calls += 1
+            if self.fail_rate and self.rng.random() < self.fail_rate:
+                self.failures += 1
+                return True
+            return False
+
+    def create_order(self, params):
+        receipt = params.get("receipt")
+        with self.lock:
+            order = {
+                "id": f"order_{uuid.uuid4().hex[:14]}",
+                "entity": "order",
+                "amount": params.get("amount"),
+                "currency": params.get("currency", "INR"),
+                "receipt": receipt,
+                "status": "created",
+                "created_at": int(time.time()),
+            }
+            self.orders[order["id"]] = order
+            if receipt:
+                self.receipts.setdefault(receipt, []).append(order["id"])
+            return order
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.running = True
+        print(f"💳 Razorpay stub on {self.url} (latency {self.latency_ms} ms, failure rate {self.fail_rate:.0%})")
+
+    def stop(self):
+        if self.running:
+            self.server.shutdown()
+            duplicates = sum(1 for ids in self.receipts.values() if len(ids) > 1)
+            if duplicates:
+                print(f"⚠️  Razorpay stub: {duplicates} receipts got more than one gateway order")
+        self.server.server_close()
+
+
+# ============ POSTGRES ============
+
+class TempPostgres:
+    """Throwaway PostgreSQL cluster in a temp directory, via initdb/pg_ctl"""
+
+    def __init__(self):
+        for binary in ("initdb", "pg_ctl"):
+            if not shutil.which(binary):
+                raise SystemExit(f"{binary} not found on PATH; install PostgreSQL or pass --database-url")
+        self.dir = tempfile.mkdtemp(prefix="freshlocal-pg-")
+        self.port = free_port()
+        self.url = f"postgresql://postgres@127.0.0.1:{self.port}/freshlocal"
+
+    def start(self):
+        data_dir = os.path.join(self.dir, "data")
+        run(["initdb", "-D", data_dir, "-U", "postgres", "--auth=trust", "--no-sync"], quiet=True)
+        run(["pg_ctl", "-D", data_dir, "-l", os.path.join(self.dir, "postgres.log"), "-w", "start",
+             "-o", f"-p {self.port} -k {self.dir} -c fsync=off -c full_page_writes=off"], quiet=True)
+        conn = perf_bench.connect(f"postgresql://postgres@127.0.0.1:{self.port}/postgres")
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("CREATE DATABASE freshlocal")
+        conn.close()
+        print(f"🐘 Temporary PostgreSQL on port {self.port}")
+
+    def stop(self):
+        subprocess.run(["pg_ctl", "-D", os.path.join(self.dir, "data"), "-m", "immediate", "stop"],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+class TempReplica:
+    """Streaming hot standby of a TempPostgres cluster, cloned with pg_basebackup"""
+
+    def __init__(self, primary):
+        if not shutil.which("pg_basebackup"):
+            raise SystemExit("pg_basebackup not found on PATH; install PostgreSQL or pass --replica-url")
+        self.primary = primary
+        self.dir = tempfile.mkdtemp(prefix="freshlocal-pg-replica-")
+        self.port = free_port()
+        self.url = f"postgresql://postgres@127.0.0.1:{self.port}/freshlocal"
+
+    def start(self):
+        data_dir = os.path.join(self.dir, "data")
+        # -R writes standby.signal and primary_conninfo, so it starts streaming from the primary
+        run(["pg_basebackup", "-h", "127.0.0.1", "-p", str(self.primary.port), "-U", "postgres",
+             "-D", data_dir, "-R", "-X", "stream", "--no-sync"], quiet=True)
+        run(["pg_ctl", "-D", data_dir, "-l", os.path.join(self.dir, "postgres.log"), "-w", "start",
+             "-o", f"-p {self.port} -k {self.dir} -c fsync=off -c hot_standby_feedback=on"], quiet=True)
+        print(f"🐘 Streaming replica on port {self.port}")
+
+    def stop(self):
+        subprocess.run(["pg_ctl", "-D", os.path.join(self.dir, "data"), "-m", "immediate", "stop"],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+class ScratchDatabase:
+    """Fresh database on an existing server, dropped on stop"""
+
+    def __init__(self, server_url):
+        self.name = f"freshlocal_{uuid.uuid4().hex[:8]}"
+        parts = urlsplit(server_url)
+        self.admin_url = urlunsplit(parts._replace(path="/postgres"))
+        self.url = urlunsplit(parts._replace(path=f"/{self.name}"))
+
+    def execute(self, sql):
+        conn = perf_bench.connect(self.admin_url)
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(sql)
+        conn.close()
+
+    def start(self):
+        self.execute(f'CREATE DATABASE "{self.name}"')
+        print(f"🐘 Scratch database {self.name}")
+
+    def stop(self):
+        self.execute(f'DROP DATABASE IF EXISTS "{self.name}" WITH (FORCE)')
+
+
+def load_dataset(database_url, args):
+    """Migrate, run prisma/seed.js, then add synthetic rows up to the requested scale"""
+    env = dict(os.environ, DATABASE_URL=database_url)
+    run(["npx", "prisma", "migrate", "deploy"], env=env, quiet=True)
+    run(["node", "prisma/seed.js"], env=env, quiet=True)
+
+    if not (args.farmers or args.orders):
+        return
+
+    started = time.perf_counter()
+    rng = random.Random(args.seed)
+    conn = perf_bench.connect(database_url)
+    try:
+        farmer_ids = perf_bench.seed_farmers(conn, args.farmers, rng) if args.farmers else []
+        products = perf_bench.seed_products(conn, farmer_ids, args.products_per_farmer, rng) if farmer_ids else []
+        orders = 0
+        if args.orders and products:
+            buyer_ids = perf_bench.seed_buyers(conn, args.buyers, rng)
+            perf_bench.seed_orders(conn, buyer_ids, products, args.orders, rng)
+            orders = args.orders
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"🌾 Added {args.farmers} farmers, {len(products)} products, {orders} orders "
+          f"in {time.perf_counter() - started:.1f}s (seed {args.seed})")
+
+
+# ============ NEXT.JS ============
+
+def start_app(database_url, razorpay_url, port, prod, replica_url=None):
+    """Start the Next.js server in its own process group"""
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        JWT_SECRET=os.environ.get("JWT_SECRET", "local-test-jwt-secret"),
+        RAZORPAY_API_URL=razorpay_url,
+        RAZORPAY_KEY_ID=RAZORPAY_KEY_ID,
+        RAZORPAY_KEY_SECRET=RAZORPAY_KEY_SECRET,
+    )
+    if replica_url:
+        env["DATABASE_REPLICA_URL"] = replica_url
+    if prod:
+        run(["npx", "next", "build"], env=env, quiet=True)
+        cmd = ["npx", "next", "start", "--hostname", "127.0.0.1", "--port", str(port)]
+    else:
+        cmd = ["npx", "next", "dev", "--hostname", "127.0.0.1", "--port", str(port)]
+    print(f"$ {' '.join(cmd)}")
+    return subprocess.Popen(cmd, cwd=ROOT, env=env, start_new_session=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+
+
+def wait_for_api(base_url, process, timeout=180):
+    """Poll the API root until it answers"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Next.js exited early with code {process.returncode}")
+        try:
+            if requests.get(base_url, timeout=5).status_code == 200:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(1)
+    raise SystemExit(f"API at {base_url} did not come up within {timeout}s")
+
+
+def stop_app(process):
+    if process.poll() is None:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the API locally against a throwaway seeded database")
+    parser.add_argument("--database-url", help="existing PostgreSQL server to create a scratch database on")
+    parser.add_argument("--port", type=int, default=None, help="port for the Next.js server (default: random)")
+    parser.add_argument("--prod", action="store_true", help="next build + next start instead of next dev")
+    parser.add_argument("--farmers", type=int, default=0, help="extra synthetic approved farmers")
+    parser.add_argument("--products-per-farmer", type=int, default=10, help="products per synthetic farmer")
+    parser.add_argument("--buyers", type=int, default=1000, help="synthetic buyers placing the synthetic orders")
+    parser.add_argument("--orders", type=int, default=0, help="extra synthetic orders")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for the synthetic dataset")
+    parser.add_argument("--razorpay-latency-ms", type=int, default=0, help="delay injected by the Razorpay stub")
+    parser.add_argument("--razorpay-fail-rate", type=float, default=0.0, help="share of Razorpay stub calls answered with a 503")
+    parser.add_argument("--replica", action="store_true",
+                        help="also start a streaming replica and route read-heavy endpoints to it")
+    parser.add_argument("--replica-url", help="existing read replica of --database-url to route reads to")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="command to run with API_BASE_URL set (after --)")
+    args = parser.parse_args(argv)
+    if args.command and args.command[0] == "--":
+        args.command = args.command[1:]
+    if args.replica and args.database_url:
+        parser.error("--replica clones the temporary cluster; with --database-url pass --replica-url")
+    if args.replica_url and not args.database_url:
+        parser.error("--replica-url needs --database-url (the server it replicates)")
+    # Synthetic orders are placed by synthetic buyers on synthetic farmers' products
+    if args.orders and not (args.farmers and args.products_per_farmer and args.buyers):
+        parser.error("--orders needs --farmers, --products-per-farmer and --buyers above 0")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    database = ScratchDatabase(args.database_url) if args.database_url else TempPostgres()
+    stub = RazorpayStub(latency_ms=args.razorpay_latency_ms, fail_rate=args.razorpay_fail_rate, seed=args.seed)
+    port = args.port or free_port()
+    base_url = f"http://127.0.0.1:{port}/api"
+    replica = TempReplica(database) if args.replica else None
+    replica_url = None
+    app = None
+
+    database.start()
+    try:
+        load_dataset(database.url, args)
+        if replica:
+            # Cloned after seeding so the bulk load is not streamed row by row
+            replica.start()
+            replica_url = replica.url
+        elif args.replica_url:
+            # The scratch database reaches the replica through replication under the same name
+            replica_url = urlunsplit(urlsplit(args.replica_url)._replace(path=f"/{database.name}"))
+        stub.start()
+        app = start_app(database.url, stub.url, port, args.prod, replica_url=replica_url)
+        wait_for_api(base_url, app)
+        print(f"🚀 API ready at {base_url}" + (" (reads on the replica)" if replica_url else ""))
+
+        env = dict(os.environ, API_BASE_URL=base_url, DATABASE_URL=database.url,
+                   RAZORPAY_STUB_URL=stub.url, RAZORPAY_KEY_SECRET=RAZORPAY_KEY_SECRET)
+        if replica_url:
+            env["DATABASE_REPLICA_URL"] = replica_url
+        if args.command:
+            return subprocess.run(args.command, cwd=ROOT, env=env).returncode
+
+        print(f"\nexport API_BASE_URL={base_url}\nexport DATABASE_URL={database.url}\n\nPress Ctrl-C to stop.")
+        try:
+            app.wait()
+        except KeyboardInterrupt:
+            pass
+        return 0
+    finally:
+        if app is not None:
+            stop_app(app)
+        stub.stop()
+        if replica:
+            replica.stop()
+        database.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,8 @@ const nextConfig = {
   experimental: {
     // Remove if not using Server Components
     serverComponentsExternalPackages: ['mongodb'],
+    // instrumentation.js starts the background jobs
+    instrumentationHook: true,
   },
   webpack(config, { dev }) {
     if (dev) {
@@ -32,6 +34,7 @@ const nextConfig = {
           { key: "Access-Control-Allow-Origin", value: process.env.CORS_ORIGINS || "*" },
           { key: "Access-Control-Allow-Methods", value: "GET, POST, PUT, DELETE, OPTIONS" },
           { key: "Access-Control-Allow-Headers", value: "*" },
+          { key: "Access-Control-Expose-Headers", value: "X-Next-Cursor, ETag, Last-Modified" },
         ],
       },
     ];
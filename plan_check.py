@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Query Plan Regression Checks for Local Farmer Marketplace
+Runs EXPLAIN ANALYZE on the hot API queries against a seeded local PostgreSQL
+and fails when a plan falls back to a sequential scan on a large table or a
+query exceeds its latency budget
+
+Usage:
+    python local_server.py -- python plan_check.py
+    python local_server.py --farmers 5000 --orders 200000 -- python plan_check.py --no-seed
+    DATABASE_URL=postgresql://localhost/freshlocal python plan_check.py --budget-scale 2 --json plans.json
+
+The SQL mirrors what the route handlers send through Prisma. Unless --no-seed
+is given, "bench_" rows are seeded first (see perf_bench.py) and removed at the end.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+
+import perf_bench
+
+LIST_LIMIT = 51  # default page of 50 plus the look-ahead row
+
+
+# (name, budget in ms, SQL, params builder, tables allowed to be seq scanned)
+# Params builders take the sampled fixture dict and return the query parameters.
+HOT_QUERIES = [
+    ("login: user by email", 5, '''
+        SELECT * FROM "User" WHERE email = %s
+    ''', lambda f: (f["email"],), ()),
+    ("products: nearby, in stock", 25, '''
+        SELECT * FROM "Product"
+        WHERE quantity > 0 AND "farmerId" = ANY(%s)
+        ORDER BY "createdAt" DESC, id DESC LIMIT %s
+    ''', lambda f: (f["nearby_farmers"], LIST_LIMIT), ()),
+    ("products: nearby, in stock, category", 25, '''
+        SELECT * FROM "Product"
+        WHERE quantity > 0 AND "farmerId" = ANY(%s) AND category = %s
+        ORDER BY "createdAt" DESC, id DESC LIMIT %s
+    ''', lambda f: (f["nearby_farmers"], f["category"], LIST_LIMIT), ()),
+    ("products: catalog page", 10, '''
+        SELECT * FROM "Product" WHERE quantity > 0
+        ORDER BY "createdAt" DESC, id DESC LIMIT %s
+    ''', lambda f: (LIST_LIMIT,), ()),
+    ("products: category page", 10, '''
+        SELECT * FROM "Product" WHERE quantity > 0 AND category = %s
+        ORDER BY "createdAt" DESC, id DESC LIMIT %s
+    ''', lambda f: (f["category"], LIST_LIMIT), ()),
+    ("products: search", 50, '''
+        SELECT p.id, word_similarity(%s, p.name) AS relevance
+        FROM "Product" p JOIN "User" u ON u.id = p."farmerId"
+        WHERE p.quantity > 0 AND (p.name %%> %s OR p.name ILIKE %s)
+        ORDER BY relevance DESC, p.id LIMIT 500
+    ''', lambda f: ("tomato", "tomato", "%tomato%"), ()),
+    ("products/my", 10, '''
+        SELECT * FROM "Product" WHERE "farmerId" = %s ORDER BY "createdAt" DESC
+    ''', lambda f: (f["farmer_id"],), ()),
+    # Order listings default to the recent window, which prunes the monthly partitions
+    ("orders/buyer page", 10, '''
+        SELECT * FROM "Order" WHERE "buyerId" = %s AND "createdAt" >= %s
+        ORDER BY "createdAt" DESC, id DESC LIMIT %s
+    ''', lambda f: (f["buyer_id"], f["since"], LIST_LIMIT), ()),
+    ("orders/buyer page, history", 25, '''
+        SELECT * FROM "Order" WHERE "buyerId" = %s
+        ORDER BY "createdAt" DESC, id DESC LIMIT %s
+    ''', lambda f: (f["buyer_id"], LIST_LIMIT), ()),
+    ("orders/farmer page", 50, '''
+        SELECT * FROM "Order"
+        WHERE "createdAt" >= %s
+          AND (id, "createdAt") IN (SELECT "orderId", "createdAt" FROM "OrderItem"
+                                    WHERE "farmerId" = %s AND "createdAt" >= %s)
+        ORDER BY "createdAt" DESC, id DESC LIMIT %s
+    ''', lambda f: (f["since"], f["farmer_id"], f["since"], LIST_LIMIT), ()),
+    ("orders/farmer summary", 100, '''
+        SELECT o."orderStatus", COUNT(DISTINCT o.id), COALESCE(SUM(oi.quantity * oi.price), 0)
+        FROM "OrderItem" oi JOIN "Order" o ON o.id = oi."orderId" AND o."createdAt" = oi."createdAt"
+        WHERE oi."farmerId" = %s AND oi."createdAt" >= %s AND o."createdAt" >= %s
+        GROUP BY o."orderStatus"
+    ''', lambda f: (f["farmer_id"], f["since"], f["since"]), ()),
+    ("admin: pending farmers", 10, '''
+        SELECT * FROM "User" u LEFT JOIN "FarmerProfile" fp ON fp."userId" = u.id
+        WHERE u.role = 'farmer' AND u.approved = false
+        ORDER BY u."createdAt" DESC
+    ''', lambda f: (), ()),
+    ("admin: users page", 10, '''
+        SELECT * FROM "User" ORDER BY "createdAt" DESC, id DESC LIMIT %s
+    ''', lambda f: (LIST_LIMIT,), ()),
+    ("admin: products page", 10, '''
+        SELECT * FROM "Product" ORDER BY "createdAt" DESC, id DESC LIMIT %s
+    ''', lambda f: (LIST_LIMIT,), ()),
+    # Loads every approved farmer's coordinates, so scanning FarmerProfile is expected
+    ("farmer locations: approved farmers", 200, perf_bench.APPROVED_FARMER_LOCATIONS,
+     lambda f: (), ("FarmerProfile", "User")),
+    ("stats: pending approvals count", 10, '''
+        SELECT COUNT(*) FROM "User" WHERE role = 'farmer' AND approved = false
+    ''', lambda f: (), ()),
+]
+
+
+def sample_fixtures(conn, rng):
+    """Pick the ids the hot queries are parameterised with from whatever data is loaded"""
+    since = perf_bench.recent_orders_since()
+    with conn.cursor() as cur:
+        cur.execute('SELECT email FROM "User" ORDER BY random() LIMIT 1')
+        email = cur.fetchone()[0]
+        # Prefer ids with orders inside the listing window
+        cur.execute('''
+            SELECT "farmerId", "orderId", "createdAt" FROM "OrderItem"
+            ORDER BY "createdAt" >= %s DESC, random() LIMIT 1
+        ''', (since,))
+        row = cur.fetchone()
+        if row is None:
+            raise SystemExit("No orders in the database; seed some or drop --no-seed")
+        farmer_id = row[0]
+        cur.execute('SELECT "buyerId" FROM "Order" WHERE id = %s AND "createdAt" = %s', row[1:])
+        buyer_id = cur.fetchone()[0]
+        cur.execute('SELECT DISTINCT category FROM "Product"')
+        category = rng.choice(sorted(r[0] for r in cur.fetchall()))
+
+        lat, lon = perf_bench.random_location(rng, spread_km=20)
+        nearby_farmers = list(perf_bench.FarmerLocations(cur).within(lat, lon))
+    conn.rollback()
+    return {
+        "email": email,
+        "farmer_id": farmer_id,
+        "buyer_id": buyer_id,
+        "since": since,
+        "category": category,
+        "nearby_farmers": nearby_farmers,
+    }
+
+
+def walk_plan(node):
+    """Yield every node of an EXPLAIN (FORMAT JSON) plan tree"""
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk_plan(child)
+
+
+def table_sizes(conn):
+    """Estimated live rows per table and partition, from the statistics ANALYZE keeps;
+    partitioned tables get the sum of their partitions"""
+    with conn.cursor() as cur:
+        cur.execute('''
+            SELECT c.relname, c.reltuples::bigint
+            FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relkind IN ('r', 'p') AND n.nspname = current_schema()
+        ''')
+        sizes = dict(cur.fetchall())
+        cur.execute('''
+            SELECT p.relname, SUM(GREATEST(c.reltuples, 0))::bigint
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            JOIN pg_namespace n ON n.oid = p.relnamespace
+            WHERE p.relkind = 'p' AND n.nspname = current_schema()
+            GROUP BY p.relname
+        ''')
+        sizes.update(cur.fetchall())
+    conn.rollback()
+    return sizes
+
+
+def explain(conn, sql, params):
+    """EXPLAIN ANALYZE one query; returns (plan root, execution ms)"""
+    with conn.cursor() as cur:
+        cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+        result = cur.fetchone()[0][0]
+    conn.rollback()
+    return result["Plan"], result["Execution Time"]
+
+
+def check_query(conn, name, budget_ms, sql, params, allowed_seq, sizes, args):
+    """Run one hot query --runs times and judge its plan and latency"""
+    timings = []
+    for _ in range(args.runs):
+        plan, elapsed = explain(conn, sql, params)
+        timings.append(elapsed)
+
+    nodes = list(walk_plan(plan))
+    seq_scans = sorted({
+        node["Relation Name"] for node in nodes
+        if node["Node Type"] == "Seq Scan"
+        and node["Relation Name"] not in allowed_seq
+        and sizes.get(node["Relation Name"], 0) >= args.seq_scan_min_rows
+    })
+    indexes = sorted({node["Index Name"] for node in nodes if "Index Name" in node})
+    median = statistics.median(timings)
+    budget = budget_ms * args.budget_scale
+
+    problems = []
+    if seq_scans:
+        problems.append(f"seq scan on {', '.join(seq_scans)}")
+    if median > budget:
+        problems.append(f"median {median:.2f} ms over budget {budget:.0f} ms")
+
+    status = "❌" if problems else "✅"
+    print(f"{status} {name:<38} {median:8.2f} ms (budget {budget:5.0f})   "
+          f"{', '.join(indexes) or 'no index'}")
+    for problem in problems:
+        print(f"   ↳ {problem}")
+    return {
+        "query": name,
+        "median_ms": median,
+        "budget_ms": budget,
+        "indexes": indexes,
+        "seq_scans": seq_scans,
+        "ok": not problems,
+    }
+
+
+def seed(conn, args, rng):
+    """Add a bench dataset large enough that the planner prefers indexes"""
+    farmer_ids = perf_bench.seed_farmers(conn, args.farmers, rng)
+    buyer_ids = perf_bench.seed_buyers(conn, args.buyers, rng)
+    products = perf_bench.seed_products(conn, farmer_ids, args.products_per_farmer, rng)
+    perf_bench.seed_orders(conn, buyer_ids, products, args.orders, rng)
+    # Some sold-out stock, so the in-stock partial indexes are exercised
+    with conn.cursor() as cur:
+        cur.execute('''
+            UPDATE "Product" SET quantity = 0
+            WHERE id IN (SELECT p.id FROM "Product" p JOIN "User" u ON u.id = p."farmerId"
+                         WHERE u.email LIKE %s AND random() < 0.2)
+        ''', (perf_bench.BENCH_PREFIX + "%",))
+    conn.commit()
+    print(f"🌾 Seeded {args.farmers} farmers, {len(products)} products, {args.buyers} buyers, {args.orders} orders")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE the hot API queries and check plans and budgets")
+    parser.add_argument("--no-seed", action="store_true", help="check against the data already loaded")
+    parser.add_argument("--farmers", type=int, default=5000, help="bench farmers to seed")
+    parser.add_argument("--products-per-farmer", type=int, default=10, help="products per bench farmer")
+    parser.add_argument("--buyers", type=int, default=5000, help="bench buyers to seed")
+    parser.add_argument("--orders", type=int, default=100000, help="bench orders to seed")
+    parser.add_argument("--runs", type=int, default=5, help="EXPLAIN ANALYZE runs per query (median is judged)")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiply every latency budget (slow machines)")
+    parser.add_argument("--seq-scan-min-rows", type=int, default=5000,
+                        help="sequential scans are only flagged on tables at least this large")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for the dataset and sampled parameters")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to a JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = random.Random(args.seed)
+    conn = perf_bench.connect()
+    try:
+        if not args.no_seed:
+            perf_bench.cleanup(conn)
+            seed(conn, args, rng)
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE")
+        conn.commit()
+
+        sizes = table_sizes(conn)
+        fixtures = sample_fixtures(conn, rng)
+        print(f"\n=== Hot query plans ({sizes.get('Product', 0)} products, {sizes.get('Order', 0)} orders) ===")
+        results = [
+            check_query(conn, name, budget, sql, build(fixtures), allowed_seq, sizes, args)
+            for name, budget, sql, build, allowed_seq in HOT_QUERIES
+        ]
+    finally:
+        if not args.no_seed:
+            perf_bench.cleanup(conn)
+        conn.close()
+
+    failed = [r for r in results if not r["ok"]]
+    print(f"\n📊 {len(results) - len(failed)}/{len(results)} hot queries within plan and latency budget")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2 @@
+-- CreateIndex
+CREATE INDEX "FarmerProfile_latitude_longitude_idx" ON "FarmerProfile"("latitude", "longitude");
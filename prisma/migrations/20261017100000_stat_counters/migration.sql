@@ -0,0 +1,18 @@
+-- CreateTable
+CREATE TABLE "StatCounter" (
+    "key" TEXT NOT NULL,
+    "value" INTEGER NOT NULL DEFAULT 0,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "StatCounter_pkey" PRIMARY KEY ("key")
+);
+
+-- CreateTable
+CREATE TABLE "DailyOrderStat" (
+    "day" DATE NOT NULL,
+    "orders" INTEGER NOT NULL DEFAULT 0,
+    "gmv" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "DailyOrderStat_pkey" PRIMARY KEY ("day")
+);
@@ -0,0 +1,29 @@
+-- AlterTable
+ALTER TABLE "Order" ADD COLUMN "idempotencyKey" TEXT;
+
+-- CreateTable
+CREATE TABLE "PaymentOutbox" (
+    "id" TEXT NOT NULL,
+    "orderId" TEXT NOT NULL,
+    "amount" INTEGER NOT NULL,
+    "status" TEXT NOT NULL DEFAULT 'pending',
+    "attempts" INTEGER NOT NULL DEFAULT 0,
+    "nextAttemptAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "lastError" TEXT,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "PaymentOutbox_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "Order_buyerId_idempotencyKey_key" ON "Order"("buyerId", "idempotencyKey");
+
+-- CreateIndex
+CREATE UNIQUE INDEX "PaymentOutbox_orderId_key" ON "PaymentOutbox"("orderId");
+
+-- CreateIndex
+CREATE INDEX "PaymentOutbox_status_nextAttemptAt_idx" ON "PaymentOutbox"("status", "nextAttemptAt");
+
+-- AddForeignKey
+ALTER TABLE "PaymentOutbox" ADD CONSTRAINT "PaymentOutbox_orderId_fkey" FOREIGN KEY ("orderId") REFERENCES "Order"("id") ON DELETE CASCADE ON UPDATE CASCADE;
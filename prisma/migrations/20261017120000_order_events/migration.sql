@@ -0,0 +1,22 @@
+-- CreateTable
+CREATE TABLE "OrderEvent" (
+    "id" SERIAL NOT NULL,
+    "type" TEXT NOT NULL,
+    "orderId" TEXT NOT NULL,
+    "buyerId" TEXT NOT NULL,
+    "farmerIds" TEXT[],
+    "orderStatus" TEXT NOT NULL,
+    "paymentStatus" TEXT NOT NULL,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "OrderEvent_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "OrderEvent_buyerId_id_idx" ON "OrderEvent"("buyerId", "id");
+
+-- CreateIndex
+CREATE INDEX "OrderEvent_farmerIds_idx" ON "OrderEvent" USING GIN ("farmerIds");
+
+-- CreateIndex
+CREATE INDEX "OrderEvent_createdAt_idx" ON "OrderEvent"("createdAt");
@@ -0,0 +1,50 @@
+-- DropIndex
+-- Duplicate of the unique index "User_email_key"
+DROP INDEX "User_email_idx";
+
+-- DropIndex
+DROP INDEX "User_role_idx";
+
+-- DropIndex
+DROP INDEX "Product_farmerId_idx";
+
+-- DropIndex
+DROP INDEX "Product_category_idx";
+
+-- DropIndex
+DROP INDEX "Order_buyerId_idx";
+
+-- DropIndex
+DROP INDEX "OrderItem_farmerId_idx";
+
+-- CreateIndex
+-- Pending approvals, approved-farmer loads and the stats counts
+CREATE INDEX "User_role_approved_createdAt_idx" ON "User"("role", "approved", "createdAt" DESC);
+
+-- CreateIndex
+-- GET /api/admin/users keyset pages
+CREATE INDEX "User_createdAt_id_idx" ON "User"("createdAt" DESC, "id" DESC);
+
+-- CreateIndex
+-- GET /api/products/my (all of a farmer's products, newest first)
+CREATE INDEX "Product_farmerId_createdAt_idx" ON "Product"("farmerId", "createdAt" DESC);
+
+-- CreateIndex
+-- Nearby catalog: farmerId IN (...) AND quantity > 0 ORDER BY createdAt, id.
+-- Partial, so sold-out rows never enter the scan.
+CREATE INDEX "Product_farmerId_createdAt_in_stock_idx" ON "Product"("farmerId", "createdAt" DESC, "id" DESC) WHERE "quantity" > 0;
+
+-- CreateIndex
+CREATE INDEX "Product_category_createdAt_in_stock_idx" ON "Product"("category", "createdAt" DESC, "id" DESC) WHERE "quantity" > 0;
+
+-- CreateIndex
+-- Unfiltered catalog and GET /api/admin/products keyset pages
+CREATE INDEX "Product_createdAt_id_idx" ON "Product"("createdAt" DESC, "id" DESC);
+
+-- CreateIndex
+CREATE INDEX "Order_buyerId_createdAt_id_idx" ON "Order"("buyerId", "createdAt" DESC, "id" DESC);
+
+-- CreateIndex
+-- Farmer order lists and summaries; orderId makes the "orders with my items"
+-- subquery index-only
+CREATE INDEX "OrderItem_farmerId_createdAt_orderId_idx" ON "OrderItem"("farmerId", "createdAt" DESC, "orderId");
@@ -0,0 +1,242 @@
+-- Range-partition "Order" and "OrderItem" by month of "createdAt", so order
+-- listings limited to recent months only touch recent partitions, and add
+-- cold archive tables for old fulfilled orders (see lib/order-archive.js).
+--
+-- Unique constraints on a partitioned table must include the partition key:
+-- both primary keys become ("id", "createdAt"), items reference their order by
+-- ("orderId", "createdAt") and therefore always share its month, and the
+-- per-buyer Idempotency-Key uniqueness moves to "OrderIdempotencyKey".
+
+-- DropForeignKey
+ALTER TABLE "Order" DROP CONSTRAINT "Order_buyerId_fkey";
+
+-- DropForeignKey
+ALTER TABLE "OrderItem" DROP CONSTRAINT "OrderItem_orderId_fkey";
+
+-- DropForeignKey
+ALTER TABLE "OrderItem" DROP CONSTRAINT "OrderItem_productId_fkey";
+
+-- DropForeignKey
+ALTER TABLE "PaymentOutbox" DROP CONSTRAINT "PaymentOutbox_orderId_fkey";
+
+-- RenameTable
+ALTER TABLE "Order" RENAME TO "Order_unpartitioned";
+
+-- RenameTable
+ALTER TABLE "OrderItem" RENAME TO "OrderItem_unpartitioned";
+
+-- CreateTable
+CREATE TABLE "Order" (
+    "id" TEXT NOT NULL,
+    "buyerId" TEXT NOT NULL,
+    "paymentMode" TEXT NOT NULL,
+    "paymentStatus" TEXT NOT NULL DEFAULT 'pending',
+    "orderStatus" TEXT NOT NULL DEFAULT 'new',
+    "razorpayOrderId" TEXT,
+    "razorpayPaymentId" TEXT,
+    "idempotencyKey" TEXT,
+    "totalAmount" DOUBLE PRECISION NOT NULL,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updatedAt" TIMESTAMP(3) NOT NULL
+) PARTITION BY RANGE ("createdAt");
+
+-- CreateTable
+CREATE TABLE "OrderItem" (
+    "id" TEXT NOT NULL,
+    "orderId" TEXT NOT NULL,
+    "productId" TEXT NOT NULL,
+    "quantity" DOUBLE PRECISION NOT NULL,
+    "price" DOUBLE PRECISION NOT NULL,
+    "farmerId" TEXT NOT NULL,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+) PARTITION BY RANGE ("createdAt");
+
+-- CreatePartition
+-- Catches rows for months without a partition; should stay empty
+CREATE TABLE "Order_default" PARTITION OF "Order" DEFAULT;
+
+-- CreatePartition
+CREATE TABLE "OrderItem_default" PARTITION OF "OrderItem" DEFAULT;
+
+-- CreateFunction
+-- Creates the missing monthly partitions ("Order_p2026_10", "OrderItem_p2026_10")
+-- for every month from from_ts to to_ts and returns how many were created.
+-- Called here, by the maintenance job ahead of time and by the data loaders
+-- before they insert history. A month whose rows already sit in the default
+-- partition is skipped with a warning.
+CREATE FUNCTION ensure_order_partitions(from_ts TIMESTAMP(3), to_ts TIMESTAMP(3))
+RETURNS INTEGER AS $$
+DECLARE
+    month_start TIMESTAMP(3) := date_trunc('month', from_ts);
+    month_end TIMESTAMP(3);
+    parent_name TEXT;
+    part_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= to_ts LOOP
+        month_end := month_start + INTERVAL '1 month';
+        FOREACH parent_name IN ARRAY ARRAY['Order', 'OrderItem'] LOOP
+            part_name := parent_name || to_char(month_start, '"_p"YYYY_MM');
+            IF to_regclass(format('%I', part_name)) IS NULL THEN
+                BEGIN
+                    EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                                   part_name, parent_name, month_start, month_end);
+                    created := created + 1;
+                EXCEPTION
+                    WHEN duplicate_table THEN NULL;
+                    WHEN check_violation THEN
+                        RAISE WARNING 'rows for % are in the default partition of %; not creating %',
+                            to_char(month_start, 'YYYY-MM'), parent_name, part_name;
+                END;
+            END IF;
+        END LOOP;
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- CreatePartition
+SELECT ensure_order_partitions(
+    COALESCE((SELECT MIN("createdAt") FROM "Order_unpartitioned"), CURRENT_TIMESTAMP::TIMESTAMP(3)),
+    (CURRENT_TIMESTAMP + INTERVAL '3 months')::TIMESTAMP(3)
+);
+
+-- CopyData
+INSERT INTO "Order" ("id", "buyerId", "paymentMode", "paymentStatus", "orderStatus", "razorpayOrderId",
+                     "razorpayPaymentId", "idempotencyKey", "totalAmount", "createdAt", "updatedAt")
+SELECT "id", "buyerId", "paymentMode", "paymentStatus", "orderStatus", "razorpayOrderId",
+       "razorpayPaymentId", "idempotencyKey", "totalAmount", "createdAt", "updatedAt"
+FROM "Order_unpartitioned";
+
+-- CopyData
+-- Items take their order's timestamp so they land in the same month
+INSERT INTO "OrderItem" ("id", "orderId", "productId", "quantity", "price", "farmerId", "createdAt")
+SELECT oi."id", oi."orderId", oi."productId", oi."quantity", oi."price", oi."farmerId", o."createdAt"
+FROM "OrderItem_unpartitioned" oi
+JOIN "Order_unpartitioned" o ON o."id" = oi."orderId";
+
+-- AlterTable
+ALTER TABLE "PaymentOutbox" ADD COLUMN "orderCreatedAt" TIMESTAMP(3);
+
+UPDATE "PaymentOutbox" p
+SET "orderCreatedAt" = o."createdAt"
+FROM "Order_unpartitioned" o
+WHERE o."id" = p."orderId";
+
+ALTER TABLE "PaymentOutbox" ALTER COLUMN "orderCreatedAt" SET NOT NULL;
+
+-- CreateTable
+CREATE TABLE "OrderIdempotencyKey" (
+    "buyerId" TEXT NOT NULL,
+    "key" TEXT NOT NULL,
+    "orderId" TEXT NOT NULL,
+    "orderCreatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "OrderIdempotencyKey_pkey" PRIMARY KEY ("buyerId", "key")
+);
+
+INSERT INTO "OrderIdempotencyKey" ("buyerId", "key", "orderId", "orderCreatedAt")
+SELECT "buyerId", "idempotencyKey", "id", "createdAt"
+FROM "Order_unpartitioned"
+WHERE "idempotencyKey" IS NOT NULL;
+
+-- DropTable
+DROP TABLE "OrderItem_unpartitioned";
+
+-- DropTable
+DROP TABLE "Order_unpartitioned";
+
+-- AddPrimaryKey
+ALTER TABLE "Order" ADD CONSTRAINT "Order_pkey" PRIMARY KEY ("id", "createdAt");
+
+-- AddPrimaryKey
+ALTER TABLE "OrderItem" ADD CONSTRAINT "OrderItem_pkey" PRIMARY KEY ("id", "createdAt");
+
+-- CreateTable
+CREATE TABLE "OrderArchive" (
+    "id" TEXT NOT NULL,
+    "buyerId" TEXT NOT NULL,
+    "paymentMode" TEXT NOT NULL,
+    "paymentStatus" TEXT NOT NULL,
+    "orderStatus" TEXT NOT NULL,
+    "razorpayOrderId" TEXT,
+    "razorpayPaymentId" TEXT,
+    "idempotencyKey" TEXT,
+    "totalAmount" DOUBLE PRECISION NOT NULL,
+    "createdAt" TIMESTAMP(3) NOT NULL,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+    "archivedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "OrderArchive_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateTable
+CREATE TABLE "OrderItemArchive" (
+    "id" TEXT NOT NULL,
+    "orderId" TEXT NOT NULL,
+    "productId" TEXT NOT NULL,
+    "quantity" DOUBLE PRECISION NOT NULL,
+    "price" DOUBLE PRECISION NOT NULL,
+    "farmerId" TEXT NOT NULL,
+    "createdAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "OrderItemArchive_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "Order_buyerId_createdAt_id_idx" ON "Order"("buyerId", "createdAt" DESC, "id" DESC);
+
+-- CreateIndex
+CREATE INDEX "OrderItem_orderId_createdAt_idx" ON "OrderItem"("orderId", "createdAt");
+
+-- CreateIndex
+CREATE INDEX "OrderItem_productId_idx" ON "OrderItem"("productId");
+
+-- CreateIndex
+CREATE INDEX "OrderItem_farmerId_createdAt_orderId_idx" ON "OrderItem"("farmerId", "createdAt" DESC, "orderId");
+
+-- DropIndex
+DROP INDEX "PaymentOutbox_orderId_key";
+
+-- CreateIndex
+CREATE UNIQUE INDEX "PaymentOutbox_orderId_orderCreatedAt_key" ON "PaymentOutbox"("orderId", "orderCreatedAt");
+
+-- CreateIndex
+CREATE UNIQUE INDEX "OrderIdempotencyKey_orderId_orderCreatedAt_key" ON "OrderIdempotencyKey"("orderId", "orderCreatedAt");
+
+-- CreateIndex
+CREATE INDEX "OrderArchive_buyerId_createdAt_id_idx" ON "OrderArchive"("buyerId", "createdAt" DESC, "id" DESC);
+
+-- CreateIndex
+CREATE INDEX "OrderItemArchive_orderId_idx" ON "OrderItemArchive"("orderId");
+
+-- CreateIndex
+CREATE INDEX "OrderItemArchive_productId_idx" ON "OrderItemArchive"("productId");
+
+-- CreateIndex
+CREATE INDEX "OrderItemArchive_farmerId_createdAt_orderId_idx" ON "OrderItemArchive"("farmerId", "createdAt" DESC, "orderId");
+
+-- AddForeignKey
+ALTER TABLE "Order" ADD CONSTRAINT "Order_buyerId_fkey" FOREIGN KEY ("buyerId") REFERENCES "User"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "OrderItem" ADD CONSTRAINT "OrderItem_orderId_createdAt_fkey" FOREIGN KEY ("orderId", "createdAt") REFERENCES "Order"("id", "createdAt") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "OrderItem" ADD CONSTRAINT "OrderItem_productId_fkey" FOREIGN KEY ("productId") REFERENCES "Product"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "PaymentOutbox" ADD CONSTRAINT "PaymentOutbox_orderId_orderCreatedAt_fkey" FOREIGN KEY ("orderId", "orderCreatedAt") REFERENCES "Order"("id", "createdAt") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "OrderIdempotencyKey" ADD CONSTRAINT "OrderIdempotencyKey_orderId_orderCreatedAt_fkey" FOREIGN KEY ("orderId", "orderCreatedAt") REFERENCES "Order"("id", "createdAt") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "OrderArchive" ADD CONSTRAINT "OrderArchive_buyerId_fkey" FOREIGN KEY ("buyerId") REFERENCES "User"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "OrderItemArchive" ADD CONSTRAINT "OrderItemArchive_orderId_fkey" FOREIGN KEY ("orderId") REFERENCES "OrderArchive"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "OrderItemArchive" ADD CONSTRAINT "OrderItemArchive_productId_fkey" FOREIGN KEY ("productId") REFERENCES "Product"("id") ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,4 @@
+-- The nearby lookup scans the in-process table in lib/farmer-locations.js, which
+-- loads every approved farmer; nothing filters FarmerProfile by coordinates.
+-- DropIndex
+DROP INDEX "FarmerProfile_latitude_longitude_idx";
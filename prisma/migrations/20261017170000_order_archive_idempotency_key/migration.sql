@@ -0,0 +1,5 @@
+-- Archiving an order cascades to its "OrderIdempotencyKey" row; the archived
+-- copy keeps the key, and this index keeps it unique per buyer and makes the
+-- replay lookup in POST /api/orders an index probe.
+-- CreateIndex
+CREATE UNIQUE INDEX "OrderArchive_buyerId_idempotencyKey_key" ON "OrderArchive"("buyerId", "idempotencyKey");
@@ -0,0 +1,4 @@
+-- Restores the index 20261017160000 dropped: lib/farmer-locations.js answers
+-- nearby lookups with a bounding-box query on it until its grid table has loaded.
+-- CreateIndex
+CREATE INDEX "FarmerProfile_latitude_longitude_idx" ON "FarmerProfile"("latitude", "longitude");
@@ -6,6 +6,7 @@ const prisma = new PrismaClient();
 async function main() {
   await prisma.$transaction([
     prisma.order.deleteMany(),
+    prisma.orderArchive.deleteMany(),
     prisma.product.deleteMany(),
     prisma.user.deleteMany(),
   ]);
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Delivery Radius Coverage Analysis for Local Farmer Marketplace
+Loads every buyer and approved farmer location, counts the farmers each buyer
+can reach within the 10 km radius (vectorized haversine with NumPy), and
+reports coverage gaps plus what-if tables for other radii
+
+Usage:
+    DATABASE_URL=postgresql://localhost/freshlocal python radius_coverage.py
+    python radius_coverage.py --radii 5 10 15 20 --in-stock --json coverage.json
+    python radius_coverage.py --per-buyer buyers.csv --gap-cell-km 5
+
+Buyers are sorted into latitude strips and taken --buyer-chunk at a time, so
+each chunk only meets the farmers inside its bounding box grown by the largest
+radius; distances are computed in tiles of at most --max-cells pairs, keeping
+memory bounded for millions of buyers. The result is cross-checked against
+lib/gps.calculateDistance (run through node when available) on sampled pairs
+and buyers.
+Requires numpy and psycopg2.
+"""
+
+import argparse
+import csv
+import json
+import math
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+import perf_bench
+
+ROOT = Path(__file__).resolve().parent
+
+APP_RADIUS_KM = 10
+
+EARTH_RADIUS_KM = perf_bench.EARTH_RADIUS_KM
+
+# Evaluates lib/gps.calculateDistance on [[lat1, lon1, lat2, lon2], ...] from stdin
+NODE_DISTANCE_SCRIPT = """
+import { readFileSync } from 'fs';
+import { calculateDistance } from './lib/gps.js';
+const pairs = JSON.parse(readFileSync(0, 'utf8'));
+console.log(JSON.stringify(pairs.map(pair => calculateDistance(...pair))));
+"""
+
+
+# ============ LOADING ============
+
+def load_buyers(conn):
+    """(ids, cities, lat, lon) of every buyer profile with a location"""
+    with conn.cursor() as cur:
+        cur.execute('''
+            SELECT "userId", COALESCE(city, ''), latitude, longitude
+            FROM "BuyerProfile"
+            WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+        ''')
+        rows = cur.fetchall()
+    conn.rollback()
+    ids = [r[0] for r in rows]
+    cities = [r[1] for r in rows]
+    coords = np.array([(r[2], r[3]) for r in rows], dtype=np.float64).reshape(-1, 2)
+    return ids, cities, coords[:, 0], coords[:, 1]
+
+
+def load_farmers(conn, in_stock):
+    """(lat, lon) of every approved farmer the nearby product list would consider"""
+    stock_filter = '''
+        AND EXISTS (SELECT 1 FROM "Product" p WHERE p."farmerId" = fp."userId" AND p.quantity > 0)
+    ''' if in_stock else ''
+    with conn.cursor() as cur:
+        cur.execute(f'''
+            SELECT fp.latitude, fp.longitude
+            FROM "FarmerProfile" fp JOIN "User" u ON u.id = fp."userId"
+            WHERE u.role = 'farmer' AND u.approved = true
+              AND fp.latitude IS NOT NULL AND fp.longitude IS NOT NULL
+              {stock_filter}
+        ''')
+        coords = np.array(cur.fetchall(), dtype=np.float64).reshape(-1, 2)
+    conn.rollback()
+    return coords[:, 0], coords[:, 1]
+
+
+# ============ DISTANCES ============
+
+def haversine(d_lat, d_lon, cos1, cos2):
+    """Haversine km from radian deltas and cos(lat) of both ends, as lib/gps.calculateDistance"""
+    a = np.sin(d_lat / 2) ** 2 + cos1 * cos2 * np.sin(d_lon / 2) ** 2
+    np.clip(a, 0.0, 1.0, out=a)
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def haversine_matrix(lat1, lon1, cos1, lat2, lon2, cos2):
+    """Pairwise km between two point sets given in radians, with cos(lat) precomputed"""
+    return haversine(lat2[np.newaxis, :] - lat1[:, np.newaxis], lon2[np.newaxis, :] - lon1[:, np.newaxis],
+                     cos1[:, np.newaxis], cos2[np.newaxis, :])
+
+
+def reachable_counts(b_lat, b_lon, f_lat, f_lon, radii, max_cells, buyer_chunk):
+    """Farmers within each radius of every buyer, and the nearest farmer's distance
+    (inf when none is within the largest radius).
+
+    Returns (counts[n_buyers, n_radii] int32, nearest_km[n_buyers] float64)."""
+    radii = np.asarray(radii, dtype=np.float64)
+    max_radius = radii.max()
+    counts = np.zeros((len(b_lat), len(radii)), dtype=np.int32)
+    nearest = np.full(len(b_lat), np.inf)
+    if len(b_lat) == 0 or len(f_lat) == 0:
+        return counts, nearest
+
+    f_order = np.argsort(f_lat)
+    f_lat_deg = f_lat[f_order]
+    f_lon_deg = f_lon[f_order]
+    f_lat_r = np.radians(f_lat_deg)
+    f_lon_r = np.radians(f_lon_deg)
+    f_cos = np.cos(f_lat_r)
+
+    # Buyers in latitude strips as tall as the largest radius, west to east within
+    # a strip, so each chunk covers a small box
+    lat_delta = math.degrees(max_radius / EARTH_RADIUS_KM)
+    b_order = np.lexsort((b_lon, np.floor(b_lat / lat_delta)))
+    b_lat_r = np.radians(b_lat)
+    b_lon_r = np.radians(b_lon)
+    b_cos = np.cos(b_lat_r)
+
+    for start in range(0, len(b_order), buyer_chunk):
+        idx = b_order[start:start + buyer_chunk]
+        lat_min, lat_max = b_lat[idx].min(), b_lat[idx].max()
+        lon_min, lon_max = b_lon[idx].min(), b_lon[idx].max()
+        lon_delta = lat_delta / max(math.cos(math.radians(max(abs(lat_min), abs(lat_max)) + lat_delta)), 0.01)
+
+        # Farmers inside the chunk's box grown by the largest radius (lib/gps.getBoundingBox)
+        lo = np.searchsorted(f_lat_deg, lat_min - lat_delta, side="left")
+        hi = np.searchsorted(f_lat_deg, lat_max + lat_delta, side="right")
+        band_lon = f_lon_deg[lo:hi]
+        candidates = lo + np.flatnonzero((band_lon >= lon_min - lon_delta) & (band_lon <= lon_max + lon_delta))
+        if len(candidates) == 0:
+            continue
+
+        chunk_counts = np.zeros((len(idx), len(radii)), dtype=np.int32)
+        chunk_nearest = np.full(len(idx), np.inf)
+        farmer_tile = max(1, max_cells // len(idx))
+        for f_start in range(0, len(candidates), farmer_tile):
+            tile = candidates[f_start:f_start + farmer_tile]
+            d = haversine_matrix(b_lat_r[idx], b_lon_r[idx], b_cos[idx], f_lat_r[tile], f_lon_r[tile], f_cos[tile])
+            np.minimum(chunk_nearest, d.min(axis=1), out=chunk_nearest)
+            for k, radius in enumerate(radii):
+                chunk_counts[:, k] += np.count_nonzero(d <= radius, axis=1)
+        counts[idx] = chunk_counts
+        nearest[idx] = chunk_nearest
+
+    # Farmers outside the box were never compared
+    nearest[nearest > max_radius] = np.inf
+    return counts, nearest
+
+
+# ============ CROSS-CHECK ============
+
+def reference_distances(pairs):
+    """lib/gps.calculateDistance for each pair, via node; falls back to the Python mirror"""
+    try:
+        result = subprocess.run(["node", "--input-type=module", "-e", NODE_DISTANCE_SCRIPT],
+                                input=json.dumps(pairs), capture_output=True, text=True, cwd=ROOT, timeout=60)
+        if result.returncode == 0:
+            return json.loads(result.stdout), "lib/gps.js (node)"
+    except (OSError, subprocess.TimeoutExpired, ValueError):
+        pass
+    return [perf_bench.calculate_distance(*pair) for pair in pairs], "perf_bench.calculate_distance"
+
+
+def cross_check(b_lat, b_lon, f_lat, f_lon, counts, radii, rng, args):
+    """Compare the vectorized distances and counts with the app's haversine; returns problems found"""
+    problems = []
+    if len(b_lat) == 0 or len(f_lat) == 0:
+        return problems
+
+    # Pairwise distances on random buyer/farmer pairs, biased towards close ones
+    pairs = []
+    for _ in range(args.check_pairs):
+        b = rng.randrange(len(b_lat))
+        f = rng.randrange(len(f_lat))
+        pairs.append([float(b_lat[b]), float(b_lon[b]), float(f_lat[f]), float(f_lon[f])])
+        pairs.append([float(b_lat[b]), float(b_lon[b]),
+                      float(b_lat[b]) + rng.uniform(-0.1, 0.1), float(b_lon[b]) + rng.uniform(-0.1, 0.1)])
+    expected, source = reference_distances(pairs)
+    p = np.radians(np.array(pairs))
+    actual = haversine(p[:, 2] - p[:, 0], p[:, 3] - p[:, 1], np.cos(p[:, 0]), np.cos(p[:, 2]))
+    worst = float(np.max(np.abs(actual - np.array(expected))))
+    print(f"  {len(pairs)} pairs vs {source}: max difference {worst * 1000:.6f} m")
+    if worst > 1e-6:
+        problems.append(f"distance differs from {source} by {worst * 1000:.3f} m")
+
+    # Full per-buyer counts for a few buyers, brute force over every farmer
+    radius_index = list(radii).index(args.radius)
+    sample = rng.sample(range(len(b_lat)), min(args.check_buyers, len(b_lat)))
+    mismatched = 0
+    for b in sample:
+        brute = sum(
+            1 for f in range(len(f_lat))
+            if perf_bench.calculate_distance(b_lat[b], b_lon[b], f_lat[f], f_lon[f]) <= args.radius
+        )
+        if brute != counts[b, radius_index]:
+            mismatched += 1
+    print(f"  {len(sample)} buyers brute-forced at {args.radius:g} km: {mismatched} count mismatches")
+    if mismatched:
+        problems.append(f"{mismatched}/{len(sample)} sampled buyers have a different reachable-farmer count")
+    return problems
+
+
+# ============ REPORTING ============
+
+def what_if_table(counts, radii, f_total):
+    rows = []
+    for k, radius in enumerate(radii):
+        column = counts[:, k]
+        rows.append({
+            "radius_km": float(radius),
+            "covered_pct": float(np.mean(column > 0) * 100) if len(column) else 0.0,
+            "thin_pct": float(np.mean((column > 0) & (column < 3)) * 100) if len(column) else 0.0,
+            "mean_farmers": float(column.mean()) if len(column) else 0.0,
+            "p50_farmers": float(np.percentile(column, 50)) if len(column) else 0.0,
+            "p90_farmers": float(np.percentile(column, 90)) if len(column) else 0.0,
+            "max_farmers": int(column.max()) if len(column) else 0,
+            # Share of all farmers the nearby query loads for an average buyer
+            "mean_share_pct": float(column.mean() / f_total * 100) if len(column) and f_total else 0.0,
+        })
+    return rows
+
+
+def gap_cells(b_lat, b_lon, covered, cell_km, top):
+    """Grid cells holding the most buyers with no farmer in range: where to recruit farmers"""
+    cell_deg = cell_km / 111.0
+    cells = defaultdict(lambda: [0, 0, 0.0, 0.0])
+    for i in np.flatnonzero(~covered):
+        key = (int(b_lat[i] // cell_deg), int(b_lon[i] // cell_deg))
+        cell = cells[key]
+        cell[0] += 1
+        cell[2] += b_lat[i]
+        cell[3] += b_lon[i]
+    ranked = sorted(cells.values(), key=lambda c: -c[0])[:top]
+    return [{"buyers": c[0], "latitude": round(c[2] / c[0], 4), "longitude": round(c[3] / c[0], 4)}
+            for c in ranked]
+
+
+def city_gaps(cities, covered):
+    totals, uncovered = defaultdict(int), defaultdict(int)
+    for city, ok in zip(cities, covered):
+        totals[city] += 1
+        if not ok:
+            uncovered[city] += 1
+    return sorted(({"city": city or "(none)", "buyers": totals[city], "uncovered": uncovered[city],
+                    "uncovered_pct": uncovered[city] / totals[city] * 100}
+                   for city in totals if uncovered[city]),
+                  key=lambda row: -row["uncovered"])
+
+
+def print_report(report, top):
+    print("\n" + "=" * 70)
+    print(f"📊 RADIUS COVERAGE ({report['buyers']} buyers, {report['farmers']} farmers"
+          f"{', in stock' if report['in_stock'] else ''})")
+    print("=" * 70)
+    print(f"{'Radius':>7} {'Covered':>9} {'Thin(<3)':>9} {'Mean':>8} {'p50':>6} {'p90':>6} {'Max':>6} {'Loaded':>8}")
+    for row in report["what_if"]:
+        marker = "  ← app" if row["radius_km"] == report["radius_km"] else ""
+        print(f"{row['radius_km']:>5g}km {row['covered_pct']:>8.1f}% {row['thin_pct']:>8.1f}% "
+              f"{row['mean_farmers']:>8.1f} {row['p50_farmers']:>6.0f} {row['p90_farmers']:>6.0f} "
+              f"{row['max_farmers']:>6} {row['mean_share_pct']:>7.2f}%{marker}")
+
+    gaps = report["gaps"]
+    print(f"\n🕳️  {gaps['uncovered']} buyers ({gaps['uncovered_pct']:.1f}%) have no farmer within {report['radius_km']:g} km")
+    if gaps["nearest_km_p50"] is not None:
+        print(f"   nearest farmer for them: p50 {gaps['nearest_km_p50']:.1f} km, "
+              f"{gaps['beyond_max_radius']} beyond {max(report['radii']):g} km")
+    for row in gaps["cities"][:top]:
+        print(f"   {row['city']:<16} {row['uncovered']:>8} of {row['buyers']:<8} ({row['uncovered_pct']:.1f}%)")
+    if gaps["cells"]:
+        print(f"   densest uncovered {report['gap_cell_km']:g} km cells:")
+        for cell in gaps["cells"]:
+            print(f"     {cell['latitude']:>8.4f}, {cell['longitude']:>8.4f}   {cell['buyers']} buyers")
+
+
+def write_per_buyer(path, ids, cities, b_lat, b_lon, counts, nearest, radii):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["buyer_id", "city", "latitude", "longitude"] +
+                        [f"farmers_{r:g}km" for r in radii] + ["nearest_km"])
+        for i in range(len(ids)):
+            writer.writerow([ids[i], cities[i], b_lat[i], b_lon[i], *counts[i].tolist(),
+                             "" if math.isinf(nearest[i]) else round(float(nearest[i]), 3)])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Per-buyer reachable-farmer counts and coverage gaps for the delivery radius")
+    parser.add_argument("--radius", type=float, default=APP_RADIUS_KM, help="radius the app uses (gaps are reported for it)")
+    parser.add_argument("--radii", type=float, nargs="+", default=[5, 10, 15, 20], help="radii for the what-if table")
+    parser.add_argument("--in-stock", action="store_true", help="only count farmers with a product in stock")
+    parser.add_argument("--max-cells", type=int, default=4_000_000,
+                        help="buyer x farmer pairs per distance tile (8 bytes each)")
+    parser.add_argument("--buyer-chunk", type=int, default=1024,
+                        help="buyers per chunk (smaller chunks meet fewer candidate farmers)")
+    parser.add_argument("--gap-cell-km", type=float, default=10.0, help="grid size for grouping uncovered buyers")
+    parser.add_argument("--top", type=int, default=10, help="cities and cells to list in the gap report")
+    parser.add_argument("--check-pairs", type=int, default=500, help="random pairs cross-checked against calculateDistance")
+    parser.add_argument("--check-buyers", type=int, default=20, help="buyers whose counts are brute-forced")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for the cross-check sample")
+    parser.add_argument("--json", metavar="PATH", help="also write the report to a JSON file")
+    parser.add_argument("--per-buyer", metavar="PATH", help="write every buyer's counts and nearest farmer to CSV")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    radii = sorted(set(args.radii) | {args.radius})
+    rng = random.Random(args.seed)
+
+    conn = perf_bench.connect()
+    try:
+        started = time.perf_counter()
+        ids, cities, b_lat, b_lon = load_buyers(conn)
+        f_lat, f_lon = load_farmers(conn, args.in_stock)
+        print(f"📥 Loaded {len(ids)} buyers and {len(f_lat)} farmers in {time.perf_counter() - started:.1f}s")
+    finally:
+        conn.close()
+
+    started = time.perf_counter()
+    counts, nearest = reachable_counts(b_lat, b_lon, f_lat, f_lon, radii, args.max_cells, args.buyer_chunk)
+    print(f"📐 Reachable counts for {len(radii)} radii in {time.perf_counter() - started:.1f}s")
+
+    print("\n=== Cross-check against calculateDistance ===")
+    problems = cross_check(b_lat, b_lon, f_lat, f_lon, counts, radii, rng, args)
+
+    covered = counts[:, radii.index(args.radius)] > 0
+    uncovered_nearest = nearest[~covered]
+    finite = uncovered_nearest[np.isfinite(uncovered_nearest)]
+    report = {
+        "buyers": len(ids),
+        "farmers": len(f_lat),
+        "in_stock": args.in_stock,
+        "radius_km": args.radius,
+        "radii": radii,
+        "gap_cell_km": args.gap_cell_km,
+        "what_if": what_if_table(counts, radii, len(f_lat)),
+        "gaps": {
+            "uncovered": int((~covered).sum()),
+            "uncovered_pct": float((~covered).mean() * 100) if len(ids) else 0.0,
+            "nearest_km_p50": float(np.percentile(finite, 50)) if len(finite) else None,
+            "beyond_max_radius": int(len(uncovered_nearest) - len(finite)),
+            "cities": city_gaps(cities, covered),
+            "cells": gap_cells(b_lat, b_lon, covered, args.gap_cell_km, args.top),
+        },
+        "cross_check_problems": problems,
+    }
+    print_report(report, args.top)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.per_buyer:
+        write_per_buyer(args.per_buyer, ids, cities, b_lat, b_lon, counts, nearest, radii)
+        print(f"\n💾 Per-buyer counts written to {args.per_buyer}")
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Traffic Replay for Local Farmer Marketplace
+Replays a capture written with TRAFFIC_CAPTURE_FILE (lib/traffic-capture.js)
+against a build at the captured pace or N times faster, keeping requests that
+overlapped in the capture concurrent, and reports per-route latency and errors
+
+Usage:
+    TRAFFIC_CAPTURE_FILE=capture.jsonl npm start          # record traffic (or run backend_test.py --load against it)
+    python replay.py capture.jsonl --output base.json --label main
+    python replay.py capture.jsonl --speed 4 --output new.json --label my-branch --compare base.json
+    API_BASE_URL=http://127.0.0.1:3001/api python replay.py capture.jsonl --routes "GET products" "GET orders/buyer"
+
+Masked fields are filled in from the seeded demo accounts: each request runs
+as the demo user of its captured role, logins use that role's demo
+credentials, registrations get fresh e-mail addresses and idempotency keys are
+regenerated. Paths and bodies keep the captured ids, so replay against a
+database loaded the same way (e.g. datagen.py with the same --seed).
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from backend_test import (
+    APITester, LoadTester, TEST_CREDENTIALS, compare_runs, percentile, route_label, write_run,
+)
+
+REDACTED = "***"
+
+# Filled into masked registration fields
+REGISTER_DEFAULTS = {"password": "replay123", "phone": "9876543210", "address": "1 Replay Road", "name": "Replay User"}
+
+
+def load_capture(path, routes=None, limit=None):
+    """Captured requests in arrival order, optionally only some routes ("GET products", "PUT products/:id")"""
+    entries = []
+    skipped = 0
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if routes and route_label(entry["m"], entry["p"]) not in routes:
+                continue
+            # Bodies too large (or unparseable) to keep cannot be replayed faithfully
+            if "x" in entry:
+                skipped += 1
+                continue
+            entries.append(entry)
+    entries.sort(key=lambda e: e["t"])
+    if limit:
+        entries = entries[:limit]
+    return entries, skipped
+
+
+class Replayer:
+    """Send captured requests on the captured schedule, scaled by speed"""
+
+    def __init__(self, tester, entries, speed=1.0, concurrency=256):
+        self.tester = tester
+        self.entries = entries
+        self.speed = speed
+        self.concurrency = concurrency
+        self.lock = threading.Lock()
+        self.lags_ms = []
+        self.mismatches = defaultdict(Counter)
+        self.captured = defaultdict(list)
+        self.captured_errors = Counter()
+        self.replayed_errors = Counter()
+
+    def login_roles(self):
+        roles = {entry.get("r") for entry in self.entries} & set(TEST_CREDENTIALS)
+        LoadTester(self.tester, {role: 1 for role in roles}).login_roles()
+        # Keep the setup logins out of the replayed per-route stats
+        with self.tester.results_lock:
+            self.tester.client_timings.clear()
+            self.tester.client_bytes.clear()
+            self.tester.client_statuses.clear()
+
+    def prepare(self, entry):
+        """(method, endpoint, request kwargs) for one captured request, with masked fields filled in"""
+        role = entry.get("r")
+        headers = dict(self.tester.get_auth_headers(role)) if entry["p"] != "auth/login" else {}
+        if entry.get("ik"):
+            headers["Idempotency-Key"] = str(uuid.uuid4())
+
+        params = [(key, self.tester.tokens.get(role, value) if key == "token" and value == REDACTED else value)
+                  for key, value in parse_qsl(entry.get("q", ""), keep_blank_values=True)]
+        kwargs = {"headers": headers, "params": params or None}
+
+        body = entry.get("b")
+        content_type = entry.get("ct", "")
+        if body is not None and content_type and "json" not in content_type:
+            headers["Content-Type"] = content_type
+            kwargs["body"] = body
+        elif body is not None:
+            data = json.loads(body)
+            if isinstance(data, dict):
+                if entry["p"] == "auth/login" and role in TEST_CREDENTIALS:
+                    data.update(TEST_CREDENTIALS[role])
+                elif entry["p"] == "auth/register":
+                    data.update({key: value for key, value in REGISTER_DEFAULTS.items() if data.get(key) == REDACTED})
+                    data["email"] = f"replay_{uuid.uuid4().hex[:12]}@example.com"
+                if "idempotencyKey" in data:
+                    data["idempotencyKey"] = str(uuid.uuid4())
+            kwargs["data"] = data
+        return entry["m"], entry["p"], kwargs
+
+    def send(self, entry, due):
+        lag_ms = (time.perf_counter() - due) * 1000
+        method, endpoint, kwargs = self.prepare(entry)
+        response = self.tester.make_request(method, endpoint, **kwargs)
+        status = response.status_code if response is not None else 0
+
+        label = route_label(method, endpoint)
+        with self.lock:
+            self.lags_ms.append(lag_ms)
+            self.captured[label].append(entry["d"])
+            if entry["s"] >= 500:
+                self.captured_errors[label] += 1
+            if status >= 500 or status == 0:
+                self.replayed_errors[label] += 1
+            if status != entry["s"]:
+                self.mismatches[label][f"{entry['s']}→{status}"] += 1
+
+    def run(self):
+        """Replay everything; returns per-route statistics for the report"""
+        self.login_roles()
+        captured_span = (self.entries[-1]["t"] - self.entries[0]["t"]) / 1000
+        print(f"🔁 Replaying {len(self.entries)} requests captured over {captured_span:.1f}s at {self.speed:g}x")
+
+        origin = self.entries[0]["t"]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = []
+            for entry in self.entries:
+                due = started + (entry["t"] - origin) / 1000 / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(pool.submit(self.send, entry, due))
+            for future in futures:
+                future.result()
+        wall_time = time.perf_counter() - started
+
+        replayed = self.tester.endpoint_stats()
+        report = {}
+        for label, durations in sorted(self.captured.items()):
+            durations.sort()
+            row = replayed.get(label, {})
+            report[label] = {
+                "requests": len(durations),
+                "captured_p50_ms": percentile(durations, 50),
+                "captured_p95_ms": percentile(durations, 95),
+                "p50_ms": row.get("p50_ms", 0.0),
+                "p95_ms": row.get("p95_ms", 0.0),
+                "captured_errors": self.captured_errors[label],
+                "errors": self.replayed_errors[label],
+                "status_changes": dict(self.mismatches[label]),
+            }
+        self.lags_ms.sort()
+        summary = {
+            "speed": self.speed,
+            "captured_seconds": captured_span,
+            "wall_seconds": wall_time,
+            "lag_p50_ms": percentile(self.lags_ms, 50),
+            "lag_p99_ms": percentile(self.lags_ms, 99),
+            "routes": report,
+        }
+        self.print_report(summary)
+        return summary
+
+    def print_report(self, summary):
+        print("\n" + "=" * 100)
+        print(f"📊 REPLAY SUMMARY ({summary['wall_seconds']:.1f}s wall time for "
+              f"{summary['captured_seconds']:.1f}s captured at {summary['speed']:g}x)")
+        print("=" * 100)
+        print(f"{'Route':<34}{'Reqs':>7}{'Captured p50':>14}{'Replay p50':>12}{'Replay p95':>12}"
+              f"{'5xx':>12}  Status changes")
+        for label, row in summary["routes"].items():
+            changes = ", ".join(f"{change} ×{count}" for change, count in sorted(row["status_changes"].items()))
+            print(f"{label:<34}{row['requests']:>7}{row['captured_p50_ms']:>12.1f}ms{row['p50_ms']:>10.1f}ms"
+                  f"{row['p95_ms']:>10.1f}ms{row['captured_errors']:>6} → {row['errors']:<4}  {changes}")
+        print(f"\nSchedule lag: p50 {summary['lag_p50_ms']:.1f} ms, p99 {summary['lag_p99_ms']:.1f} ms"
+              " (high lag means --concurrency or the client could not keep up)")
+        print("Captured times are server-side handler times; replay times are client-side.")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay captured API traffic against a build and compare runs")
+    parser.add_argument("capture", help="capture file written with TRAFFIC_CAPTURE_FILE")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay N times faster than captured (1 = real time)")
+    parser.add_argument("--concurrency", type=int, default=256, help="most requests in flight at once")
+    parser.add_argument("--routes", nargs="+", metavar="ROUTE", help='only replay these routes, e.g. "GET products"')
+    parser.add_argument("--limit", type=int, help="replay only the first N requests")
+    parser.add_argument("--output", metavar="PATH", help="write per-route results to .json or .csv (see backend_test.py)")
+    parser.add_argument("--label", help="name for this run in the JSON results (e.g. a build or commit)")
+    parser.add_argument("--compare", metavar="BASE", help="compare this run with an earlier --output (needs --output)")
+    parser.add_argument("--metric", default="p95_ms", choices=["mean_ms", "p50_ms", "p95_ms", "p99_ms"],
+                        help="latency statistic compared by --compare")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent slowdown that counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="ignore slowdowns smaller than this many ms")
+    args = parser.parse_args(argv)
+    if args.compare and not args.output:
+        parser.error("--compare needs --output for this run")
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    entries, skipped = load_capture(args.capture, set(args.routes) if args.routes else None, args.limit)
+    if skipped:
+        print(f"⚠️  Skipping {skipped} captured requests whose bodies were not kept")
+    if not entries:
+        print("❌ Nothing to replay")
+        return 1
+
+    tester = APITester(pool_size=args.concurrency)
+    summary = Replayer(tester, entries, speed=args.speed, concurrency=args.concurrency).run()
+    if args.output:
+        write_run(args.output, tester, "replay", label=args.label, load_report=summary)
+    if args.compare:
+        regressions = compare_runs(args.compare, args.output, metric=args.metric, threshold_pct=args.threshold,
+                                   min_delta_ms=args.min_delta_ms)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Order Event Stream Benchmark for Local Farmer Marketplace
+Holds thousands of idle SSE subscribers on /api/orders/stream, reports the
+server's memory per connection from /api/metrics, then places one order and
+times how long the order.created event takes to reach every subscriber
+
+Usage:
+    python local_server.py --prod -- python sse_bench.py --subscribers 5000
+    API_BASE_URL=http://127.0.0.1:3000/api python sse_bench.py --subscribers 1000 --hold 30
+
+Subscribers are plain asyncio sockets, so one process can hold many thousands;
+the open-file limit is raised to the hard limit on start.
+"""
+
+import argparse
+import asyncio
+import resource
+import ssl
+import sys
+import time
+from urllib.parse import urlsplit
+
+from backend_test import APITester, BASE_URL, TEST_CREDENTIALS, MUMBAI_GPS, percentile
+
+
+class Subscriber:
+    """One idle SSE connection that records when the awaited event arrives"""
+
+    def __init__(self, index):
+        self.index = index
+        self.writer = None
+        self.received_at = None
+        self.error = None
+
+    async def connect(self, url, token):
+        parts = urlsplit(url)
+        secure = parts.scheme == "https"
+        port = parts.port or (443 if secure else 80)
+        reader, self.writer = await asyncio.open_connection(
+            parts.hostname, port, ssl=ssl.create_default_context() if secure else None)
+        self.writer.write((
+            f"GET {parts.path}/orders/stream HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\n"
+            f"Authorization: Bearer {token}\r\n"
+            "Accept: text/event-stream\r\n"
+            "Cache-Control: no-cache\r\n\r\n"
+        ).encode())
+        await self.writer.drain()
+        status = await reader.readline()
+        if b" 200 " not in status:
+            raise RuntimeError(f"stream returned {status.decode().strip()}")
+        return reader
+
+    async def listen(self, reader, marker):
+        """Read until the marker shows up (chunked framing is ignored, the marker is matched as bytes)"""
+        tail = b""
+        try:
+            while True:
+                chunk = await reader.read(4096)
+                if not chunk:
+                    return
+                tail = (tail + chunk)[-4096:]
+                if self.received_at is None and marker in tail:
+                    self.received_at = time.perf_counter()
+        except (ConnectionError, asyncio.CancelledError):
+            return
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class StreamBenchmark:
+    """Open N subscribers, measure server memory, then time one fan-out"""
+
+    def __init__(self, args):
+        self.args = args
+        self.tester = APITester()
+        self.subscribers = []
+        self.tasks = []
+
+    def login(self, role):
+        payload = dict(TEST_CREDENTIALS[role])
+        if role == "buyer":
+            payload.update(MUMBAI_GPS)
+        response = self.tester.make_request("POST", "auth/login", payload)
+        if response is None or response.status_code != 200:
+            raise SystemExit(f"{role} login failed: {response.status_code if response else 'No response'}")
+        self.tester.tokens[role] = response.json()["token"]
+        return self.tester.tokens[role]
+
+    def gauges(self):
+        metrics = self.tester.fetch_server_metrics()
+        if metrics is None:
+            raise SystemExit("GET /api/metrics unavailable (set METRICS_TOKEN if the server requires it)")
+        return metrics["gauges"]
+
+    async def wait_for_connections(self, expected, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            gauges = await asyncio.to_thread(self.gauges)
+            if gauges["orderEvents"]["connections"] >= expected:
+                return gauges
+            await asyncio.sleep(0.5)
+        raise SystemExit(f"Server never reported {expected} stream connections")
+
+    async def open_all(self, token):
+        semaphore = asyncio.Semaphore(self.args.connect_concurrency)
+        failures = 0
+
+        async def open_one(sub):
+            nonlocal failures
+            async with semaphore:
+                try:
+                    reader = await sub.connect(BASE_URL, token)
+                except (OSError, RuntimeError) as e:
+                    sub.error = str(e)
+                    failures += 1
+                    return
+            self.tasks.append(asyncio.create_task(sub.listen(reader, b"event: order.created")))
+
+        self.subscribers = [Subscriber(i) for i in range(self.args.subscribers)]
+        started = time.perf_counter()
+        await asyncio.gather(*(open_one(sub) for sub in self.subscribers))
+        print(f"  opened {len(self.subscribers) - failures}/{len(self.subscribers)} streams "
+              f"in {time.perf_counter() - started:.1f}s")
+        if failures:
+            print(f"  ⚠️  {failures} failed, first error: {next(s.error for s in self.subscribers if s.error)}")
+        return len(self.subscribers) - failures
+
+    def place_order(self):
+        """Place a one-item COD order as the subscribed buyer and return when it was sent"""
+        response = self.tester.make_request("GET", "products", params=MUMBAI_GPS)
+        products = [p for p in (response.json() if response is not None and response.status_code == 200 else [])
+                    if p.get("quantity", 0) >= 1]
+        if not products:
+            raise SystemExit("No product in stock near Mumbai to order")
+        sent_at = time.perf_counter()
+        response = self.tester.make_request("POST", "orders", {
+            "items": [{"productId": products[0]["id"], "quantity": 1}],
+            "paymentMode": "cod"
+        }, headers=self.tester.get_auth_headers("buyer"))
+        if response is None or response.status_code != 200:
+            raise SystemExit(f"Order failed: {response.status_code if response else 'No response'}")
+        return sent_at
+
+    async def run(self):
+        args = self.args
+        token = self.login("buyer")
+
+        before = await asyncio.to_thread(self.gauges)
+        baseline = before["orderEvents"]["connections"]
+        print(f"\n=== {args.subscribers} idle subscribers on /orders/stream ===")
+        opened = await self.open_all(token)
+        after = await self.wait_for_connections(baseline + opened)
+
+        print(f"  holding idle for {args.hold:.0f}s")
+        await asyncio.sleep(args.hold)
+        held = await asyncio.to_thread(self.gauges)
+
+        rss_delta = held["process"]["rssBytes"] - before["process"]["rssBytes"]
+        heap_delta = held["process"]["heapUsedBytes"] - before["process"]["heapUsedBytes"]
+
+        print("\n=== Fan-out of one order.created event ===")
+        sent_at = await asyncio.to_thread(self.place_order)
+        deadline = time.monotonic() + args.timeout
+        while time.monotonic() < deadline and any(s.received_at is None for s in self.subscribers if not s.error):
+            await asyncio.sleep(0.05)
+        latencies = sorted((s.received_at - sent_at) * 1000 for s in self.subscribers if s.received_at)
+
+        for sub in self.subscribers:
+            sub.close()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+        print("\n" + "=" * 70)
+        print(f"📊 ORDER STREAM SUMMARY ({opened} subscribers)")
+        print("=" * 70)
+        print(f"Server RSS       {before['process']['rssBytes'] / 2**20:8.1f} MB → {held['process']['rssBytes'] / 2**20:8.1f} MB"
+              f"   ≈ {rss_delta / max(opened, 1) / 1024:.1f} KB per connection")
+        print(f"Server JS heap   {before['process']['heapUsedBytes'] / 2**20:8.1f} MB → {held['process']['heapUsedBytes'] / 2**20:8.1f} MB"
+              f"   ≈ {heap_delta / max(opened, 1) / 1024:.1f} KB per connection")
+        print(f"Peak connections {after['orderEvents']['peakConnections']}")
+        if latencies:
+            print(f"Delivered to     {len(latencies)}/{opened}   p50 {percentile(latencies, 50):.1f} ms   "
+                  f"p99 {percentile(latencies, 99):.1f} ms   max {latencies[-1]:.1f} ms")
+        else:
+            print("Delivered to     0 subscribers")
+        return len(latencies) == opened
+
+
+def raise_file_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Hold idle SSE subscribers and measure memory per connection")
+    parser.add_argument("--subscribers", type=int, default=2000, help="idle stream connections to open")
+    parser.add_argument("--hold", type=float, default=10.0, help="seconds to hold them idle before measuring")
+    parser.add_argument("--connect-concurrency", type=int, default=200, help="connections opened at once")
+    parser.add_argument("--timeout", type=float, default=15.0, help="seconds to wait for the fan-out to reach everyone")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    limit = raise_file_limit()
+    if args.subscribers + 100 > limit:
+        print(f"⚠️  open-file limit is {limit}; some of the {args.subscribers} connections may fail")
+    ok = asyncio.run(StreamBenchmark(args).run())
+    sys.exit(0 if ok else 1)